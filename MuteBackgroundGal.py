@@ -1,125 +1,259 @@
 import time
-import tkinter as tk
-from tkinter import ttk, messagebox
-from pycaw.pycaw import AudioUtilities, ISimpleAudioVolume
-import win32gui
-import win32process
-import pystray
-from PIL import Image, ImageDraw
-import threading
 import sys
-import json
 import os
 import logging
-from pathlib import Path
+import startup_timing
+from session_snapshot import SessionSnapshot
+from session_events import EventEngine, LatencyStats, DEVICE_CHANGED
+from platform_backend import WindowsBackend
+from window_index import WindowIndex
+from mute_state import MuteStateCache
+from config_store import ConfigStore
+from process_matcher import ProcessMatcher
+from history_store import HistoryStore
+from process_cache import ProcessMetadataCache
+from process_tree import ProcessTree
+from profiles import ProfileTable
+from mute_policy import MutePolicy, TRANSPARENT_PROCESSES
+from process_picker import ProcessPicker, PickerRow
+from tk_ui import TkUI, ManageDialog
+from icon_cache import IconCache, preferred_tray_size
+from async_core import ComWorker, ComThreadBackend, ControllerCore
+from tick_scheduler import TickScheduler, MIN_INTERVAL, MAX_INTERVAL
+from volume_fader import VolumeFader, FADE_DURATION, FADE_CURVE
+from control_server import ControlServer, DEFAULT_PORT
+from metrics import Metrics, write_metrics, start_queue_logging
+from trace_replay import TraceRecorder
+from hotkeys import (
+    HotkeyEngine, ACTION_TOGGLE_PAUSE, ACTION_FORCE_MUTE, ACTION_ADD_FOREGROUND,
+)
 
 class AudioController:
-    def __init__(self):
+    def __init__(self, backend=None, event_source=None, config_file=None):
+        # 平台后端：默认使用 Windows 后端，测试和基准时可传入 FakeBackend
+        raw_backend = backend if backend is not None else WindowsBackend()
+        # 所有后端调用都在同一个 COM 线程中执行，只需初始化一次 COM
+        self.com_worker = ComWorker(raw_backend.thread_init, raw_backend.thread_uninit)
+        self.backend = ComThreadBackend(raw_backend, self.com_worker)
+        # 控制器状态只在核心线程中修改，托盘和对话框通过 core.post/core.call 投递操作
+        self.core = ControllerCore()
         self.target_processes = {}  # 改为字典，存储 {pid: name} 的映射
+        self.target_create_times = {}  # {pid: 创建时间}，用于识别被复用的 pid
+        # 以 (pid, 创建时间) 为键的进程元数据缓存，监控、选择窗口和自动匹配共用
+        self.process_cache = ProcessMetadataCache(self.backend)
         self.running = True
-        self.monitoring_thread = None
         self.tray_icon = None
+        # 唯一的隐藏 Tk 根窗口和界面线程，对话框缓存复用；无界面模式不会启动
+        self.ui = TkUI()
+        self.icon_cache = IconCache()  # 预渲染的托盘图标
+        self.icon_size = preferred_tray_size()
+        self._icon_paused = None  # 托盘当前显示的图标状态
+        self.ui_update_latency = LatencyStats()  # 切换开关后刷新托盘的耗时
         self.paused = False
-        self.history_processes = set()  # 先初始化为空集合
         
         # 修改配置文件路径到当前目录
-        current_dir = os.path.dirname(os.path.abspath(__file__))
-        self.config_file = os.path.join(current_dir, 'gal_audio_controller_config.json')
+        if config_file is None:
+            current_dir = os.path.dirname(os.path.abspath(__file__))
+            config_file = os.path.join(current_dir, 'gal_audio_controller_config.json')
+        self.config_file = config_file
+        # 合并短时间内的多次修改，后台原子写入
+        self.config_store = ConfigStore(self.config_file)
         
         # 加载配置
         config = self.load_config()
-        self.history_processes = set(config.get('history_processes', []))
+        # 历史记录：以 (可执行文件路径, 进程名) 为键，单独保存在追加写入的 JSONL 文件中
+        self.history = HistoryStore(os.path.join(os.path.dirname(os.path.abspath(self.config_file)),
+                                                 'gal_audio_controller_history.jsonl'))
+        if not self.history.load() and config.get('history_processes'):
+            # 从旧版配置的 history_processes 迁移
+            self.history.import_names(config['history_processes'])
+        self.match_rules = config.get('match_rules', [])  # 通配符/正则/路径前缀规则
+        self.matcher = self._build_matcher()
         self.minimize_only = config.get('minimize_only', True)
         self.auto_close = config.get('auto_close', True)
         self.auto_match = config.get('auto_match', True)
-        self.last_muted_state = {}
+        self.mute_reconcile_interval = config.get('mute_reconcile_interval', 10)
+        # 静音/取消静音时的音量渐变，fade_duration 为 0 时直接切换
+        self.fade_duration = config.get('fade_duration', FADE_DURATION)
+        self.fade_curve = config.get('fade_curve', FADE_CURVE)
+        self.fader = VolumeFader(self.backend, self.fade_duration, self.fade_curve)
+        # 以会话标识为键的静音状态缓存，定期用实际状态校正
+        self.mute_states = MuteStateCache(self.backend, self.mute_reconcile_interval, self.fader)
+        # 自适应监控间隔：空闲时退避，前台切换后短时间加快
+        self.min_tick_interval = config.get('min_tick_interval', MIN_INTERVAL)
+        self.max_tick_interval = config.get('max_tick_interval', MAX_INTERVAL)
+        self.scheduler = TickScheduler(self.min_tick_interval, self.max_tick_interval)
+        # 按游戏配置的静音策略，编译成进程名查找表；目标加入时解析一次
+        self.profile_specs = config.get('profiles', {})
+        self.mute_grace = config.get('mute_grace', 0.0)
+        self.unmute_hysteresis = config.get('unmute_hysteresis', 0.0)
+        self.profiles = ProfileTable(self.profile_specs, self.minimize_only,
+                                     self.mute_grace, self.unmute_hysteresis)
+        self.target_profiles = {}  # {pid: Profile}
+        # 静音决策状态机：延迟静音、延迟恢复，忽略输入法/悬浮窗等透明前台进程
+        self.transparent_processes = config.get('transparent_processes', sorted(TRANSPARENT_PROCESSES))
+        self.policy = MutePolicy(self.backend, self.transparent_processes, self.process_cache)
+        self.clock = time.monotonic  # 状态机使用的时钟，回放时替换为虚拟时钟
+        self.forced_mutes = set()  # 通过热键强制静音的目标 pid
+        self._tick_snapshot = None  # 当前tick共享的会话快照
+        self.last_tick_enumerations = 0  # 上一轮tick实际枚举会话的次数
+        # 事件驱动引擎，事件源不可用时退回轮询
+        if event_source is None:
+            event_source = raw_backend.create_event_source()
+        self.event_engine = EventEngine(event_source)
+        self.window_index = WindowIndex(self.backend)  # pid -> 窗口最小化状态
+        # 按父进程链把启动器、引擎和辅助进程归为一组，同组的窗口和会话一起判断
+        self.process_tree = ProcessTree(self.backend)
+        # 全局热键：按键直接投递到核心线程修改状态，不经过托盘菜单
+        self.hotkey_bindings = config.get('hotkeys', {})
+        self.hotkeys = HotkeyEngine(raw_backend.create_hotkey_source(), self.hotkey_bindings,
+                                    lambda action, pressed_at: self.core.post(self.on_hotkey, action, pressed_at))
+        # 本地控制接口：无界面模式总是启动，托盘模式下 control_port 非 0 时启动
+        self.control_port = config.get('control_port', 0)
+        self.control_server = None
+        # 分阶段耗时、计数器和各模块统计，可定期导出到 metrics_file（.json 或 .prom）
+        self.metrics_file = config.get('metrics_file', '')
+        self.metrics_interval = config.get('metrics_interval', 10)
+        self._metrics_dumped = 0.0
+        self.metrics = Metrics()
+        # 录制会话/窗口时间线，供 trace_replay.py 离线回放
+        self.trace_file = config.get('trace_file', '')
+        self.recorder = None
+        if self.trace_file:
+            try:
+                self.recorder = TraceRecorder(self.trace_file, self.backend, {
+                    'minimize_only': self.minimize_only,
+                    'profiles': self.profile_specs,
+                    'mute_grace': self.mute_grace,
+                    'unmute_hysteresis': self.unmute_hysteresis,
+                    'transparent_processes': self.transparent_processes,
+                })
+            except OSError as e:
+                logging.info(f"打开录制文件失败: {e}")
+            else:
+                self.metrics.register('recorder', self.recorder.stats)
+        for name, stats in (
+                ('mute_latency', self.event_engine.mute_latency.summary),
+                ('window_index', self.window_index.stats),
+                ('mute_states', self.mute_states.stats),
+                ('process_cache', self.process_cache.stats),
+                ('process_tree', self.process_tree.stats),
+                ('history', self.history.stats),
+                ('profiles', self.profiles.stats),
+                ('policy', self.policy.stats),
+                ('hotkeys', self.hotkeys.stats),
+                ('config_store', self.config_store.stats),
+                ('scheduler', self.scheduler.stats),
+                ('fader', self.fader.stats),
+                ('tick_jitter', self.core.tick_jitter.summary),
+                ('backend', self.backend.stats)):
+            self.metrics.register(name, stats)
+        if raw_backend.endpoints is not None:
+            self.metrics.register('endpoints', raw_backend.endpoints.stats)
 
     def load_config(self):
         """加载配置文件"""
         default_config = {
-            'history_processes': [],
+            'match_rules': [],
             'auto_match': True,
             'minimize_only': True,
-            'auto_close': False
+            'auto_close': False,
+            'mute_reconcile_interval': 10,
+            'min_tick_interval': MIN_INTERVAL,
+            'max_tick_interval': MAX_INTERVAL,
+            'fade_duration': FADE_DURATION,
+            'fade_curve': FADE_CURVE,
+            'control_port': 0,
+            'metrics_file': '',
+            'metrics_interval': 10,
+            'profiles': {},
+            'mute_grace': 0.0,
+            'unmute_hysteresis': 0.0,
+            'transparent_processes': sorted(TRANSPARENT_PROCESSES),
+            'trace_file': '',
+            'hotkeys': {}
         }
-        try:
-            if os.path.exists(self.config_file):
-                with open(self.config_file, 'r', encoding='utf-8') as f:
-                    config = json.load(f)
-                    return config
-            else:
-                # 如果配置文件不存在，创建默认配置
-                with open(self.config_file, 'w', encoding='utf-8') as f:
-                    json.dump(default_config, f, ensure_ascii=False, indent=2)
-                return default_config
-        except Exception as e:
-            logging.info(f"加载配置文件失败: {e}")
-            return default_config
+        return self.config_store.load(default_config)
 
     def save_config(self):
-        """保存配置文件"""
+        """保存配置文件（只提交给后台写入线程，不在调用线程做文件 I/O）"""
         try:
             config = {
-                'history_processes': list(self.history_processes),
+                'match_rules': self.match_rules,
                 'auto_match': self.auto_match,
                 'minimize_only': self.minimize_only,
-                'auto_close': self.auto_close
+                'auto_close': self.auto_close,
+                'mute_reconcile_interval': self.mute_reconcile_interval,
+                'min_tick_interval': self.min_tick_interval,
+                'max_tick_interval': self.max_tick_interval,
+                'fade_duration': self.fade_duration,
+                'fade_curve': self.fade_curve,
+                'control_port': self.control_port,
+                'metrics_file': self.metrics_file,
+                'metrics_interval': self.metrics_interval,
+                'profiles': self.profile_specs,
+                'mute_grace': self.mute_grace,
+                'unmute_hysteresis': self.unmute_hysteresis,
+                'transparent_processes': self.transparent_processes,
+                'trace_file': self.trace_file,
+                'hotkeys': self.hotkey_bindings
             }
-            with open(self.config_file, 'w', encoding='utf-8') as f:
-                json.dump(config, f, ensure_ascii=False, indent=2)
+            self.config_store.save(config)
         except Exception as e:
             logging.info(f"保存配置文件失败: {e}")
 
-    def add_to_history(self, process_name):
-        """添加进程到历史记录"""
-        if process_name:
-            self.history_processes.add(process_name)
-            self.save_config()
+    def add_to_history(self, process_name, exe=None):
+        """添加进程到历史记录，拿得到路径时按完整路径记录"""
+        if not process_name:
+            return
+        if self.history.record(process_name, exe):
+            # 只有名称的旧记录被带路径的记录取代，同名的其他程序不再匹配
+            self.matcher = self._build_matcher()
+        elif exe:
+            self.matcher.add_exe(exe)
+        else:
+            self.matcher.add_name(process_name)
+
+    def _build_matcher(self):
+        return ProcessMatcher(self.history.names(), self.match_rules, self.history.exe_paths())
 
     def create_icon(self, is_pause=False):
-        """创建状态图标"""
-        icon_size = 64
-        image = Image.new('RGB', (icon_size, icon_size), color='white')
-        drawing = ImageDraw.Draw(image)
-        
-        if is_pause:
-            # 暂停状态：红色双竖线
-            pause_color = '#D32F2F'
-            drawing.rectangle([20, 15, 30, 49], fill=pause_color)
-            drawing.rectangle([39, 15, 49, 49], fill=pause_color)
-        else:
-            # 播放状态：绿色三角形
-            play_color = '#00C853'
-            points = [(20, 15), (20, 49), (49, 32)]
-            drawing.polygon(points, fill=play_color)
-        
-        return image
+        """获取状态图标（预渲染并缓存，不再每次重新绘制）"""
+        return self.icon_cache.get(is_pause, self.icon_size)
 
     def update_icon_and_menu(self):
-        """更新图标和菜单状态"""
+        """更新图标和菜单状态：图标只在暂停状态变化时替换，菜单只刷新动态项"""
         if self.tray_icon:
-            self.tray_icon.icon = self.create_icon(self.paused)
-            self.tray_icon.menu = self.create_menu()
+            start = time.perf_counter()
+            if self._icon_paused != self.paused:
+                self._icon_paused = self.paused
+                self.tray_icon.icon = self.create_icon(self.paused)
+            self.tray_icon.update_menu()
+            self.ui_update_latency.record(time.perf_counter() - start)
 
     def create_menu(self):
         """创建托盘菜单"""
+        with startup_timing.timed_import('pystray'):
+            import pystray
+
         def add_process_callback(icon, item):
             self.add_process()
             
         def manage_processes_callback(icon, item):
             self.manage_processes()
             
+        # 开关类操作只修改状态，投递到核心线程执行，不阻塞托盘线程
         def toggle_pause_callback(icon, item):
-            self.toggle_pause()
+            self.core.post(self.toggle_pause)
             
         def toggle_minimize_callback(icon, item):
-            self.toggle_minimize_only()
+            self.core.post(self.toggle_minimize_only)
             
         def toggle_auto_close_callback(icon, item):
-            self.toggle_auto_close()
+            self.core.post(self.toggle_auto_close)
             
         def toggle_auto_match_callback(icon, item):
-            self.toggle_auto_match()
+            self.core.post(self.toggle_auto_match)
             
         def clear_history_callback(icon, item):
             self.clear_history()
@@ -130,12 +264,12 @@ class AudioController:
         return pystray.Menu(
             pystray.MenuItem("Galgame音频控制器", None, enabled=False),
             pystray.MenuItem(
-                f"状态: {'已暂停' if self.paused else '监控中'}", 
-                None, 
+                lambda item: f"状态: {'已暂停' if self.paused else '监控中'}",
+                None,
                 enabled=False
             ),
             pystray.MenuItem(
-                f"{'继续监控' if self.paused else '暂停监控'}", 
+                lambda item: '继续监控' if self.paused else '暂停监控',
                 toggle_pause_callback
             ),
             pystray.MenuItem(
@@ -173,23 +307,116 @@ class AudioController:
 
     def create_tray_icon(self):
         """创建系统托盘图标"""
+        with startup_timing.timed_import('pystray'):
+            import pystray
+
+        self._icon_paused = self.paused
         self.tray_icon = pystray.Icon(
             "galgame_audio_controller",
-            self.create_icon(),
+            self.create_icon(self.paused),
             "Galgame音频控制器\n右键可暂停/继续",
             menu=self.create_menu()
         )
 
     def toggle_pause(self):
         """切换暂停状态"""
-        self.paused = not self.paused
+        self._apply_pause(not self.paused)
+        self.update_icon_and_menu()
+
+    def _apply_pause(self, paused):
+        """修改暂停状态并恢复音量，不刷新托盘"""
+        self.paused = paused
+        if self.recorder is not None:
+            self.recorder.setting('paused', self.paused)
         if self.paused and self.target_processes:
             self.restore_volume(self.target_processes.keys())
+        # 暂停期间间隔已退避，继续监控时立即执行一轮
+        self.event_engine.wake()
+        self.publish({'event': 'paused', 'paused': self.paused})
+
+    def set_paused(self, paused):
+        """设置暂停状态"""
+        if bool(paused) != self.paused:
+            self.toggle_pause()
+
+    def on_hotkey(self, action, pressed_at):
+        """执行热键动作（核心线程），生效后记录耗时，最后再刷新托盘"""
+        try:
+            if action == ACTION_TOGGLE_PAUSE:
+                self._apply_pause(not self.paused)
+            elif action == ACTION_FORCE_MUTE:
+                self.toggle_force_mute()
+            elif action == ACTION_ADD_FOREGROUND:
+                self.add_foreground_target()
+        except Exception as e:
+            logging.info(f"执行热键 {action} 失败: {e}")
+            return
+        self.metrics.observe(f'hotkey_{action}_ms', self.hotkeys.record(pressed_at))
         self.update_icon_and_menu()
 
+    def _foreground_target(self):
+        """前台窗口所在进程组中的监控目标，没有时返回 (前台 pid, None)"""
+        foreground_pid = self.policy.foreground(self.get_foreground_window_pid())
+        if not foreground_pid:
+            return None, None
+        self.process_tree.add_pids((foreground_pid,))
+        for pid in self.target_processes:
+            if self.process_tree.same_group(foreground_pid, pid):
+                return foreground_pid, pid
+        return foreground_pid, None
+
+    def toggle_force_mute(self):
+        """强制静音前台的游戏，已强制静音时取消；只操作已缓存的会话"""
+        foreground_pid, pid = self._foreground_target()
+        if pid is None:
+            logging.info(f"前台进程 {foreground_pid} 不是监控目标，忽略强制静音")
+            return None
+        return self.set_force_mute(pid, pid not in self.forced_mutes)
+
+    def set_force_mute(self, pid, forced):
+        """设置目标是否强制静音（回放时直接调用）
+
+        暂停时只记录，不立即静音，继续监控后的第一轮tick再静音。
+        """
+        if self.recorder is not None:
+            self.recorder.setting('force_mute', [pid, forced])
+        group = self.process_tree.expand((pid,))
+        if not forced:
+            self.forced_mutes.discard(pid)
+            # 按当前策略本来就应静音时保持静音，否则立即恢复
+            if self.paused or not self.policy.muted(pid):
+                self.mute_states.restore(group)
+        else:
+            self.forced_mutes.add(pid)
+            # 会话还没有缓存（目标刚加入）时由下一轮tick静音
+            if not self.paused and not self.mute_states.mute(group):
+                self.event_engine.wake()
+        logging.info(f"强制静音 {self.target_processes.get(pid)} (PID: {pid}): {forced}")
+        self.publish({'event': 'forced', 'pid': pid, 'forced': forced})
+        return forced
+
+    def add_foreground_target(self):
+        """把前台进程（或同组中有音频会话的进程）加入监控，返回新添加的 pid 列表"""
+        foreground_pid, pid = self._foreground_target()
+        if not foreground_pid or pid is not None:
+            return []
+        snapshot = self.get_session_snapshot()
+        candidates = [foreground_pid] + sorted(self.process_tree.group(foreground_pid) - {foreground_pid})
+        for candidate in candidates:
+            entries = snapshot.by_pid(candidate)
+            if entries:
+                self._select_process(candidate, entries[0].name)
+                logging.info(f"热键添加进程: {entries[0].name} (PID: {candidate})")
+                return [candidate]
+        logging.info(f"前台进程 {foreground_pid} 没有音频会话")
+        return []
+
     def toggle_minimize_only(self):
         """切换是否仅在最小化时静音"""
         self.minimize_only = not self.minimize_only
+        if self.recorder is not None:
+            self.recorder.setting('minimize_only', self.minimize_only)
+        self.compile_profiles()
         self.save_config()  # 保存设置
         self.update_icon_and_menu()
 
@@ -207,72 +434,125 @@ class AudioController:
 
     def clear_history(self):
         """清空历史记录"""
-        self.history_processes.clear()
-        self.save_config()
-        messagebox.showinfo("提示", "历史记录已清空")
-
-    def find_matching_processes(self):
+        self.core.call(self._clear_history)
+        self.ui.message('showinfo', "提示", "历史记录已清空")
+
+    def _clear_history(self):
+        self.history.clear()
+        self.matcher = self._build_matcher()
+
+    def get_session_snapshot(self):
+        """获取会话快照：tick内复用同一份快照，tick外重新枚举"""
+        snapshot = self._tick_snapshot
+        if snapshot is None:
+            snapshot = SessionSnapshot.capture(self.backend, self.process_cache)
+        return snapshot
+
+    def _matching_entries(self, snapshot=None):
+        """返回快照中匹配历史记录/规则的会话条目"""
+        if snapshot is None:
+            snapshot = self.get_session_snapshot()
+
+        matcher = self.matcher
+        matched = [entry for entry in snapshot
+                   if matcher.match(entry.pid, entry.name, self.process_cache.exe, entry.info.create_time)]
+        matcher.prune(snapshot.pids)
+        return matched
+
+    def find_matching_processes(self, snapshot=None):
         """查找匹配的历史进程"""
-        matching_processes = []
-        sessions = AudioUtilities.GetAllSessions()
-        
-        for session in sessions:
-            if session.Process and session.Process.name() in self.history_processes:
-                matching_processes.append((session.Process.pid, session.Process.name()))
-        
-        return matching_processes
+        return [(entry.pid, entry.name) for entry in self._matching_entries(snapshot)]
+
+    def add_target(self, pid, name, create_time=None):
+        """加入监控目标，记录创建时间以便识别 pid 复用"""
+        if create_time is None:
+            info = self.process_cache.lookup(pid)
+            create_time = info.create_time if info is not None else None
+        self.target_processes[pid] = name
+        self.target_create_times[pid] = create_time
+        self.target_profiles[pid] = self.profiles.lookup(name)
+        if self.recorder is not None:
+            self.recorder.target(pid, name)
+
+    def remove_target(self, pid):
+        """移除监控目标"""
+        self.target_processes.pop(pid, None)
+        self.target_create_times.pop(pid, None)
+        self.target_profiles.pop(pid, None)
+        self.forced_mutes.discard(pid)
+        self.policy.forget(pid)
+        self.mute_states.forget([pid])
+
+    def compile_profiles(self):
+        """重新编译策略表（全局设置变化后调用），并更新所有目标的策略"""
+        self.profiles.compile(self.minimize_only, self.mute_grace, self.unmute_hysteresis)
+        for pid, name in self.target_processes.items():
+            self.target_profiles[pid] = self.profiles.lookup(name)
 
-    def auto_select_process(self):
+    def auto_select_process(self, snapshot=None):
         """尝试自动选择进程"""
-        if not self.auto_match or not self.history_processes:
+        if not self.auto_match or self.matcher.empty:
             return False
-            
+
         found_new_process = False
-        sessions = AudioUtilities.GetAllSessions()
-        
-        for session in sessions:
-            if session.Process and session.Process.name() in self.history_processes:
-                pid = session.Process.pid
-                # 只添加还未在监控列表中的进程
-                if pid not in self.target_processes:
-                    self.target_processes[pid] = session.Process.name()
-                    self.last_muted_state[pid] = False
-                    logging.info(f"自动添加进程: {session.Process.name()} (PID: {pid})")
-                    found_new_process = True
-        
+        for entry in self._matching_entries(snapshot):
+            # 只添加还未在监控列表中的进程
+            if entry.pid not in self.target_processes:
+                self.add_target(entry.pid, entry.name, entry.info.create_time)
+                self.add_to_history(entry.name, entry.info.exe)  # 更新最近使用时间
+                logging.info(f"自动添加进程: {entry.name} (PID: {entry.pid})")
+                found_new_process = True
+
         return found_new_process
 
     def restore_volume(self, pids):
-        """恢复指定进程的音量"""
-        if not isinstance(pids, (list, set)):
+        """恢复指定进程（及其同组进程）的音量（直接使用缓存的会话，不重新枚举）"""
+        if isinstance(pids, int):
             pids = [pids]
-            
+
         try:
-            sessions = AudioUtilities.GetAllSessions()
-            for session in sessions:
-                if session.Process and session.Process.pid in pids:
-                    volume = session._ctl.QueryInterface(ISimpleAudioVolume)
-                    volume.SetMute(0, None)
+            self.mute_states.restore(self.process_tree.expand(pids))
         except Exception as e:
             logging.info(f"恢复音量失败: {e}")
 
     def restore_all_volumes(self):
-        """恢复所有被跟踪进程的音量"""
+        """恢复所有被本程序静音的会话"""
         try:
-            sessions = AudioUtilities.GetAllSessions()
-            for session in sessions:
-                if session.Process and session.Process.pid in self.last_muted_state:
-                    volume = session._ctl.QueryInterface(ISimpleAudioVolume)
-                    volume.SetMute(0, None)
+            self.mute_states.restore(immediate=True)
+            self.fader.stop()
         except Exception as e:
             logging.info(f"恢复所有音量失败: {e}")
 
     def stop_monitoring(self):
         """停止监控并退出程序"""
+        if self.core.running and not self.core.in_core_thread():
+            # 从托盘线程调用时转到核心线程执行，保证和监控tick串行
+            self.core.call(self.stop_monitoring)
+            return
         self.running = False
+        self.event_engine.stop()
+        self.hotkeys.stop()
+        self.backend.unwatch_devices()
+        logging.info(f"静音延迟统计: {self.event_engine.mute_latency.summary()}")
+        logging.info(f"窗口索引统计: {self.window_index.stats()}")
+        logging.info(f"静音状态统计: {self.mute_states.stats()}")
+        logging.info(f"托盘刷新耗时: {self.ui_update_latency.summary()}")
+        logging.info(f"配置写入统计: {self.config_store.stats()}")
+        logging.info(f"进程元数据缓存: {self.process_cache.stats()}")
+        logging.info(f"进程树统计: {self.process_tree.stats()}")
+        logging.info(f"定时唤醒抖动: {self.core.tick_jitter.summary()}")
+        logging.info(f"监控唤醒统计: {self.scheduler.stats()}")
+        logging.info(f"音量渐变统计: {self.fader.stats()}")
+        if self.metrics_file:
+            write_metrics(self.metrics_file, self.metrics.render(self.metrics_file))
         self.restore_all_volumes()
         # 确保在退出前保存配置
         self.save_config()
+        self.config_store.close()
+        self.history.close()
+        if self.recorder is not None:
+            self.recorder.close()
+        self.ui.stop()
         if self.tray_icon:
             self.tray_icon.stop()
 
@@ -280,304 +560,355 @@ class AudioController:
         """添加新的监控进程"""
         # 直接显示进程选择窗口，不进行自动匹配
         self.select_target_process(skip_auto_match=True)
-        self.update_icon_and_menu()
 
     def manage_processes(self):
         """管理当前监控的进程"""
-        if not self.target_processes:
-            messagebox.showinfo("提示", "当前没有监控的进程")
+        # 对话框运行在界面线程，只读取一份目标列表的副本
+        targets = self.core.call(dict, self.target_processes)
+        if not targets:
+            self.ui.message('showinfo', "提示", "当前没有监控的进程")
             return
-            
-        root = tk.Tk()
-        root.title("管理监控进程")
-        root.geometry("400x300")
-        
-        # 创建主框架
-        main_frame = ttk.Frame(root)
-        main_frame.pack(expand=True, fill=tk.BOTH, padx=10, pady=10)
-        
-        # 添加标签
-        ttk.Label(main_frame, text="当前监控的进程:").pack(anchor='w')
-        
-        # 创建列表框和滚动条
-        list_frame = ttk.Frame(main_frame)
-        list_frame.pack(expand=True, fill=tk.BOTH, pady=(5,0))
-        
-        listbox = tk.Listbox(list_frame)
-        scrollbar = ttk.Scrollbar(list_frame, orient=tk.VERTICAL, command=listbox.yview)
-        listbox.configure(yscrollcommand=scrollbar.set)
-        
-        # 填充数据
-        for pid, name in self.target_processes.items():
-            listbox.insert(tk.END, f"{name} (PID: {pid})")
-        
-        listbox.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
-        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
-        
-        # 按钮框架
-        button_frame = ttk.Frame(main_frame)
-        button_frame.pack(fill=tk.X, pady=10)
-        
-        def remove_selected():
-            selected = listbox.curselection()
-            if not selected:
-                messagebox.showwarning("提示", "请先选择一个进程")
-                return
-                
-            # 从列表中获取PID
-            item_text = listbox.get(selected[0])
-            pid = int(item_text.split("PID: ")[1].strip(")"))
-            
-            # 恢复音量并移除进程
-            self.restore_volume(pid)
-            if pid in self.target_processes:
-                del self.target_processes[pid]
-            if pid in self.last_muted_state:
-                del self.last_muted_state[pid]
-                
-            # 更新列表
-            listbox.delete(selected[0])
-        
-        ttk.Button(button_frame, text="移除选中进程", command=remove_selected).pack(side=tk.LEFT, padx=5)
-        ttk.Button(button_frame, text="关闭", command=root.destroy).pack(side=tk.RIGHT, padx=5)
-        
-        # 窗口居中显示
-        root.update_idletasks()
-        width = root.winfo_width()
-        height = root.winfo_height()
-        x = (root.winfo_screenwidth() // 2) - (width // 2)
-        y = (root.winfo_screenheight() // 2) - (height // 2)
-        root.geometry(f'{width}x{height}+{x}+{y}')
-        
-        root.mainloop()
+        self.ui.open('manage', self._create_manage_dialog, targets)
+
+    def _create_manage_dialog(self, master):
+        return ManageDialog(
+            master,
+            lambda pid: self.core.post(self.remove_and_restore, pid),
+            on_timing=self._ui_timing,
+        )
+
+    def _ui_timing(self, name, ms):
+        """对话框打开耗时：首次打开记入启动耗时，全部记入指标"""
+        startup_timing.mark(f'ui_{name}')
+        self.core.post(self.metrics.observe, f'ui_{name}_ms', ms)
+
+    def remove_and_restore(self, pid):
+        """恢复音量并移除监控目标"""
+        if self.recorder is not None:
+            self.recorder.untarget(pid)
+        self.restore_volume(pid)
+        self.remove_target(pid)
+        self.publish({'event': 'removed', 'pid': pid})
+
+    def add_target_by_pid(self, pid):
+        """按 pid 添加有音频会话的进程，返回新添加的 pid 列表"""
+        entries = self.get_session_snapshot().by_pid(pid)
+        if not entries or pid in self.target_processes:
+            return []
+        self._select_process(pid, entries[0].name)
+        return [pid]
+
+    def add_target_by_name(self, name):
+        """添加所有同名（不区分大小写）的音频会话进程，返回新添加的 pid 列表"""
+        key = name.casefold()
+        added = []
+        for entry in self.get_session_snapshot():
+            if entry.name and entry.name.casefold() == key and entry.pid not in self.target_processes:
+                self._select_process(entry.pid, entry.name)
+                added.append(entry.pid)
+        return added
+
+    def publish(self, message):
+        """向控制接口的订阅者推送事件"""
+        if self.control_server is not None:
+            self.control_server.publish(message)
+
+    def _picker_rows(self):
+        """选择窗口的候选进程（每个 pid 一行，在核心线程中执行）"""
+        rows = {}
+        for entry in self.get_session_snapshot():
+            # 跳过已经在监控列表中的进程
+            if entry.pid in self.target_processes or entry.pid in rows:
+                continue
+            matched = self.matcher.match(entry.pid, entry.name, self.process_cache.exe, entry.info.create_time)
+            rank = self.history.rank(entry.name, entry.info.exe) if matched else (0, 0)
+            rows[entry.pid] = PickerRow(entry.pid, entry.name, entry.info.exe, matched, rank)
+        return list(rows.values())
+
+    def _select_process(self, pid, name):
+        self.add_target(pid, name)
+        self.add_to_history(name, self.process_cache.exe(pid))  # 添加到历史记录
+        self.scheduler.burst()
+        self.event_engine.wake()
+        self.publish({'event': 'added', 'pid': pid, 'name': name})
+        self.update_icon_and_menu()
 
     def select_target_process(self, skip_auto_match=False):
-        """创建进程选择窗口"""
+        """打开进程选择窗口：窗口先显示，候选进程由后台枚举并持续刷新；自动匹配成功时返回 True"""
         # 只在启动时自动匹配，手动添加进程时跳过自动匹配
-        if not skip_auto_match and self.auto_match and self.auto_select_process():
+        if not skip_auto_match and self.auto_match and self.core.call(self.auto_select_process):
             return True
-
-        root = tk.Tk()
-        root.title("选择要监控的程序")
-        root.geometry("400x450")
-        root.attributes('-topmost', True)  # 窗口置顶
-
-        # 创建主框架
-        main_frame = ttk.Frame(root)
-        main_frame.pack(expand=True, fill=tk.BOTH, padx=10, pady=10)
-
-        # 添加标签
-        label_text = "请选择要监控的游戏进程："
-        if self.history_processes:
-            label_text += "（绿色背景为历史记录）"
-        ttk.Label(main_frame, text=label_text).pack(anchor='w')
-
-        # 创建树形视图和滚动条
-        tree_frame = ttk.Frame(main_frame)
-        tree_frame.pack(expand=True, fill=tk.BOTH, pady=(5,0))
-
-        tree = ttk.Treeview(tree_frame, columns=('PID', 'Name'), show='headings', height=15)
-        tree.heading('PID', text='进程ID')
-        tree.heading('Name', text='进程名称')
-        tree.column('PID', width=100)
-        tree.column('Name', width=280)
-
-        scrollbar = ttk.Scrollbar(tree_frame, orient=tk.VERTICAL, command=tree.yview)
-        tree.configure(yscrollcommand=scrollbar.set)
-
-        # 填充数据
-        matched_items = []  # 用于存储匹配的历史进程项
-        sessions = AudioUtilities.GetAllSessions()
-        for session in sessions:
-            if session.Process:
-                pid = session.Process.pid
-                # 跳过已经在监控列表中的进程
-                if pid in self.target_processes:
-                    continue
-                    
-                item = tree.insert('', tk.END, values=(pid, session.Process.name()))
-                if session.Process.name() in self.history_processes:
-                    matched_items.append(item)
-                    tree.item(item, tags=('history',))
-
-        # 设置历史进程的特殊样式
-        tree.tag_configure('history', background='#E8F5E9')  # 浅绿色背景
-
-        tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
-        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
-
-        # 如果有匹配的历史进程，选中第一个
-        if matched_items:
-            tree.selection_set(matched_items[0])
-            tree.see(matched_items[0])
-
-        def on_select():
-            selected_item = tree.selection()
-            if selected_item:
-                pid, name = tree.item(selected_item[0])['values']
-                pid = int(pid)  # 确保 pid 是整数
-                self.target_processes[pid] = name
-                self.last_muted_state[pid] = False
-                self.add_to_history(name)  # 添加到历史记录
-                root.destroy()
-            else:
-                messagebox.showwarning("提示", "请先选择一个进程")
-
-        # 确认按钮
-        ttk.Button(main_frame, text="确定", command=on_select, width=20).pack(pady=10)
-
-        # 窗口居中显示
-        root.update_idletasks()
-        width = root.winfo_width()
-        height = root.winfo_height()
-        x = (root.winfo_screenwidth() // 2) - (width // 2)
-        y = (root.winfo_screenheight() // 2) - (height // 2)
-        root.geometry(f'{width}x{height}+{x}+{y}')
-        root.minsize(400, 450)
-
-        # 双击选择功能
-        tree.bind('<Double-1>', lambda e: on_select())
-        
-        # 处理窗口关闭
-        root.protocol("WM_DELETE_WINDOW", root.destroy)
-        
-        root.mainloop()
+        self.ui.open('picker', self._create_picker)
+        return False
+
+    def _create_picker(self, master):
+        return ProcessPicker(
+            master,
+            lambda: self.core.call(self._picker_rows),
+            # 选择结果投递给核心线程，界面线程不等待
+            lambda pid, name: self.core.post(self._select_process, pid, name),
+            on_timing=self._ui_timing,
+            on_close=lambda: startup_timing.mark('picker_closed'),
+        )
 
     def is_window_minimized(self, pid):
-        """检查指定进程的窗口是否最小化"""
-        def callback(hwnd, hwnds):
-            try:
-                _, window_pid = win32process.GetWindowThreadProcessId(hwnd)
-                if window_pid == pid and win32gui.IsWindowVisible(hwnd):
-                    hwnds.append(hwnd)
-            except:
-                pass
-            return True
-
-        hwnds = []
-        win32gui.EnumWindows(callback, hwnds)
-        
-        return all(win32gui.IsIconic(hwnd) for hwnd in hwnds) if hwnds else False
+        """检查指定进程所在进程组的窗口是否都已最小化（查询本轮tick的窗口索引）"""
+        return self.process_tree.group_minimized(pid, self.window_index)
 
     def get_foreground_window_pid(self):
         """获取当前前台窗口的进程ID"""
-        try:
-            hwnd = win32gui.GetForegroundWindow()
-            _, pid = win32process.GetWindowThreadProcessId(hwnd)
-            return pid
-        except:
-            return None
-
-    def monitor_target_app(self):
-        """监控目标应用的音频状态"""
-        while self.running:
+        return self.backend.get_foreground_pid()
+
+    async def monitor_target_app(self):
+        """监控目标应用的音频状态：有事件时立即处理，否则按兜底间隔轮询
+
+        运行在核心线程的事件循环中，等待事件期间可以处理托盘投递的消息。
+        """
+        self.event_engine.bind_loop(self.core.loop)
+        self.event_engine.start()
+        self.hotkeys.start()
+        # 输出设备变化时立即执行一轮，新设备上的会话在下一次枚举时发现
+        self.backend.watch_devices(lambda kind, device_id: self.event_engine.emit(DEVICE_CHANGED))
+        if self.control_server is not None:
             try:
-                # 不管是否有目标进程，都尝试自动匹配新进程
-                if self.auto_match:
-                    self.auto_select_process()
-                    
-                if not self.target_processes:
-                    time.sleep(1)
-                    continue
-
-                if self.paused:
-                    time.sleep(1)
-                    continue
-
-                # 获取当前所有音频会话
-                sessions = AudioUtilities.GetAllSessions()
-                
-                # 检查目标进程是否仍在运行，移除已结束的进程
-                active_pids = set()
-                for session in sessions:
-                    if session.Process:
-                        active_pids.add(session.Process.pid)
-                
-                # 移除已结束的进程
-                ended_processes = []
-                for pid in list(self.target_processes.keys()):
-                    if pid not in active_pids:
-                        ended_processes.append((pid, self.target_processes[pid]))
-                        del self.target_processes[pid]
-                        if pid in self.last_muted_state:
-                            del self.last_muted_state[pid]
-                
-                # 如果所有进程都结束且设置了自动关闭
-                if ended_processes and not self.target_processes and self.auto_close:
-                    process_names = ", ".join([name for _, name in ended_processes])
-                    logging.info(f"所有监控进程已结束: {process_names}，程序自动关闭")
-                    self.save_config()
-                    self.stop_monitoring()
-                    break
-                
+                await self.control_server.start()
+            except OSError as e:
+                logging.info(f"控制接口启动失败: {e}")
+                self.control_server = None
+        events = []
+        first_tick = True
+        try:
+            while self.running:
+                self.scheduler.note_events(events)
+                cpu_start = time.process_time()
+                try:
+                    if not self.monitor_tick(events):
+                        break
+                except Exception as e:
+                    self.metrics.inc('tick_errors')
+                    logging.info(f"监控过程中出现错误: {e}")
+                self.scheduler.record_tick(time.process_time() - cpu_start)
+                self._maybe_dump_metrics()
+                if first_tick:
+                    first_tick = False
+                    startup_timing.mark('first_tick')
+                    startup_timing.log_report()
+                timeout = self.scheduler.next_interval(
+                    self.event_engine.poll_interval, not self.target_processes or self.paused)
+                # 等待中的静音/恢复到期时需要醒来
+                if self.policy.deadline is not None:
+                    timeout = min(timeout, self.policy.deadline)
+                deadline = time.monotonic() + timeout
+                events = await self.event_engine.wait_async(timeout, jitter=self.core.tick_jitter)
+                # 空闲或暂停时不需要处理的事件不触发tick，继续等到原定的唤醒时间
+                while events and self.running and not self._wants_tick(events):
+                    self.window_index.invalidate()
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        events = []
+                        break
+                    events = await self.event_engine.wait_async(remaining, jitter=self.core.tick_jitter)
+        finally:
+            if self.control_server is not None:
+                await self.control_server.close()
+            self.com_worker.shutdown()
+
+    def _wants_tick(self, events):
+        idle = not self.target_processes or self.paused
+        return self.scheduler.wants_tick(events, idle, self.auto_match and not self.paused)
+
+    def _maybe_dump_metrics(self):
+        """按 metrics_interval 在后台线程导出指标，不阻塞监控循环"""
+        if not self.metrics_file:
+            return
+        now = time.monotonic()
+        if now - self._metrics_dumped < self.metrics_interval:
+            return
+        self._metrics_dumped = now
+        text = self.metrics.render(self.metrics_file)
+        self.core.loop.run_in_executor(None, write_metrics, self.metrics_file, text)
+
+    def monitor_tick(self, events=()):
+        """执行一轮监控，所有逻辑共享同一份会话快照；返回 False 表示应退出监控
+
+        events 为触发本轮tick的事件，用于统计事件到 SetMute 的延迟。
+        """
+        enumerations_before = SessionSnapshot.enumerations
+        metrics = self.metrics
+        tick_start = time.perf_counter()
+        self.policy.begin()
+        recorder = self.recorder
+        if recorder is not None:
+            recorder.start_tick()
+        try:
+            snapshot = None
+            # 不管是否有目标进程，都尝试自动匹配新进程；暂停时不枚举会话
+            if self.auto_match and not self.paused:
+                with metrics.phase('enumerate'):
+                    snapshot = self._tick_snapshot = SessionSnapshot.capture(self.backend, self.process_cache)
+                self.auto_select_process(snapshot)
+
+            if not self.target_processes or self.paused:
+                return True
+
+            # 获取当前所有音频会话
+            if snapshot is None:
+                with metrics.phase('enumerate'):
+                    snapshot = self._tick_snapshot = SessionSnapshot.capture(self.backend, self.process_cache)
+
+            # 移除已结束的进程（包括 pid 已被其他进程复用的情况）
+            ended_processes = []
+            for pid, name in list(self.target_processes.items()):
+                entries = snapshot.by_pid(pid)
+                create_time = self.target_create_times.get(pid)
+                if not entries or (create_time is not None and entries[0].info.create_time != create_time):
+                    ended_processes.append((pid, name))
+                    self.remove_target(pid)
+
+            # 如果所有进程都结束且设置了自动关闭
+            if ended_processes and not self.target_processes and self.auto_close:
+                process_names = ", ".join([name for _, name in ended_processes])
+                logging.info(f"所有监控进程已结束: {process_names}，程序自动关闭")
+                self.save_config()
+                self.stop_monitoring()
+                return False
+
+            with metrics.phase('foreground'):
                 foreground_pid = self.get_foreground_window_pid()
-                if not foreground_pid:
-                    time.sleep(1)
-                    continue
-
-                # 处理每个音频会话
-                for session in sessions:
-                    if not session.Process:
-                        continue
-
-                    pid = session.Process.pid
-                    
-                    # 只处理我们监控的进程
-                    if pid in self.target_processes:
-                        volume = session._ctl.QueryInterface(ISimpleAudioVolume)
-                        
-                        # 确定是否应该静音
-                        should_mute = (self.is_window_minimized(pid) if self.minimize_only 
-                                    else foreground_pid != pid)
-
-                        # 更新静音状态
-                        if should_mute != self.last_muted_state.get(pid, False):
-                            volume.SetMute(should_mute, None)
-                            self.last_muted_state[pid] = should_mute
-
-                time.sleep(1)
-                
-            except Exception as e:
-                logging.info(f"监控过程中出现错误: {e}")
-                time.sleep(1)
+            if not foreground_pid:
+                return True
+            if recorder is not None:
+                recorder.tick(snapshot, foreground_pid)
+            # 输入法、悬浮窗等透明进程抢到前台时沿用之前的前台进程
+            window_foreground = foreground_pid
+            foreground_pid = self.policy.foreground(foreground_pid)
+
+            tree = self.process_tree
+            target_profiles = self.target_profiles
+            # 只有存在按最小化判断的目标时才需要窗口索引
+            needs_windows = any(profile.minimize for profile in target_profiles.values())
+            with metrics.phase('window_scan'):
+                tree.update(snapshot)
+                if needs_windows:
+                    self.window_index.refresh(events)
+                    window_pids = self.window_index.pids()
+                else:
+                    window_pids = (foreground_pid,)
+                tree.add_pids(window_pids)
+                live_pids = set(snapshot.pids).union(window_pids)
+                tree.retain(live_pids)
+                live_pids.add(window_foreground)
+                self.policy.prune(live_pids)
+
+            # 定期用实际静音状态校正缓存
+            with metrics.phase('reconcile'):
+                metrics.inc('external_mute_changes', self.mute_states.maybe_reconcile())
+
+            # 一次性计算所有目标（及同组进程）的期望状态，只下发真正变化的会话
+            desired = {}
+            profiles = {}
+            policy = self.policy
+            now = self.clock()
+            for pid, profile in target_profiles.items():
+                if profile.minimize:
+                    mute = self.is_window_minimized(pid)
+                else:
+                    mute = not tree.same_group(foreground_pid, pid)
+                mute = policy.decide(pid, mute, profile, now) or pid in self.forced_mutes
+                for member in tree.group(pid):
+                    if member in snapshot:
+                        desired[member] = mute
+                        profiles[member] = profile
+            with metrics.phase('mute_apply'):
+                changed = self.mute_states.apply(snapshot, desired, profiles)
+                # 不再属于任何目标组的会话（目标被移除或进程组变化）恢复音量
+                stale = self.mute_states.muted_pids() - desired.keys()
+                if stale:
+                    changed |= self.mute_states.restore(stale)
+            if recorder is not None:
+                recorder.decide(changed, desired)
+            if changed:
+                metrics.inc('mute_transitions', len(changed))
+                self.event_engine.record_mute(events)
+                if self.control_server is not None:
+                    for pid in changed:
+                        self.publish({'event': 'mute', 'pid': pid, 'muted': desired.get(pid, False)})
+
+            return True
+        finally:
+            if recorder is not None:
+                recorder.end_tick()
+            self._tick_snapshot = None
+            self.last_tick_enumerations = SessionSnapshot.enumerations - enumerations_before
+            metrics.inc('ticks')
+            metrics.observe('tick_ms', (time.perf_counter() - tick_start) * 1000)
 
     def start(self):
-        """启动程序"""
-        # 先尝试自动匹配进程
-        if not self.auto_select_process():
-            # 如果没有自动匹配到，则显示选择窗口
-            self.select_target_process()
-            
+        """启动程序：先显示托盘图标，再匹配进程并启动监控"""
+        if self.control_port:
+            self.control_server = ControlServer(self, self.control_port)
         # 创建托盘图标
         self.create_tray_icon()
-        
-        # 启动监控线程
-        self.monitoring_thread = threading.Thread(target=self.monitor_target_app)
-        self.monitoring_thread.daemon = True
-        self.monitoring_thread.start()
-        
-        # 运行托盘图标
-        self.tray_icon.run()
+
+        # 运行托盘图标，就绪后在 setup 线程中完成剩余初始化
+        self.tray_icon.run(setup=self._on_tray_ready)
+
+    def _on_tray_ready(self, icon):
+        """托盘图标可见后再做进程匹配，避免 pycaw 等模块的加载拖慢冷启动"""
+        icon.visible = True
+        startup_timing.mark('tray_visible')
+        # 托盘可见后再渲染其余尺寸的图标
+        self.icon_cache.prerender()
+
+        # 先启动核心线程，之后的状态修改都交给它执行
+        self.start_monitoring()
+
+        # 先尝试自动匹配进程
+        if not self.core.call(self.auto_select_process):
+            # 如果没有自动匹配到，则显示选择窗口（不阻塞托盘的 setup 线程）
+            self.select_target_process(skip_auto_match=True)
+        self.core.post(self.update_icon_and_menu)
+
+    def start_monitoring(self):
+        """启动核心线程并开始监控（无界面运行时直接调用）"""
+        self.core.start(self.monitor_target_app)
+
+    def run_headless(self, port=DEFAULT_PORT):
+        """无界面运行：不加载托盘和 tkinter，通过本地控制接口操作，直到收到 quit"""
+        self.control_server = ControlServer(self, port)
+        self.start_monitoring()
+        try:
+            while self.core.running:
+                self.core.join(0.5)
+        except KeyboardInterrupt:
+            self.stop_monitoring()
+            self.core.join(5)
 
 def setup_logging():
-    """设置日志输出"""
+    """设置日志输出：经队列由后台线程写文件和控制台，不阻塞监控循环"""
     log_file = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'bgm_controller.log')
-    logging.basicConfig(
-        level=logging.INFO,
-        format='%(asctime)s - %(levelname)s - %(message)s',
-        handlers=[
-            logging.FileHandler(log_file, encoding='utf-8'),
-            logging.StreamHandler(sys.stdout)
-        ]
-    )
-
-def main():
+    start_queue_logging([
+        logging.FileHandler(log_file, encoding='utf-8'),
+        logging.StreamHandler(sys.stdout)
+    ])
+
+def main(argv=None):
+    import argparse
+    parser = argparse.ArgumentParser(description='Galgame音频控制器')
+    parser.add_argument('--headless', action='store_true', help='不显示托盘，通过本地控制接口操作')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT, help='控制接口端口（无界面模式）')
+    args = parser.parse_args(argv)
+
+    startup_timing.mark('main')
     setup_logging()  # 设置日志输出
     logging.info("="*50)
     logging.info("程序启动")
 
     controller = AudioController()
-    controller.start()
+    if args.headless:
+        controller.run_headless(args.port)
+    else:
+        controller.start()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,149 @@
+"""控制器核心线程模型
+
+- ControllerCore：在独立线程中运行 asyncio 事件循环，控制器的全部状态只在这个线程里修改，
+  托盘菜单和对话框的操作以消息形式投递进来，因此状态更新不需要加锁
+- ComWorker：唯一的 COM 工作线程，启动时按后端要求初始化 COM，所有音频/窗口调用都在这里执行
+- ComThreadBackend：把后端调用转交给 ComWorker 的代理
+"""
+import asyncio
+import concurrent.futures
+import logging
+import threading
+from collections import Counter
+
+from session_events import LatencyStats
+
+
+class ComWorker:
+    """专用 COM 线程，所有后端调用按顺序在同一个线程中执行"""
+
+    def __init__(self, initializer=None, finalizer=None):
+        self._initializer = initializer
+        self._finalizer = finalizer
+        self._thread = None
+        self._executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix='com-worker', initializer=self._init)
+
+    def _init(self):
+        self._thread = threading.current_thread()
+        if self._initializer is not None:
+            self._initializer()
+
+    def call(self, fn, *args):
+        """在 COM 线程中执行并等待结果；已经在 COM 线程中时直接调用"""
+        if threading.current_thread() is self._thread:
+            return fn(*args)
+        return self._executor.submit(fn, *args).result()
+
+    def shutdown(self):
+        if self._thread is not None and self._finalizer is not None:
+            try:
+                self.call(self._finalizer)
+            except Exception as e:
+                logging.info(f"COM 线程清理失败: {e}")
+        self._executor.shutdown(wait=True)
+
+
+class ComThreadBackend:
+    """平台后端代理：方法调用都转到 ComWorker 中执行，普通属性直接读取"""
+
+    def __init__(self, backend, worker):
+        self._backend = backend
+        self._worker = worker
+        self.errors = Counter()  # 各方法抛出异常的次数
+
+    @property
+    def target(self):
+        """被代理的原始后端"""
+        return self._backend
+
+    def __getattr__(self, name):
+        attr = getattr(self._backend, name)
+        if not callable(attr):
+            return attr
+        worker = self._worker
+        errors = self.errors
+
+        def call(*args):
+            try:
+                return worker.call(attr, *args)
+            except Exception:
+                errors[name] += 1
+                raise
+
+        # 缓存包装函数，避免每次调用都重新创建
+        setattr(self, name, call)
+        return call
+
+    def stats(self):
+        return {'errors': sum(self.errors.values()), **{f'errors_{k}': v for k, v in self.errors.items()}}
+
+
+class ControllerCore:
+    """asyncio 核心：独立线程中运行事件循环，串行执行监控tick和界面发来的消息"""
+
+    def __init__(self):
+        self.loop = None
+        self._thread = None
+        self._ready = threading.Event()
+        self.tick_jitter = LatencyStats()  # 定时唤醒的实际延迟
+
+    @property
+    def running(self):
+        return self.loop is not None and self._thread is not None and self._thread.is_alive()
+
+    def in_core_thread(self):
+        return threading.current_thread() is self._thread
+
+    def start(self, main):
+        """在新线程中运行协程函数 main()，返回时事件循环已就绪"""
+        self._ready.clear()
+        self._thread = threading.Thread(target=self._run, args=(main,), name='controller-core', daemon=True)
+        self._thread.start()
+        self._ready.wait()
+
+    def _run(self, main):
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        self.loop = loop
+        self._ready.set()
+        try:
+            loop.run_until_complete(main())
+        except Exception as e:
+            logging.info(f"控制器核心异常退出: {e}")
+        finally:
+            loop.close()
+            self.loop = None
+
+    def post(self, fn, *args):
+        """投递一条消息到核心线程执行，不等待结果；核心未运行时直接执行"""
+        if not self.running or self.in_core_thread():
+            fn(*args)
+            return
+        self.loop.call_soon_threadsafe(self._guarded, fn, args)
+
+    def call(self, fn, *args, timeout=10):
+        """在核心线程中执行并返回结果；核心未运行时直接执行"""
+        if not self.running or self.in_core_thread():
+            return fn(*args)
+        future = concurrent.futures.Future()
+
+        def run():
+            try:
+                future.set_result(fn(*args))
+            except Exception as e:
+                future.set_exception(e)
+
+        self.loop.call_soon_threadsafe(run)
+        return future.result(timeout)
+
+    def join(self, timeout=None):
+        if self._thread is not None and not self.in_core_thread():
+            self._thread.join(timeout)
+
+    @staticmethod
+    def _guarded(fn, args):
+        try:
+            fn(*args)
+        except Exception as e:
+            logging.info(f"处理界面消息失败: {e}")
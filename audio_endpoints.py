@@ -0,0 +1,335 @@
+"""多输出设备的音频会话枚举
+
+AudioUtilities.GetAllSessions() 只枚举默认输出设备，游戏输出到耳机或 VoiceMeeter 等虚拟声卡时
+无法控制。这里按设备枚举会话：
+
+- 第一次枚举时列出所有可用的输出设备，之后每个设备的会话管理器缓存复用
+- 设备接入/移除/默认设备变化的通知先放进队列，在下一次枚举时（COM 线程中）逐条处理，
+  只增删对应设备，不重新枚举全部设备
+- 某个设备枚举会话失败时丢弃它的会话管理器，下次重新获取，不影响其他设备
+- 设备层通过 EndpointSource 接口访问，Windows 下为 WindowsEndpointSource，测试时为 FakeEndpointSource
+"""
+import logging
+import queue
+
+import startup_timing
+
+# 设备通知
+DEVICE_ADDED = 'device_added'
+DEVICE_REMOVED = 'device_removed'
+DEFAULT_CHANGED = 'default_changed'
+
+# 输出设备的 ID 以该前缀开头（录音设备为 {0.0.1.）
+RENDER_ID_PREFIX = '{0.0.0.'
+
+
+class EndpointSource:
+    """音频设备接口，只在执行后端调用的线程中使用；会话管理器和会话对调用方是不透明的"""
+
+    def list_devices(self):
+        """返回所有可用的输出设备 [(设备 ID, 名称), ...]"""
+        raise NotImplementedError
+
+    def default_device(self):
+        """返回默认输出设备的 ID，没有时返回 None"""
+        raise NotImplementedError
+
+    def device_name(self, device_id):
+        """返回设备名称，设备不存在、不可用或不是输出设备时返回 None"""
+        raise NotImplementedError
+
+    def session_manager(self, device_id):
+        raise NotImplementedError
+
+    def list_sessions(self, manager):
+        """返回该会话管理器下的所有会话，设备失效时抛出异常"""
+        raise NotImplementedError
+
+    def start(self, notify):
+        """开始接收设备通知，notify(通知类型, 设备 ID) 可能在任意线程中调用"""
+        pass
+
+    def stop(self):
+        pass
+
+
+class AudioEndpoints:
+    """按输出设备缓存会话管理器，并按设备通知增量更新"""
+
+    def __init__(self, source):
+        self.source = source
+        self._devices = None  # {设备 ID: 名称}，None 表示还没有枚举过
+        self._managers = {}   # {设备 ID: 会话管理器}
+        self._session_counts = {}  # {设备 ID: 上一次枚举到的会话数}
+        self._changes = queue.SimpleQueue()  # 等待处理的设备通知
+        self._listener = None
+        self._watching = False
+        self.default = None
+        self.full_enumerations = 0
+        self.managers_created = 0
+        self.manager_errors = 0
+        self.device_events = 0
+
+    def watch(self, listener=None):
+        """开始接收设备通知；listener(通知类型, 设备 ID) 在通知线程中调用，用于唤醒监控循环"""
+        self._listener = listener
+        try:
+            self.source.start(self._on_change)
+            self._watching = True
+        except Exception as e:
+            logging.info(f"注册音频设备通知失败: {e}")
+
+    def stop(self):
+        if self._watching:
+            try:
+                self.source.stop()
+            except Exception as e:
+                logging.info(f"注销音频设备通知失败: {e}")
+        self._watching = False
+        self._listener = None
+
+    def devices(self):
+        """返回 {设备 ID: 名称}"""
+        self._sync()
+        return dict(self._devices)
+
+    def sessions(self):
+        """枚举所有输出设备的会话，返回 [(设备 ID, 会话), ...]"""
+        self._sync()
+        result = []
+        for device_id in list(self._devices):
+            manager = self._manager(device_id)
+            if manager is None:
+                continue
+            try:
+                sessions = self.source.list_sessions(manager)
+            except Exception as e:
+                # 设备可能已失效，丢弃缓存的会话管理器，下次重新获取
+                self._managers.pop(device_id, None)
+                self.manager_errors += 1
+                logging.info(f"枚举设备 {self._devices[device_id]} 的音频会话失败: {e}")
+                continue
+            self._session_counts[device_id] = len(sessions)
+            result.extend((device_id, session) for session in sessions)
+        return result
+
+    def stats(self):
+        return {
+            'devices': len(self._devices or ()),
+            'managers': len(self._managers),
+            'sessions': sum(self._session_counts.values()),
+            'full_enumerations': self.full_enumerations,
+            'managers_created': self.managers_created,
+            'manager_errors': self.manager_errors,
+            'device_events': self.device_events,
+        }
+
+    def _on_change(self, kind, device_id):
+        self._changes.put((kind, device_id))
+        listener = self._listener
+        if listener is not None:
+            listener(kind, device_id)
+
+    def _sync(self):
+        """第一次调用时枚举全部设备，之后只处理排队的设备通知"""
+        if self._devices is None:
+            self._devices = dict(self.source.list_devices())
+            self.default = self.source.default_device()
+            self.full_enumerations += 1
+        while True:
+            try:
+                kind, device_id = self._changes.get_nowait()
+            except queue.Empty:
+                break
+            self.device_events += 1
+            if kind == DEVICE_REMOVED:
+                self._remove(device_id)
+                continue
+            if kind == DEFAULT_CHANGED:
+                self.default = device_id
+            if device_id not in self._devices:
+                name = self.source.device_name(device_id)
+                if name is not None:
+                    self._devices[device_id] = name
+                    logging.info(f"音频设备接入: {name}")
+
+    def _remove(self, device_id):
+        name = self._devices.pop(device_id, None)
+        self._managers.pop(device_id, None)
+        self._session_counts.pop(device_id, None)
+        if name is not None:
+            logging.info(f"音频设备移除: {name}")
+
+    def _manager(self, device_id):
+        manager = self._managers.get(device_id)
+        if manager is None:
+            try:
+                manager = self.source.session_manager(device_id)
+            except Exception as e:
+                self.manager_errors += 1
+                logging.info(f"获取设备 {self._devices[device_id]} 的会话管理器失败: {e}")
+                return None
+            self._managers[device_id] = manager
+            self.managers_created += 1
+        return manager
+
+
+class WindowsEndpointSource(EndpointSource):
+    """基于 pycaw 的 IMMDeviceEnumerator / IAudioSessionManager2"""
+
+    def __init__(self):
+        self._enumerator = None
+        self._client = None
+
+    def _devices(self):
+        if self._enumerator is None:
+            with startup_timing.timed_import('pycaw'):
+                from pycaw.pycaw import AudioUtilities
+            self._enumerator = AudioUtilities.GetDeviceEnumerator()
+        return self._enumerator
+
+    def list_devices(self):
+        from pycaw.constants import DEVICE_STATE, EDataFlow
+        collection = self._devices().EnumAudioEndpoints(EDataFlow.eRender.value, DEVICE_STATE.ACTIVE.value)
+        devices = []
+        for i in range(collection.GetCount()):
+            device = collection.Item(i)
+            devices.append((device.GetId(), self._friendly_name(device)))
+        return devices
+
+    def default_device(self):
+        from pycaw.constants import EDataFlow, ERole
+        try:
+            return self._devices().GetDefaultAudioEndpoint(EDataFlow.eRender.value, ERole.eMultimedia.value).GetId()
+        except Exception:
+            return None
+
+    def device_name(self, device_id):
+        from pycaw.constants import DEVICE_STATE
+        if not device_id or not device_id.startswith(RENDER_ID_PREFIX):
+            return None
+        try:
+            device = self._devices().GetDevice(device_id)
+            if device.GetState() != DEVICE_STATE.ACTIVE.value:
+                return None
+        except Exception:
+            return None
+        return self._friendly_name(device)
+
+    def session_manager(self, device_id):
+        from comtypes import CLSCTX_ALL
+        from pycaw.pycaw import IAudioSessionManager2
+        device = self._devices().GetDevice(device_id)
+        return device.Activate(IAudioSessionManager2._iid_, CLSCTX_ALL, None).QueryInterface(IAudioSessionManager2)
+
+    def list_sessions(self, manager):
+        from pycaw.pycaw import IAudioSessionControl2
+        from pycaw.utils import AudioSession
+        enumerator = manager.GetSessionEnumerator()
+        sessions = []
+        for i in range(enumerator.GetCount()):
+            control = enumerator.GetSession(i)
+            if control is None:
+                continue
+            control2 = control.QueryInterface(IAudioSessionControl2)
+            if control2 is not None:
+                sessions.append(AudioSession(control2))
+        return sessions
+
+    def start(self, notify):
+        from pycaw.callbacks import MMNotificationClient
+        from pycaw.constants import DEVICE_STATE, EDataFlow
+
+        class DeviceNotification(MMNotificationClient):
+            def on_device_added(self, added_device_id):
+                notify(DEVICE_ADDED, added_device_id)
+
+            def on_device_removed(self, removed_device_id):
+                notify(DEVICE_REMOVED, removed_device_id)
+
+            def on_device_state_changed(self, device_id, new_state, new_state_id):
+                # 插拔耳机等情况表现为设备状态变化
+                notify(DEVICE_ADDED if new_state_id == DEVICE_STATE.ACTIVE.value else DEVICE_REMOVED, device_id)
+
+            def on_default_device_changed(self, flow, flow_id, role, role_id, default_device_id):
+                if flow_id == EDataFlow.eRender.value:
+                    notify(DEFAULT_CHANGED, default_device_id)
+
+            def on_property_value_changed(self, *args):
+                pass
+
+        self._client = DeviceNotification()
+        self._devices().RegisterEndpointNotificationCallback(self._client)
+
+    def stop(self):
+        if self._client is not None:
+            self._devices().UnregisterEndpointNotificationCallback(self._client)
+            self._client = None
+
+    @staticmethod
+    def _friendly_name(device):
+        from pycaw.pycaw import AudioUtilities
+        try:
+            return AudioUtilities.CreateDevice(device).FriendlyName or device.GetId()
+        except Exception:
+            return device.GetId()
+
+
+class FakeEndpointSource(EndpointSource):
+    """内存中的伪设备，会话属于哪个设备由 FakeSession.device 决定
+
+    sessions 为返回全部伪会话的函数；会话管理器就是设备 ID。
+    """
+
+    DEFAULT_DEVICE = 'fake-speakers'
+
+    def __init__(self, sessions):
+        self._sessions = sessions
+        self.devices = {self.DEFAULT_DEVICE: '扬声器'}
+        self.default = self.DEFAULT_DEVICE
+        self._notify = None
+
+    # ---- 模拟设备变化 ----
+
+    def add_device(self, device_id, name=None):
+        self.devices[device_id] = name or device_id
+        self._push(DEVICE_ADDED, device_id)
+
+    def remove_device(self, device_id):
+        self.devices.pop(device_id, None)
+        self._push(DEVICE_REMOVED, device_id)
+
+    def set_default(self, device_id):
+        self.default = device_id
+        self._push(DEFAULT_CHANGED, device_id)
+
+    def _push(self, kind, device_id):
+        if self._notify is not None:
+            self._notify(kind, device_id)
+
+    # ---- EndpointSource ----
+
+    def list_devices(self):
+        return list(self.devices.items())
+
+    def default_device(self):
+        return self.default
+
+    def device_name(self, device_id):
+        return self.devices.get(device_id)
+
+    def session_manager(self, device_id):
+        if device_id not in self.devices:
+            raise OSError(f"设备 {device_id} 不存在")
+        return device_id
+
+    def list_sessions(self, manager):
+        if manager not in self.devices:
+            raise OSError(f"设备 {manager} 已移除")
+        return [session for session in self._sessions() if session.device == manager]
+
+    def start(self, notify):
+        self._notify = notify
+
+    def stop(self):
+        self._notify = None
@@ -0,0 +1,470 @@
+"""监控循环基准测试
+
+使用 FakeBackend 驱动 AudioController.monitor_tick，按会话数、窗口数和目标数的
+组合测量每轮tick耗时、内存分配、后端调用次数以及前台切换到静音的延迟，
+结果写入 JSON，便于不同版本之间比较。
+
+    python benchmark.py --sessions 10,100,1000 --output bench.json
+    python benchmark.py --compare bench.json --output bench_new.json
+"""
+import argparse
+import json
+import logging
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from collections import Counter
+
+from config_store import ConfigStore, DEBOUNCE_SECONDS
+from platform_backend import FakeBackend
+from process_matcher import ProcessMatcher
+from history_store import HistoryStore
+from process_cache import ProcessMetadataCache
+from metrics import Metrics
+from volume_fader import VolumeFader, FADE_DURATION
+from session_events import (
+    LatencyStats, SESSION_CREATED, FOREGROUND_CHANGED, WINDOW_MINIMIZED, WINDOW_RESTORED,
+)
+from session_snapshot import SessionSnapshot
+from MuteBackgroundGal import AudioController
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def make_controller(config_dir, sessions, windows, targets, minimize_only):
+    """生成一个带 targets 个监控目标的控制器"""
+    backend = FakeBackend.generate(processes=sessions, windows_per_process=windows)
+    controller = AudioController(
+        backend=backend,
+        config_file=os.path.join(config_dir, 'bench_config.json'),
+    )
+    controller.auto_match = False
+    controller.auto_close = False
+    controller.minimize_only = minimize_only
+    controller.compile_profiles()
+    # tick 用例只测量静音判断本身，渐变单独测试
+    controller.fader.configure(0)
+    pids = list(backend.processes)
+    target_pids = pids[:targets]
+    # 用于抢占前台的非目标进程
+    controller.bench_other_pid = pids[targets]
+    for pid in target_pids:
+        controller.add_target(pid, backend.processes[pid], backend.create_times[pid])
+    return controller, backend, target_pids
+
+
+def drive_tick(controller, backend, target_pids, i):
+    """模拟一次窗口变化并执行一轮tick
+
+    最小化模式下交替最小化/还原同一个目标，后台模式下在目标和非目标之间切换前台。
+    """
+    pid = target_pids[(i // 2) % len(target_pids)]
+    if controller.minimize_only:
+        if i % 2:
+            backend.restore(pid)
+            kind = WINDOW_RESTORED
+        else:
+            backend.minimize(pid)
+            kind = WINDOW_MINIMIZED
+        backend.set_foreground(controller.bench_other_pid)
+    else:
+        backend.set_foreground(pid if i % 2 else controller.bench_other_pid)
+        kind = FOREGROUND_CHANGED
+    controller.event_engine.emit(kind, pid)
+    events = controller.event_engine.wait(0)
+    controller.monitor_tick(events)
+
+
+def run_case(sessions, windows, targets, minimize_only, ticks):
+    with tempfile.TemporaryDirectory() as config_dir:
+        controller, backend, target_pids = make_controller(
+            config_dir, sessions, windows, targets, minimize_only)
+
+        # 预热
+        for i in range(min(10, ticks)):
+            drive_tick(controller, backend, target_pids, i)
+        controller.event_engine.mute_latency = LatencyStats()
+        controller.metrics = Metrics()
+
+        durations = []
+        calls = Counter()
+        enumerations = 0
+        for i in range(ticks):
+            before = Counter(backend.calls)
+            start = time.perf_counter()
+            drive_tick(controller, backend, target_pids, i)
+            durations.append((time.perf_counter() - start) * 1000)
+            calls.update(backend.calls - before)
+            enumerations += controller.last_tick_enumerations
+        mute_latency = controller.event_engine.mute_latency.summary()
+        phases = {name[len('phase_'):-len('_ms')]: histogram.sum / ticks
+                  for name, histogram in controller.metrics.histograms.items()
+                  if name.startswith('phase_')}
+
+        # 内存分配单独测量，避免 tracemalloc 影响计时
+        alloc_ticks = min(ticks, 50)
+        allocations = []
+        tracemalloc.start()
+        for i in range(alloc_ticks):
+            current, _ = tracemalloc.get_traced_memory()
+            tracemalloc.reset_peak()
+            drive_tick(controller, backend, target_pids, i)
+            _, peak = tracemalloc.get_traced_memory()
+            allocations.append(peak - current)
+        tracemalloc.stop()
+
+        return {
+            'sessions': sessions,
+            'windows_per_process': windows,
+            'targets': targets,
+            'mode': 'minimize' if minimize_only else 'background',
+            'ticks': ticks,
+            'tick_ms': {
+                'mean': statistics.mean(durations),
+                'p50': percentile(durations, 50),
+                'p95': percentile(durations, 95),
+                'max': max(durations),
+            },
+            'alloc_peak_bytes_per_tick': statistics.mean(allocations) if allocations else 0,
+            'backend_calls_per_tick': {k: v / ticks for k, v in sorted(calls.items())},
+            'enumerations_per_tick': enumerations / ticks,
+            'mute_latency': mute_latency,
+            'phase_ms_per_tick': phases,
+        }
+
+
+def run_toggle_case(toggles, debounce):
+    """测量切换开关（包含保存配置）的耗时，debounce 为 0 时即同步写盘"""
+    with tempfile.TemporaryDirectory() as config_dir:
+        controller, _, _ = make_controller(config_dir, 10, 1, 1, True)
+        controller.config_store = ConfigStore(controller.config_file, debounce=debounce)
+
+        durations = []
+        for _ in range(toggles):
+            start = time.perf_counter()
+            controller.toggle_minimize_only()
+            durations.append((time.perf_counter() - start) * 1000)
+        controller.config_store.close()
+
+        return {
+            'debounce_s': debounce,
+            'toggles': toggles,
+            'toggle_ms': {
+                'mean': statistics.mean(durations),
+                'p95': percentile(durations, 95),
+                'max': max(durations),
+            },
+            'config_writes': controller.config_store.writes,
+        }
+
+
+def run_matcher_case(rules, sessions):
+    """测量匹配规则的编译耗时，以及首次（需要解析路径）和缓存命中后的匹配耗时"""
+    backend = FakeBackend.generate(processes=sessions)
+    names = [f"game{i}.exe" for i in range(rules * 8 // 10)]
+    patterns = ([f"glob:title{i}_*.exe" for i in range(rules // 10)] +
+                [f"re:^engine{i}[a-z]*\\.exe$" for i in range(rules // 20)] +
+                [f"path:D:\\Games\\lib{i}\\" for i in range(rules // 20)])
+
+    start = time.perf_counter()
+    matcher = ProcessMatcher(names, patterns)
+    compile_ms = (time.perf_counter() - start) * 1000
+
+    cache = ProcessMetadataCache(backend)
+    entries = [cache.get(pid, create_time) for pid, create_time, _ in backend.list_sessions()]
+    passes = {}
+    for label in ('cold', 'warm'):
+        start = time.perf_counter()
+        for info in entries:
+            matcher.match(info.pid, info.name, cache.exe, info.create_time)
+        passes[label] = (time.perf_counter() - start) * 1000
+
+    return {
+        'rules': rules,
+        'sessions': sessions,
+        'compile_ms': compile_ms,
+        'cold_pass_ms': passes['cold'],
+        'warm_pass_ms': passes['warm'],
+    }
+
+
+def run_history_case(entries):
+    """写入 entries 条带路径的历史记录，测量加载和构建匹配器的耗时"""
+    with tempfile.TemporaryDirectory() as config_dir:
+        path = os.path.join(config_dir, 'history.jsonl')
+        store = HistoryStore(path, clock=iter(range(1, 10 ** 9)).__next__)
+        for i in range(entries):
+            store.record(f"game{i}.exe", f"D:\\Games\\title{i}\\game{i}.exe")
+        store.close()
+        with open(path, 'r', encoding='utf-8') as f:
+            records = sum(1 for _ in f)
+
+        store = HistoryStore(path)
+        store.load()
+        start = time.perf_counter()
+        ProcessMatcher(store.names(), (), store.exe_paths())
+        matcher_ms = (time.perf_counter() - start) * 1000
+        store.close()
+    return {
+        'entries': entries,
+        'records': records,
+        'load_ms': store.load_ms,
+        'matcher_ms': matcher_ms,
+    }
+
+
+def run_fade_case(fades, duration):
+    """同时运行 fades 个渐变，测量定时器误差和每个渐变每帧的 CPU 时间"""
+    backend = FakeBackend.generate(processes=fades)
+    fader = VolumeFader(backend, duration)
+    for session in backend.sessions:
+        fader.fade_out(session)
+    time.sleep(duration / 2)
+    # 一半中途反向
+    for session in backend.sessions[::2]:
+        fader.fade_in(session)
+    deadline = time.perf_counter() + duration * 3
+    while fader.stats()['active'] and time.perf_counter() < deadline:
+        time.sleep(duration / 10)
+    stats = fader.stats()
+    fader.stop()
+    exact = all(session.volume == 1.0 for session in backend.sessions)
+    return {
+        'fades': fades,
+        'duration_s': duration,
+        'frames': stats['frames'],
+        'timer_error': stats['timer_error'],
+        'cpu_ms_per_fade_frame': stats['cpu_ms_per_fade_frame'],
+        'restored_exactly': exact,
+    }
+
+
+def run_thrash_case(grace, cycles, tick_seconds=0.05):
+    """模拟非前台静音模式下的快速切换：前台短暂切到其他程序或输入法再切回，
+
+    每 4 轮真正切走一次。使用虚拟时钟，统计实际的静音切换和 SetMute 次数。
+    """
+    with tempfile.TemporaryDirectory() as config_dir:
+        controller, backend, target_pids = make_controller(config_dir, 4, 1, 1, False)
+        controller.mute_grace = grace
+        controller.compile_profiles()
+        ime_pid = 9000
+        backend.add_process(ime_pid, 'TextInputHost.exe', sessions=0)
+        target, other = target_pids[0], controller.bench_other_pid
+        now = [0.0]
+        controller.clock = lambda: now[0]
+
+        def hold(pid, ticks):
+            backend.set_foreground(pid)
+            controller.event_engine.emit(FOREGROUND_CHANGED, pid)
+            for _ in range(ticks):
+                controller.monitor_tick(controller.event_engine.wait(0))
+                now[0] += tick_seconds
+
+        before = Counter(backend.calls)
+        for i in range(cycles):
+            hold(target, 20)
+            # 约 0.1 秒的闪动
+            hold(ime_pid if i % 2 else other, 2)
+            if i % 4 == 3:
+                hold(target, 2)
+                hold(other, 60)
+        calls = backend.calls - before
+        return {
+            'grace_s': grace,
+            'cycles': cycles,
+            'mute_transitions': controller.metrics.counters.get('mute_transitions', 0),
+            'set_mute_calls': calls['set_mute'],
+            'policy': controller.policy.stats(),
+        }
+
+
+def run_idle_case(events, paused):
+    """空闲时（暂停或没有目标）连续触发前台切换、最小化和新会话事件，
+
+    按监控循环的规则决定是否执行tick，每 10 个事件再模拟一次定时唤醒，统计会话枚举次数。
+    暂停时应为 0。
+    """
+    with tempfile.TemporaryDirectory() as config_dir:
+        controller, backend, target_pids = make_controller(config_dir, 10, 1, 1, False)
+        controller.auto_match = True
+        if paused:
+            controller.toggle_pause()
+        else:
+            controller.remove_and_restore(target_pids[0])
+        kinds = (FOREGROUND_CHANGED, WINDOW_MINIMIZED, SESSION_CREATED)
+        pids = list(backend.processes)
+        enumerations = SessionSnapshot.enumerations
+        ticks = 0
+        for i in range(events):
+            pid = pids[i % len(pids)]
+            backend.set_foreground(pid)
+            controller.event_engine.emit(kinds[i % len(kinds)], pid)
+            batch = controller.event_engine.wait(0)
+            if controller._wants_tick(batch):
+                controller.monitor_tick(batch)
+                ticks += 1
+            if i % 10 == 9:
+                controller.monitor_tick()
+                ticks += 1
+        return {
+            'paused': paused,
+            'events': events,
+            'ticks': ticks,
+            'coalesced_events': controller.scheduler.coalesced,
+            'enumerations': SessionSnapshot.enumerations - enumerations,
+        }
+
+
+def case_key(case):
+    return (case['sessions'], case['windows_per_process'], case['targets'], case['mode'])
+
+
+def compare(previous, current, threshold):
+    """对比两次结果的 tick 均值，返回回退的用例"""
+    old_cases = {case_key(c): c for c in previous['cases']}
+    regressions = []
+    for case in current['cases']:
+        old = old_cases.get(case_key(case))
+        if not old:
+            continue
+        before, after = old['tick_ms']['mean'], case['tick_ms']['mean']
+        change = (after - before) / before * 100 if before else 0.0
+        flag = ''
+        if change > threshold:
+            regressions.append(case)
+            flag = '  <-- 回退'
+        print(f"{case_key(case)}: {before:.3f} ms -> {after:.3f} ms ({change:+.1f}%){flag}")
+    return regressions
+
+
+def parse_ints(text):
+    return [int(x) for x in text.split(',') if x]
+
+
+def parse_floats(text):
+    return [float(x) for x in text.split(',') if x]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='监控循环基准测试')
+    parser.add_argument('--sessions', default='10,100,1000', help='会话数（逗号分隔）')
+    parser.add_argument('--windows', default='1,4', help='每个进程的窗口数（逗号分隔）')
+    parser.add_argument('--targets', default='1,10', help='监控目标数（逗号分隔）')
+    parser.add_argument('--modes', default='minimize,background', help='静音模式（逗号分隔）')
+    parser.add_argument('--ticks', type=int, default=200, help='每个用例的tick数')
+    parser.add_argument('--toggles', type=int, default=200, help='开关切换测试次数，0 表示跳过')
+    parser.add_argument('--rules', default='100,1000,10000', help='匹配规则数（逗号分隔），空表示跳过')
+    parser.add_argument('--fades', default='1,10,100', help='同时渐变数（逗号分隔），空表示跳过')
+    parser.add_argument('--thrash', default='0,0.3', help='快速切换测试的 mute_grace 取值（逗号分隔），空表示跳过')
+    parser.add_argument('--thrash-cycles', type=int, default=40, help='快速切换测试的轮数')
+    parser.add_argument('--history', default='1000,50000', help='历史记录条数（逗号分隔），空表示跳过')
+    parser.add_argument('--idle-events', type=int, default=300, help='空闲/暂停时触发的事件数，0 表示跳过')
+    parser.add_argument('--output', help='结果 JSON 路径')
+    parser.add_argument('--compare', help='与之前的结果 JSON 对比')
+    parser.add_argument('--threshold', type=float, default=10.0, help='判定回退的百分比')
+    args = parser.parse_args(argv)
+
+    logging.disable(logging.CRITICAL)
+
+    cases = []
+    for sessions in parse_ints(args.sessions):
+        for windows in parse_ints(args.windows):
+            for targets in parse_ints(args.targets):
+                # 需要至少一个非目标进程来抢占前台
+                if targets >= sessions:
+                    continue
+                for mode in args.modes.split(','):
+                    case = run_case(sessions, windows, targets, mode == 'minimize', args.ticks)
+                    cases.append(case)
+                    print(f"sessions={sessions} windows={windows} targets={targets} mode={mode}: "
+                          f"{case['tick_ms']['mean']:.3f} ms/tick, "
+                          f"latency {case['mute_latency']['avg_ms']:.3f} ms")
+
+    toggle_cases = []
+    if args.toggles:
+        for debounce in (0, DEBOUNCE_SECONDS):
+            case = run_toggle_case(args.toggles, debounce)
+            toggle_cases.append(case)
+            print(f"toggle debounce={debounce}s: {case['toggle_ms']['mean']:.3f} ms/toggle, "
+                  f"{case['config_writes']} writes")
+
+    matcher_cases = []
+    for rules in parse_ints(args.rules):
+        case = run_matcher_case(rules, max(parse_ints(args.sessions)))
+        matcher_cases.append(case)
+        print(f"matcher rules={rules}: compile {case['compile_ms']:.1f} ms, "
+              f"cold {case['cold_pass_ms']:.3f} ms, warm {case['warm_pass_ms']:.3f} ms")
+
+    fade_cases = []
+    for fades in parse_ints(args.fades):
+        case = run_fade_case(fades, FADE_DURATION)
+        fade_cases.append(case)
+        print(f"fades={fades}: timer error avg {case['timer_error']['avg_ms']:.3f} ms "
+              f"max {case['timer_error']['max_ms']:.3f} ms, "
+              f"{case['cpu_ms_per_fade_frame']:.4f} ms cpu/fade/frame")
+
+    thrash_cases = []
+    for grace in parse_floats(args.thrash):
+        case = run_thrash_case(grace, args.thrash_cycles)
+        thrash_cases.append(case)
+        print(f"thrash grace={grace}s: {case['mute_transitions']} mute transitions, "
+              f"{case['set_mute_calls']} SetMute calls, {case['policy']['absorbed']} absorbed, "
+              f"{case['policy']['thrash']} thrash")
+
+    history_cases = []
+    for entries in parse_ints(args.history):
+        case = run_history_case(entries)
+        history_cases.append(case)
+        print(f"history entries={entries}: load {case['load_ms']:.1f} ms ({case['records']} records), "
+              f"matcher {case['matcher_ms']:.1f} ms")
+
+    idle_cases = []
+    failed = False
+    if args.idle_events:
+        for paused in (True, False):
+            case = run_idle_case(args.idle_events, paused)
+            idle_cases.append(case)
+            print(f"idle paused={paused}: {case['events']} events, {case['ticks']} ticks, "
+                  f"{case['coalesced_events']} coalesced, {case['enumerations']} enumerations")
+            # 暂停时不应枚举会话
+            if paused and case['enumerations']:
+                print("暂停时仍在枚举会话")
+                failed = True
+
+    result = {
+        'created_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cases': cases,
+        'toggles': toggle_cases,
+        'matcher': matcher_cases,
+        'fades': fade_cases,
+        'thrash': thrash_cases,
+        'history': history_cases,
+        'idle': idle_cases,
+    }
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(result, f, ensure_ascii=False, indent=2)
+
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            previous = json.load(f)
+        if compare(previous, result, args.threshold):
+            return 1
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
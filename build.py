@@ -141,7 +141,6 @@ def create_default_config():
     """创建默认配置文件"""
     if not os.path.exists('gal_audio_controller_config.json'):
         default_config = '''{
-    "history_processes": [],
     "auto_match": true,
     "minimize_only": true,
     "auto_close": true
@@ -0,0 +1,140 @@
+import atexit
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+
+# 最后一次修改后等待多久再写盘
+DEBOUNCE_SECONDS = 0.5
+# 连续修改时最长推迟多久必须写一次
+MAX_DELAY_SECONDS = 3.0
+
+
+def atomic_write_text(path, text, suffix='.tmp'):
+    """先写临时文件再替换，写到一半崩溃也不会损坏原文件"""
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(prefix='.tmp_', suffix=suffix, dir=directory)
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.write(text)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except Exception:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+def atomic_write_json(path, data):
+    """原子写入 JSON 文件"""
+    atomic_write_text(path, json.dumps(data, ensure_ascii=False, indent=2), '.json')
+
+
+class ConfigStore:
+    """配置文件存储：合并短时间内的多次修改，由后台线程原子写入
+
+    debounce 为 0 时在调用线程同步写入。
+    """
+
+    def __init__(self, path, debounce=DEBOUNCE_SECONDS, max_delay=MAX_DELAY_SECONDS):
+        self.path = path
+        self.debounce = debounce
+        self.max_delay = max_delay
+        self._pending = None  # (版本号, 配置)
+        self._version = 0
+        self._written_version = 0
+        self._first_change = 0.0
+        self._last_change = 0.0
+        self._cond = threading.Condition()
+        self._write_lock = threading.Lock()
+        self._thread = None
+        self._closed = False
+        self.requests = 0
+        self.writes = 0
+        atexit.register(self.flush)
+
+    def load(self, default_config):
+        """读取配置；文件不存在时写入默认配置"""
+        try:
+            if os.path.exists(self.path):
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    return json.load(f)
+            # 如果配置文件不存在，创建默认配置
+            atomic_write_json(self.path, default_config)
+            return dict(default_config)
+        except Exception as e:
+            logging.info(f"加载配置文件失败: {e}")
+            return dict(default_config)
+
+    def save(self, config):
+        """提交一份新配置，立即返回；实际写盘由后台线程完成"""
+        with self._cond:
+            self.requests += 1
+            self._version += 1
+            version = self._version
+            if self.debounce > 0:
+                now = time.monotonic()
+                if self._pending is None:
+                    self._first_change = now
+                self._pending = (version, config)
+                self._last_change = now
+                if self._thread is None and not self._closed:
+                    self._thread = threading.Thread(target=self._run, daemon=True)
+                    self._thread.start()
+                self._cond.notify()
+                return
+        self._write(version, config)
+
+    def flush(self):
+        """立即写入尚未落盘的配置"""
+        with self._cond:
+            pending, self._pending = self._pending, None
+        if pending is not None:
+            self._write(*pending)
+
+    def close(self):
+        """写入剩余修改并停止后台线程"""
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+        self.flush()
+
+    def stats(self):
+        return {'requests': self.requests, 'writes': self.writes}
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while self._pending is None and not self._closed:
+                    self._cond.wait()
+                if self._closed:
+                    self._thread = None
+                    return
+                # 等待修改平息，但不超过 max_delay
+                while self._pending is not None and not self._closed:
+                    now = time.monotonic()
+                    deadline = min(self._last_change + self.debounce,
+                                   self._first_change + self.max_delay)
+                    if now >= deadline:
+                        break
+                    self._cond.wait(deadline - now)
+                pending, self._pending = self._pending, None
+            if pending is not None:
+                self._write(*pending)
+
+    def _write(self, version, config):
+        with self._write_lock:
+            # 后台线程和 flush 可能交错，旧版本不能覆盖新版本
+            if version <= self._written_version:
+                return
+            try:
+                atomic_write_json(self.path, config)
+                self._written_version = version
+                self.writes += 1
+            except Exception as e:
+                logging.info(f"保存配置文件失败: {e}")
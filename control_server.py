@@ -0,0 +1,260 @@
+"""本地控制接口
+
+在控制器核心线程的事件循环上监听 127.0.0.1 的 TCP 端口，协议为一行一个 JSON：
+
+    -> {"cmd": "status"}
+    <- {"ok": true, "paused": false, "targets": [{"pid": 1234, "name": "game.exe"}], ...}
+
+命令：
+
+- ``status``                      查询状态
+- ``add``    pid 或 name           添加监控目标（name 会添加所有同名的音频会话进程）
+- ``remove`` pid                   移除监控目标并恢复音量
+- ``pause`` / ``resume``           暂停/继续监控
+- ``metrics``                      返回计数器、分阶段耗时直方图和各模块统计
+- ``subscribe``                    之后推送 {"event": "mute", "pid": ..., "muted": ...} 等事件
+- ``quit``                         退出程序
+
+请求里带 ``id`` 时原样返回，便于脚本对应请求和响应。命令直接在核心线程中执行，
+不经过 tkinter 和托盘。
+
+    python control_server.py status
+    python control_server.py add name=game.exe
+    python control_server.py --bench 1000
+"""
+import asyncio
+import json
+import logging
+import socket
+import sys
+import time
+
+HOST = '127.0.0.1'
+DEFAULT_PORT = 48620
+# 单行请求的长度上限
+MAX_LINE = 64 * 1024
+
+
+class ControlServer:
+    """控制器的本地 JSON 行协议服务，只能在核心线程的事件循环中使用"""
+
+    def __init__(self, controller, port=DEFAULT_PORT, host=HOST):
+        self.controller = controller
+        self.host = host
+        self.port = port
+        self._server = None
+        self._subscribers = set()
+        self._connections = {}  # {writer: 连接的处理任务}
+        self.requests = 0
+        self.commands = {
+            'status': self._status,
+            'add': self._add,
+            'remove': self._remove,
+            'pause': self._pause,
+            'resume': self._resume,
+            'metrics': self._metrics,
+            'subscribe': self._subscribe,
+            'quit': self._quit,
+        }
+
+    async def start(self):
+        self._server = await asyncio.start_server(
+            self._handle, self.host, self.port, limit=MAX_LINE)
+        # 端口为 0 时由系统分配
+        self.port = self._server.sockets[0].getsockname()[1]
+        logging.info(f"控制接口已启动: {self.host}:{self.port}")
+
+    async def close(self):
+        if self._server is None:
+            return
+        self._server.close()
+        # 关闭连接后各处理任务读到 EOF 自行退出
+        tasks = list(self._connections.values())
+        for writer in list(self._connections):
+            writer.close()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._subscribers.clear()
+        try:
+            await self._server.wait_closed()
+        except Exception:
+            pass
+        self._server = None
+
+    def publish(self, message):
+        """向所有订阅者推送一条事件"""
+        if not self._subscribers:
+            return
+        data = _encode(message)
+        for writer in list(self._subscribers):
+            if writer.is_closing():
+                self._subscribers.discard(writer)
+            else:
+                writer.write(data)
+
+    def stats(self):
+        return {'port': self.port, 'requests': self.requests, 'subscribers': len(self._subscribers)}
+
+    async def _handle(self, reader, writer):
+        sock = writer.get_extra_info('socket')
+        if sock is not None:
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self._connections[writer] = asyncio.current_task()
+        try:
+            while True:
+                try:
+                    line = await reader.readline()
+                except (ConnectionError, ValueError):
+                    break
+                if not line:
+                    break
+                writer.write(_encode(self._dispatch(line, writer)))
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            self._connections.pop(writer, None)
+            self._subscribers.discard(writer)
+            writer.close()
+
+    def _dispatch(self, line, writer):
+        self.requests += 1
+        try:
+            request = json.loads(line)
+            handler = self.commands.get(request.get('cmd'))
+            if handler is None:
+                response = {'ok': False, 'error': f"未知命令: {request.get('cmd')}"}
+            else:
+                response = handler(request, writer)
+        except (ValueError, AttributeError) as e:
+            request = {}
+            response = {'ok': False, 'error': f"请求格式错误: {e}"}
+        except Exception as e:
+            response = {'ok': False, 'error': str(e)}
+        if isinstance(request, dict) and 'id' in request:
+            response['id'] = request['id']
+        return response
+
+    def _status(self, request, writer):
+        controller = self.controller
+        return {
+            'ok': True,
+            'paused': controller.paused,
+            'minimize_only': controller.minimize_only,
+            'auto_match': controller.auto_match,
+            'targets': [{'pid': pid, 'name': name} for pid, name in controller.target_processes.items()],
+            'muted': sorted(controller.mute_states.muted_pids()),
+        }
+
+    def _add(self, request, writer):
+        controller = self.controller
+        if 'pid' in request:
+            added = controller.add_target_by_pid(int(request['pid']))
+        elif 'name' in request:
+            added = controller.add_target_by_name(str(request['name']))
+        else:
+            return {'ok': False, 'error': "需要 pid 或 name"}
+        return {'ok': bool(added), 'added': added}
+
+    def _remove(self, request, writer):
+        pid = int(request['pid'])
+        if pid not in self.controller.target_processes:
+            return {'ok': False, 'error': f"{pid} 不在监控列表中"}
+        self.controller.remove_and_restore(pid)
+        return {'ok': True}
+
+    def _pause(self, request, writer):
+        self.controller.set_paused(True)
+        return {'ok': True, 'paused': True}
+
+    def _resume(self, request, writer):
+        self.controller.set_paused(False)
+        return {'ok': True, 'paused': False}
+
+    def _metrics(self, request, writer):
+        return {'ok': True, 'metrics': self.controller.metrics.snapshot()}
+
+    def _subscribe(self, request, writer):
+        self._subscribers.add(writer)
+        return {'ok': True}
+
+    def _quit(self, request, writer):
+        # 先回复再退出
+        asyncio.get_running_loop().call_soon(self.controller.stop_monitoring)
+        return {'ok': True}
+
+
+def _encode(message):
+    return (json.dumps(message, ensure_ascii=False, separators=(',', ':')) + '\n').encode('utf-8')
+
+
+class ControlClient:
+    """同步客户端，供脚本和命令行使用"""
+
+    def __init__(self, port=DEFAULT_PORT, host=HOST, timeout=5.0):
+        self._sock = socket.create_connection((host, port), timeout=timeout)
+        self._sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self._file = self._sock.makefile('rb')
+
+    def request(self, cmd, **params):
+        params['cmd'] = cmd
+        self._sock.sendall(_encode(params))
+        while True:
+            message = self.read()
+            # 订阅后事件和响应可能交错
+            if 'event' not in message:
+                return message
+
+    def read(self):
+        line = self._file.readline()
+        if not line:
+            raise ConnectionError("连接已关闭")
+        return json.loads(line)
+
+    def close(self):
+        self._file.close()
+        self._sock.close()
+
+
+def _parse_value(text):
+    try:
+        return int(text)
+    except ValueError:
+        return text
+
+
+def main(argv=None):
+    import argparse
+    parser = argparse.ArgumentParser(description='控制接口命令行客户端')
+    parser.add_argument('cmd', nargs='?', default='status', help='命令')
+    parser.add_argument('params', nargs='*', help='参数，格式为 key=value')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--bench', type=int, default=0, help='测量 N 次 status 的往返耗时')
+    args = parser.parse_args(argv)
+
+    client = ControlClient(args.port)
+    try:
+        if args.bench:
+            durations = []
+            for _ in range(args.bench):
+                start = time.perf_counter()
+                client.request('status')
+                durations.append((time.perf_counter() - start) * 1000)
+            durations.sort()
+            print(f"round trip: avg {sum(durations) / len(durations):.3f} ms, "
+                  f"p50 {durations[len(durations) // 2]:.3f} ms, max {durations[-1]:.3f} ms")
+            return 0
+        params = dict(p.split('=', 1) for p in args.params)
+        response = client.request(args.cmd, **{k: _parse_value(v) for k, v in params.items()})
+        print(json.dumps(response, ensure_ascii=False))
+        if args.cmd == 'subscribe':
+            while True:
+                print(json.dumps(client.read(), ensure_ascii=False))
+        return 0 if response.get('ok') else 1
+    except KeyboardInterrupt:
+        return 0
+    finally:
+        client.close()
+
+
+if __name__ == '__main__':
+    sys.exit(main())
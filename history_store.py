@@ -0,0 +1,293 @@
+"""历史进程记录
+
+每条记录以（可执行文件完整路径, 进程名）为键，保存最近使用时间、使用次数和标记。
+同名的通用引擎（nw.exe、RPGGame.exe 等）按路径区分，不会互相误匹配；拿不到路径的
+进程（例如以管理员权限运行）和旧版配置中的 history_processes 只按进程名记录。
+
+文件格式为追加写入的 JSONL，每行一个数组：
+
+    ["u", exe, name, 时间]                 使用一次（新增或更新）
+    ["f", exe, name, 标记]                 修改标记
+    ["d", exe, name]                       删除
+    ["c"]                                  清空
+    ["e", exe, name, 最近时间, 次数, 标记]  压缩后的完整记录
+
+每次使用只追加一行，由后台线程写入；文件行数超过记录数的 COMPACT_RATIO 倍时，
+后台把当前记录重写成 "e" 行（原子替换）。加载时把整个文件拼成一个 JSON 数组一次解析，
+几万条记录也只需要一次 json.loads。
+"""
+import json
+import logging
+import queue
+import threading
+import time
+
+from config_store import atomic_write_text
+
+# 标记
+FLAG_PINNED = 1          # 在选择窗口中始终排在最前
+FLAG_NO_AUTO_MATCH = 2   # 不参与自动匹配
+
+COMPACT_RATIO = 2
+COMPACT_MIN_RECORDS = 256
+
+
+def _path_key(exe):
+    return exe.replace('/', '\\').casefold() if exe else ''
+
+
+class HistoryEntry:
+    """单条历史记录"""
+
+    __slots__ = ('exe', 'name', 'last_seen', 'uses', 'flags')
+
+    def __init__(self, exe, name, last_seen=0, uses=0, flags=0):
+        self.exe = exe or None
+        self.name = name
+        self.last_seen = last_seen
+        self.uses = uses
+        self.flags = flags
+
+    @property
+    def key(self):
+        return _path_key(self.exe), self.name.casefold()
+
+    def __repr__(self):
+        return (f'HistoryEntry({self.exe!r}, {self.name!r}, last_seen={self.last_seen}, '
+                f'uses={self.uses}, flags={self.flags})')
+
+
+class HistoryStore:
+    """历史进程记录的内存索引和追加日志，只在核心线程中修改"""
+
+    def __init__(self, path, clock=time.time):
+        self.path = path
+        self.clock = clock
+        self._entries = {}    # {(路径小写, 名称小写): HistoryEntry}
+        self._by_exe = {}     # {路径小写: HistoryEntry}
+        self._by_name = {}    # {名称小写: 只有名称的 HistoryEntry}
+        self._records = 0     # 文件中的行数
+        self._queue = queue.SimpleQueue()
+        self._thread = None
+        self.load_ms = 0.0
+        self.appends = 0
+        self.compactions = 0
+
+    def load(self):
+        """读取历史文件，文件不存在时返回 False"""
+        start = time.perf_counter()
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                text = f.read()
+        except FileNotFoundError:
+            return False
+        except OSError as e:
+            logging.info(f"读取历史记录失败: {e}")
+            return False
+        lines = [line for line in text.split('\n') if line.strip()]
+        damaged = False
+        try:
+            records = json.loads('[' + ','.join(lines) + ']')
+        except ValueError:
+            # 最后一行可能没写完，逐行解析并跳过损坏的行
+            records = []
+            for line in lines:
+                try:
+                    records.append(json.loads(line))
+                except ValueError:
+                    damaged = True
+        replay = self._replay
+        for record in records:
+            try:
+                replay(record)
+            except (IndexError, TypeError, ValueError, AttributeError):
+                continue
+        self._records = len(records)
+        self.load_ms = (time.perf_counter() - start) * 1000
+        # 有损坏的行时立即重写，之后追加的内容不会接在半行后面
+        self._maybe_compact(force=damaged)
+        return True
+
+    def record(self, name, exe=None):
+        """记录一次使用；有路径的记录取代同名的旧记录（只有名称的），此时返回 True"""
+        if not name:
+            return False
+        now = int(self.clock())
+        self._use(exe, name, now)
+        self._append(['u', exe or None, name, now])
+        upgraded = False
+        if exe:
+            legacy = self._by_name.get(name.casefold())
+            if legacy is not None:
+                self._delete(legacy)
+                self._append(['d', None, legacy.name])
+                upgraded = True
+        self._maybe_compact()
+        return upgraded
+
+    def import_names(self, names):
+        """导入旧版配置中只有名称的历史记录"""
+        for name in names:
+            if name and name.casefold() not in self._by_name:
+                self._use(None, name, 0)
+                self._append(['u', None, name, 0])
+
+    def set_flags(self, name, exe, flags):
+        entry = self._entries.get((_path_key(exe), name.casefold()))
+        if entry is None or entry.flags == flags:
+            return
+        entry.flags = flags
+        self._append(['f', entry.exe, entry.name, flags])
+
+    def clear(self):
+        self._entries.clear()
+        self._by_exe.clear()
+        self._by_name.clear()
+        self._append(['c'])
+        self._maybe_compact()
+
+    def names(self):
+        """只有名称、参与自动匹配的记录"""
+        return [e.name for e in self._by_name.values() if not e.flags & FLAG_NO_AUTO_MATCH]
+
+    def exe_paths(self):
+        """有路径、参与自动匹配的记录"""
+        return [e.exe for e in self._by_exe.values() if not e.flags & FLAG_NO_AUTO_MATCH]
+
+    def lookup(self, name, exe=None):
+        """按路径（优先）或名称查找记录"""
+        if exe:
+            entry = self._by_exe.get(_path_key(exe))
+            if entry is not None:
+                return entry
+        return self._by_name.get(name.casefold()) if name else None
+
+    def rank(self, name, exe=None):
+        """选择窗口的排序键：置顶的最前，其余按最近使用时间，越大越靠前"""
+        entry = self.lookup(name, exe)
+        if entry is None:
+            return 0, 0
+        return (1 if entry.flags & FLAG_PINNED else 0), entry.last_seen
+
+    def close(self):
+        """写完剩余记录并停止后台线程"""
+        if self._thread is not None:
+            self._queue.put(None)
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __iter__(self):
+        return iter(list(self._entries.values()))
+
+    def stats(self):
+        return {
+            'entries': len(self._entries),
+            'records': self._records,
+            'appends': self.appends,
+            'compactions': self.compactions,
+            'load_ms': self.load_ms,
+        }
+
+    def _replay(self, record):
+        op = record[0]
+        if op == 'u':
+            self._use(record[1], record[2], record[3])
+        elif op == 'e':
+            self._use(record[1], record[2], record[3], record[4], record[5])
+        elif op == 'f':
+            entry = self._entries.get((_path_key(record[1]), record[2].casefold()))
+            if entry is not None:
+                entry.flags = record[3]
+        elif op == 'd':
+            entry = self._entries.get((_path_key(record[1]), record[2].casefold()))
+            if entry is not None:
+                self._delete(entry)
+        elif op == 'c':
+            self._entries.clear()
+            self._by_exe.clear()
+            self._by_name.clear()
+
+    def _use(self, exe, name, now, uses=1, flags=None):
+        exe_key = _path_key(exe)
+        key = (exe_key, name.casefold())
+        entry = self._entries.get(key)
+        if entry is None:
+            entry = self._entries[key] = HistoryEntry(exe, name, now, uses, flags or 0)
+            if exe_key:
+                self._by_exe[exe_key] = entry
+            else:
+                self._by_name[key[1]] = entry
+            return entry
+        entry.uses += uses
+        if now > entry.last_seen:
+            entry.last_seen = now
+        if flags is not None:
+            entry.flags = flags
+        return entry
+
+    def _delete(self, entry):
+        key = entry.key
+        self._entries.pop(key, None)
+        if key[0]:
+            self._by_exe.pop(key[0], None)
+        else:
+            self._by_name.pop(key[1], None)
+
+    def _append(self, record):
+        self._records += 1
+        self.appends += 1
+        self._submit(('append', json.dumps(record, ensure_ascii=False, separators=(',', ':'))))
+
+    def _maybe_compact(self, force=False):
+        if not force and self._records <= max(COMPACT_MIN_RECORDS, COMPACT_RATIO * len(self._entries)):
+            return
+        rows = [['e', e.exe, e.name, e.last_seen, e.uses, e.flags] for e in self._entries.values()]
+        self._records = len(rows)
+        self.compactions += 1
+        self._submit(('compact', rows))
+
+    def _submit(self, item):
+        self._queue.put(item)
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='history-writer', daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            lines = []
+            while True:
+                if item is None:
+                    self._write_lines(lines)
+                    return
+                kind, payload = item
+                if kind == 'append':
+                    lines.append(payload)
+                else:
+                    # 压缩结果包含之前所有追加的内容
+                    lines = []
+                    self._compact(payload)
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+            self._write_lines(lines)
+
+    def _write_lines(self, lines):
+        if not lines:
+            return
+        try:
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write('\n'.join(lines) + '\n')
+        except OSError as e:
+            logging.info(f"写入历史记录失败: {e}")
+
+    def _compact(self, rows):
+        text = ''.join(json.dumps(row, ensure_ascii=False, separators=(',', ':')) + '\n' for row in rows)
+        try:
+            atomic_write_text(self.path, text, '.jsonl')
+        except OSError as e:
+            logging.info(f"压缩历史记录失败: {e}")
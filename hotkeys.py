@@ -0,0 +1,253 @@
+"""全局热键
+
+全局热键会占用其他程序的组合键，默认不注册；在配置文件的 hotkeys 项中把动作绑定到组合键
+才会启用，空字符串表示不绑定。推荐的写法：
+
+    "hotkeys": {
+        "toggle_pause": "ctrl+alt+shift+p",
+        "force_mute": "ctrl+alt+shift+m",
+        "add_foreground": "ctrl+alt+shift+a"
+    }
+
+- ``toggle_pause``    暂停/继续监控
+- ``force_mute``      强制静音当前前台的游戏，再按一次取消
+- ``add_foreground``  把前台进程加入监控
+
+组合键由修饰键（ctrl、alt、shift、win）和一个按键组成，按键可以是字母、数字、F1~F24
+或 KEY_NAMES 中的名称。热键源（Windows 下为 RegisterHotKey 的消息线程）收到按键后
+直接把动作交给控制器的核心线程执行，不经过托盘菜单；从按下到生效的耗时记录在 latency 中。
+"""
+import logging
+import threading
+import time
+
+from session_events import LatencyStats
+
+# 动作
+ACTION_TOGGLE_PAUSE = 'toggle_pause'
+ACTION_FORCE_MUTE = 'force_mute'
+ACTION_ADD_FOREGROUND = 'add_foreground'
+ACTIONS = (ACTION_TOGGLE_PAUSE, ACTION_FORCE_MUTE, ACTION_ADD_FOREGROUND)
+
+# RegisterHotKey 的修饰键
+MOD_ALT = 0x0001
+MOD_CONTROL = 0x0002
+MOD_SHIFT = 0x0004
+MOD_WIN = 0x0008
+MOD_NOREPEAT = 0x4000
+
+MODIFIERS = {
+    'alt': MOD_ALT,
+    'ctrl': MOD_CONTROL,
+    'control': MOD_CONTROL,
+    'shift': MOD_SHIFT,
+    'win': MOD_WIN,
+}
+
+# 字母、数字和 F 键以外的按键名（虚拟键码）
+KEY_NAMES = {
+    'space': 0x20, 'pageup': 0x21, 'pagedown': 0x22, 'end': 0x23, 'home': 0x24,
+    'left': 0x25, 'up': 0x26, 'right': 0x27, 'down': 0x28,
+    'insert': 0x2D, 'delete': 0x2E, 'pause': 0x13, 'scrolllock': 0x91,
+}
+
+
+def parse_hotkey(text):
+    """把 "ctrl+alt+p" 解析成 (修饰键, 虚拟键码)，格式错误时抛出 ValueError"""
+    parts = [part.strip().casefold() for part in text.split('+')]
+    if not parts or not all(parts):
+        raise ValueError(f"热键格式错误: {text}")
+    modifiers = 0
+    for part in parts[:-1]:
+        if part not in MODIFIERS:
+            raise ValueError(f"未知的修饰键 {part}")
+        modifiers |= MODIFIERS[part]
+    key = parts[-1]
+    if len(key) == 1 and ('a' <= key <= 'z' or '0' <= key <= '9'):
+        vk = ord(key.upper())
+    elif key[0] == 'f' and key[1:].isdigit() and 1 <= int(key[1:]) <= 24:
+        vk = 0x70 + int(key[1:]) - 1
+    elif key in KEY_NAMES:
+        vk = KEY_NAMES[key]
+    else:
+        raise ValueError(f"未知的按键 {key}")
+    return modifiers, vk
+
+
+class HotkeySource:
+    """热键源基类：start 时传入 {id: (修饰键, 虚拟键码)} 和 emit(id, 按下时间) 回调
+
+    start 返回注册失败的 id 列表；emit 在热键源自己的线程中调用，按下时间为 time.perf_counter()。
+    """
+
+    def start(self, bindings, emit):
+        raise NotImplementedError
+
+    def stop(self):
+        pass
+
+
+class FakeHotkeySource(HotkeySource):
+    """测试用的热键源，press() 在调用线程中直接触发"""
+
+    def __init__(self, taken=()):
+        self.taken = {parse_hotkey(text) for text in taken}  # 模拟被其他程序占用的组合键
+        self.bindings = {}
+        self._emit = None
+
+    def start(self, bindings, emit):
+        self.bindings = {id_: combo for id_, combo in bindings.items() if combo not in self.taken}
+        self._emit = emit
+        return [id_ for id_ in bindings if id_ not in self.bindings]
+
+    def stop(self):
+        self.bindings = {}
+        self._emit = None
+
+    def press(self, text):
+        """按下组合键，没有注册时返回 False"""
+        combo = parse_hotkey(text)
+        for id_, bound in self.bindings.items():
+            if bound == combo and self._emit is not None:
+                self._emit(id_, time.perf_counter())
+                return True
+        return False
+
+
+class WindowsHotkeySource(HotkeySource):
+    """RegisterHotKey + 专用消息线程，WM_HOTKEY 的 wParam 为绑定的 id"""
+
+    WM_HOTKEY = 0x0312
+    WM_QUIT = 0x0012
+
+    def __init__(self):
+        self._thread = None
+        self._thread_id = None
+        self._ready = threading.Event()
+        self._failed = []
+        self._error = None
+
+    def start(self, bindings, emit):
+        self._ready.clear()
+        self._thread = threading.Thread(target=self._run, args=(dict(bindings), emit),
+                                        name='hotkeys', daemon=True)
+        self._thread.start()
+        self._ready.wait(timeout=5)
+        if self._error:
+            raise self._error
+        return list(self._failed)
+
+    def stop(self):
+        if self._thread_id:
+            import ctypes
+            ctypes.windll.user32.PostThreadMessageW(self._thread_id, self.WM_QUIT, 0, 0)
+        if self._thread:
+            self._thread.join(timeout=2)
+            self._thread = None
+
+    def _run(self, bindings, emit):
+        import ctypes
+        from ctypes import wintypes
+
+        user32 = ctypes.windll.user32
+        kernel32 = ctypes.windll.kernel32
+        registered = []
+        try:
+            self._thread_id = kernel32.GetCurrentThreadId()
+            # 热键必须在接收消息的线程中注册
+            for id_, (modifiers, vk) in bindings.items():
+                if user32.RegisterHotKey(None, id_, modifiers | MOD_NOREPEAT, vk):
+                    registered.append(id_)
+                else:
+                    self._failed.append(id_)
+        except Exception as e:
+            self._error = e
+            self._ready.set()
+            return
+
+        self._ready.set()
+
+        msg = wintypes.MSG()
+        while user32.GetMessageW(ctypes.byref(msg), None, 0, 0) > 0:
+            if msg.message == self.WM_HOTKEY:
+                now = time.perf_counter()
+                # msg.time 为按键消息进入队列的时刻（GetTickCount 毫秒），把排队时间也算进去
+                queued = (kernel32.GetTickCount() - msg.time) & 0xFFFFFFFF
+                emit(msg.wParam, now - min(queued, 1000) / 1000)
+
+        for id_ in registered:
+            user32.UnregisterHotKey(None, id_)
+
+
+class HotkeyEngine:
+    """把配置的热键绑定到动作，按下时调用 dispatch(动作, 按下时间)
+
+    dispatch 在热键源的线程中调用，应只投递消息；动作执行完后调用 record() 记录耗时。
+    热键源不可用或全部注册失败时不影响其他功能。
+    """
+
+    def __init__(self, source, hotkeys, dispatch):
+        self.source = source
+        self.dispatch = dispatch
+        self.active = False
+        self.latency = LatencyStats()
+        self.presses = {action: 0 for action in ACTIONS}
+        self.failed = []
+        self._actions = {}   # {id: 动作}
+        self._bindings = {}  # {id: (修饰键, 虚拟键码)}
+        for action, text in hotkeys.items():
+            if action not in ACTIONS:
+                logging.info(f"未知的热键动作 {action}，已忽略")
+                continue
+            if not text:
+                continue
+            try:
+                combo = parse_hotkey(text)
+            except ValueError as e:
+                logging.info(f"热键 {action} 无效，已忽略: {e}")
+                continue
+            id_ = len(self._actions) + 1
+            self._actions[id_] = action
+            self._bindings[id_] = combo
+
+    def start(self):
+        if self.source is None or not self._bindings:
+            return
+        try:
+            failed = self.source.start(self._bindings, self._on_hotkey)
+            self.active = True
+        except Exception as e:
+            logging.info(f"全局热键启动失败: {e}")
+            return
+        self.failed = [self._actions[id_] for id_ in failed]
+        for action in self.failed:
+            logging.info(f"热键 {action} 注册失败，可能已被其他程序占用")
+
+    def stop(self):
+        if self.source is not None and self.active:
+            try:
+                self.source.stop()
+            except Exception as e:
+                logging.info(f"停止全局热键失败: {e}")
+        self.active = False
+
+    def record(self, pressed_at):
+        """动作生效后调用，记录从按下到生效的耗时"""
+        seconds = time.perf_counter() - pressed_at
+        self.latency.record(seconds)
+        return seconds * 1000
+
+    def stats(self):
+        return {
+            'bindings': len(self._bindings),
+            'failed': len(self.failed),
+            'presses': dict(self.presses),
+            'latency': self.latency.summary(),
+        }
+
+    def _on_hotkey(self, id_, pressed_at):
+        action = self._actions.get(id_)
+        if action is None:
+            return
+        self.presses[action] += 1
+        self.dispatch(action, pressed_at)
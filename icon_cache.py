@@ -0,0 +1,125 @@
+"""托盘图标缓存
+
+播放/暂停两种图标在每个尺寸上只绘制一次，之后直接复用。
+如果 assets 目录下有 icon_play.png / icon_pause.png，则优先使用这些图片。
+
+直接运行本文件可以对比每次重新绘制和使用缓存的耗时：
+
+    python icon_cache.py
+"""
+import os
+import time
+
+import startup_timing
+
+# 缓存的图标尺寸，覆盖常见的 DPI 缩放比例
+ICON_SIZES = (16, 20, 24, 32, 40, 48, 64, 96, 128)
+DEFAULT_SIZE = 64
+# 在 256 像素画布上绘制，再缩小到各个尺寸
+_BASE_SIZE = 256
+
+PLAY_COLOR = '#00C853'
+PAUSE_COLOR = '#D32F2F'
+
+ASSET_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'assets')
+
+
+def draw_icon(is_pause, size=DEFAULT_SIZE):
+    """绘制状态图标（坐标按原来 64x64 的设计等比缩放）"""
+    with startup_timing.timed_import('PIL'):
+        from PIL import Image, ImageDraw
+
+    scale = size / 64
+    image = Image.new('RGB', (size, size), color='white')
+    drawing = ImageDraw.Draw(image)
+
+    if is_pause:
+        # 暂停状态：红色双竖线
+        drawing.rectangle([20 * scale, 15 * scale, 30 * scale, 49 * scale], fill=PAUSE_COLOR)
+        drawing.rectangle([39 * scale, 15 * scale, 49 * scale, 49 * scale], fill=PAUSE_COLOR)
+    else:
+        # 播放状态：绿色三角形
+        points = [(20 * scale, 15 * scale), (20 * scale, 49 * scale), (49 * scale, 32 * scale)]
+        drawing.polygon(points, fill=PLAY_COLOR)
+
+    return image
+
+
+def preferred_tray_size():
+    """根据系统 DPI 选择托盘图标尺寸，高 DPI 下使用更大的源图"""
+    try:
+        import ctypes
+        dpi = ctypes.windll.user32.GetDpiForSystem()
+    except Exception:
+        return DEFAULT_SIZE
+    return DEFAULT_SIZE if dpi <= 144 else 128
+
+
+class IconCache:
+    """按 (是否暂停, 尺寸) 缓存渲染好的图标"""
+
+    def __init__(self, sizes=ICON_SIZES, asset_dir=ASSET_DIR):
+        self.sizes = sizes
+        self.asset_dir = asset_dir
+        self._icons = {}
+        self._bases = {}
+
+    def get(self, is_pause=False, size=DEFAULT_SIZE):
+        key = (bool(is_pause), size)
+        icon = self._icons.get(key)
+        if icon is None:
+            icon = self._icons[key] = self._render(bool(is_pause), size)
+        return icon
+
+    def prerender(self):
+        """预先渲染所有状态和尺寸"""
+        for is_pause in (False, True):
+            for size in self.sizes:
+                self.get(is_pause, size)
+
+    def _base(self, is_pause):
+        """大尺寸源图：优先读取 assets 中的图片，否则绘制"""
+        base = self._bases.get(is_pause)
+        if base is None:
+            path = os.path.join(self.asset_dir, 'icon_pause.png' if is_pause else 'icon_play.png')
+            if os.path.exists(path):
+                with startup_timing.timed_import('PIL'):
+                    from PIL import Image
+                base = Image.open(path).convert('RGBA')
+            else:
+                base = draw_icon(is_pause, _BASE_SIZE)
+            self._bases[is_pause] = base
+        return base
+
+    def _render(self, is_pause, size):
+        with startup_timing.timed_import('PIL'):
+            from PIL import Image
+        base = self._base(is_pause)
+        if base.size == (size, size):
+            return base
+        return base.resize((size, size), Image.LANCZOS)
+
+
+def _benchmark(rounds=200):
+    start = time.perf_counter()
+    for i in range(rounds):
+        draw_icon(i % 2 == 1)
+    redraw_ms = (time.perf_counter() - start) * 1000 / rounds
+
+    cache = IconCache()
+    start = time.perf_counter()
+    cache.prerender()
+    prerender_ms = (time.perf_counter() - start) * 1000
+
+    start = time.perf_counter()
+    for i in range(rounds):
+        cache.get(i % 2 == 1)
+    cached_ms = (time.perf_counter() - start) * 1000 / rounds
+
+    print(f"每次重新绘制: {redraw_ms:.3f} ms")
+    print(f"预渲染全部尺寸: {prerender_ms:.1f} ms（仅一次）")
+    print(f"读取缓存: {cached_ms:.4f} ms")
+
+
+if __name__ == '__main__':
+    _benchmark()
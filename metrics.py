@@ -0,0 +1,186 @@
+"""监控循环的指标和日志
+
+- Metrics：计数器、耗时直方图（毫秒）和各模块 stats() 的汇总，可导出为 JSON 或
+  Prometheus 文本格式（metrics_file 以 .prom 结尾时）
+- start_queue_logging：日志先进入队列，由后台线程写文件和控制台，监控tick不会因为
+  写日志而阻塞
+"""
+import atexit
+import json
+import logging
+import logging.handlers
+import queue
+import re
+import time
+
+from config_store import atomic_write_text
+
+# 直方图桶上限（毫秒）
+BUCKETS_MS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 1000)
+PROMETHEUS_PREFIX = 'galbgm'
+
+
+class Histogram:
+    """固定桶的累积直方图"""
+
+    __slots__ = ('buckets', 'counts', 'count', 'sum', 'max')
+
+    def __init__(self, buckets=BUCKETS_MS):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value):
+        self.count += 1
+        self.sum += value
+        if value > self.max:
+            self.max = value
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+
+    def quantile(self, q):
+        """按桶估算分位数（返回所在桶的上限）"""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(self.buckets, self.counts):
+            seen += count
+            if seen >= rank:
+                return bound
+        return self.max
+
+    def summary(self):
+        return {
+            'count': self.count,
+            'avg': self.sum / self.count if self.count else 0.0,
+            'p50': self.quantile(0.5),
+            'p95': self.quantile(0.95),
+            'max': self.max,
+        }
+
+
+class _Phase:
+    __slots__ = ('histogram', 'start')
+
+    def __init__(self, histogram):
+        self.histogram = histogram
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+
+    def __exit__(self, *exc):
+        self.histogram.observe((time.perf_counter() - self.start) * 1000)
+        return False
+
+
+class Metrics:
+    """计数器、直方图和各模块统计的集合，只在核心线程中更新"""
+
+    def __init__(self):
+        self.counters = {}
+        self.histograms = {}
+        self._providers = {}
+        self.started_at = time.time()
+
+    def inc(self, name, value=1):
+        self.counters[name] = self.counters.get(name, 0) + value
+
+    def histogram(self, name):
+        histogram = self.histograms.get(name)
+        if histogram is None:
+            histogram = self.histograms[name] = Histogram()
+        return histogram
+
+    def observe(self, name, ms):
+        self.histogram(name).observe(ms)
+
+    def phase(self, name):
+        """计时某个阶段：with metrics.phase('enumerate'): ..."""
+        return _Phase(self.histogram(f'phase_{name}_ms'))
+
+    def register(self, name, stats):
+        """登记模块的 stats() 函数，导出时一起输出"""
+        self._providers[name] = stats
+
+    def snapshot(self):
+        stats = {}
+        for name, provider in self._providers.items():
+            try:
+                stats[name] = provider()
+            except Exception as e:
+                stats[name] = {'error': str(e)}
+        return {
+            'uptime_s': time.time() - self.started_at,
+            'counters': dict(self.counters),
+            'histograms': {name: h.summary() for name, h in self.histograms.items()},
+            'stats': stats,
+        }
+
+    def to_prometheus(self, prefix=PROMETHEUS_PREFIX):
+        lines = [f'{prefix}_uptime_seconds {time.time() - self.started_at:.3f}']
+        for name, value in sorted(self.counters.items()):
+            metric = _metric_name(prefix, name)
+            lines.append(f'# TYPE {metric}_total counter')
+            lines.append(f'{metric}_total {value}')
+        for name, histogram in sorted(self.histograms.items()):
+            metric = _metric_name(prefix, name)
+            lines.append(f'# TYPE {metric} histogram')
+            cumulative = 0
+            for bound, count in zip(histogram.buckets, histogram.counts):
+                cumulative += count
+                lines.append(f'{metric}_bucket{{le="{bound}"}} {cumulative}')
+            lines.append(f'{metric}_bucket{{le="+Inf"}} {histogram.count}')
+            lines.append(f'{metric}_sum {histogram.sum:.6f}')
+            lines.append(f'{metric}_count {histogram.count}')
+        for name, stats in sorted(self.snapshot()['stats'].items()):
+            for key, value in _flatten(stats):
+                if isinstance(value, bool) or not isinstance(value, (int, float)):
+                    continue
+                lines.append(f'{_metric_name(prefix, name + "_" + key)} {value}')
+        return '\n'.join(lines) + '\n'
+
+    def render(self, path):
+        """按文件扩展名生成导出内容"""
+        if path.endswith('.prom'):
+            return self.to_prometheus()
+        return json.dumps(self.snapshot(), ensure_ascii=False, indent=2)
+
+
+def write_metrics(path, text):
+    """原子写入导出文件，在后台线程中调用"""
+    try:
+        atomic_write_text(path, text)
+    except Exception as e:
+        logging.info(f"写入指标文件失败: {e}")
+
+
+def _metric_name(prefix, name):
+    return f'{prefix}_' + re.sub(r'[^a-zA-Z0-9_]', '_', name)
+
+
+def _flatten(stats, prefix=''):
+    for key, value in stats.items():
+        if isinstance(value, dict):
+            yield from _flatten(value, f'{prefix}{key}_')
+        else:
+            yield f'{prefix}{key}', value
+
+
+def start_queue_logging(handlers, level=logging.INFO, fmt='%(asctime)s - %(levelname)s - %(message)s'):
+    """日志通过队列交给后台线程写出，返回 QueueListener；退出时自动停止并写完剩余日志"""
+    formatter = logging.Formatter(fmt)
+    for handler in handlers:
+        handler.setFormatter(formatter)
+    log_queue = queue.SimpleQueue()
+    listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+    root = logging.getLogger()
+    root.setLevel(level)
+    root.addHandler(logging.handlers.QueueHandler(log_queue))
+    listener.start()
+    atexit.register(listener.stop)
+    return listener
@@ -0,0 +1,144 @@
+"""静音决策状态机
+
+非前台静音模式下，快速 Alt+Tab、悬浮窗或输入法候选窗抢走前台时，游戏会在一两轮tick内
+先静音再恢复，既多出 COM 调用，又会听到明显的断音。这里为每个监控目标维护一个状态机：
+
+- 满足静音条件后等待 grace 秒才静音，期间条件消失则取消（记为 absorbed）
+- 已静音的目标在条件消失后等待 hysteresis 秒才恢复，避免前台来回闪动时反复切换
+- 前台是"透明"进程（输入法、系统浮层、游戏内悬浮窗等）时，沿用上一个非透明的前台进程
+
+grace 和 hysteresis 来自目标的策略（profiles.Profile）。每次状态切换都会计数，
+距离上一次反向切换不到 THRASH_WINDOW 秒的记为一次抖动（thrash）。
+"""
+
+# 默认视为透明的前台进程（不区分大小写）
+TRANSPARENT_PROCESSES = frozenset((
+    'textinputhost.exe', 'ctfmon.exe', 'chsime.exe', 'imecfmui.exe',
+    'shellexperiencehost.exe', 'gamebar.exe', 'gamebarftserver.exe',
+))
+
+# 两次相反的切换间隔小于该值时视为抖动
+THRASH_WINDOW = 2.0
+
+
+class TargetState:
+    """单个目标的决策状态"""
+
+    __slots__ = ('muted', 'pending_since', 'changed_at')
+
+    def __init__(self):
+        self.muted = False          # 当前决策
+        self.pending_since = None   # 开始等待切换的时间
+        self.changed_at = None      # 上一次切换的时间
+
+
+class MutePolicy:
+    """按目标的静音决策状态机，只在核心线程中使用"""
+
+    def __init__(self, backend, transparent_processes=TRANSPARENT_PROCESSES, process_cache=None):
+        self.backend = backend
+        self.process_cache = process_cache
+        self.transparent = frozenset(name.casefold() for name in transparent_processes)
+        self._states = {}       # {pid: TargetState}
+        self._transparent = {}  # {pid: (创建时间, 是否为透明进程)}
+        self._foreground = None  # 上一个非透明的前台进程
+        self.deadline = None    # 最近一个等待中的切换还需要的秒数，没有时为 None
+        self.mutes = 0
+        self.unmutes = 0
+        self.absorbed = 0
+        self.thrash = 0
+        self.transparent_hits = 0
+
+    def foreground(self, pid):
+        """过滤透明进程后的前台进程"""
+        if pid and self._is_transparent(pid):
+            self.transparent_hits += 1
+            return self._foreground if self._foreground is not None else pid
+        self._foreground = pid
+        return pid
+
+    def begin(self):
+        """每轮tick开始时调用"""
+        self.deadline = None
+
+    def decide(self, pid, want_mute, profile, now):
+        """根据本轮的静音条件返回该目标应处的状态"""
+        state = self._states.get(pid)
+        if state is None:
+            state = self._states[pid] = TargetState()
+        if want_mute == state.muted:
+            if state.pending_since is not None:
+                # 等待期间条件消失，这次切换被吸收
+                state.pending_since = None
+                self.absorbed += 1
+            return state.muted
+
+        delay = profile.grace if want_mute else profile.hysteresis
+        if delay > 0:
+            if state.pending_since is None:
+                state.pending_since = now
+            remaining = state.pending_since + delay - now
+            if remaining > 0:
+                if self.deadline is None or remaining < self.deadline:
+                    self.deadline = remaining
+                return state.muted
+
+        if state.changed_at is not None and now - state.changed_at < THRASH_WINDOW:
+            self.thrash += 1
+        state.muted = want_mute
+        state.pending_since = None
+        state.changed_at = now
+        if want_mute:
+            self.mutes += 1
+        else:
+            self.unmutes += 1
+        return want_mute
+
+    def muted(self, pid):
+        """该目标当前的决策状态"""
+        state = self._states.get(pid)
+        return state is not None and state.muted
+
+    def forget(self, pid):
+        self._states.pop(pid, None)
+
+    def prune(self, live_pids):
+        """丢弃已经消失的进程的透明判断结果"""
+        if len(self._transparent) > len(live_pids):
+            self._transparent = {k: v for k, v in self._transparent.items() if k in live_pids}
+
+    def stats(self):
+        return {
+            'targets': len(self._states),
+            'pending': sum(1 for state in self._states.values() if state.pending_since is not None),
+            'mutes': self.mutes,
+            'unmutes': self.unmutes,
+            'absorbed': self.absorbed,
+            'thrash': self.thrash,
+            'transparent_hits': self.transparent_hits,
+        }
+
+    def _is_transparent(self, pid):
+        """按 (pid, 创建时间) 缓存判断结果，pid 被复用时重新判断"""
+        info = self.process_cache.lookup(pid) if self.process_cache is not None else None
+        if info is not None:
+            # 有音频会话的进程，创建时间已在本轮快照中校验过
+            create_time, name = info.create_time, info.name
+        else:
+            try:
+                create_time = self.backend.process_create_time(pid)
+            except Exception:
+                create_time = None
+            name = None
+        cached = self._transparent.get(pid)
+        if cached is not None and create_time is not None and cached[0] == create_time:
+            return cached[1]
+        if name is None:
+            try:
+                metadata = self.backend.process_metadata(pid)
+            except Exception:
+                metadata = None
+            name = metadata[0] if metadata is not None else None
+        result = bool(name) and name.casefold() in self.transparent
+        self._transparent[pid] = (create_time, result)
+        return result
@@ -0,0 +1,219 @@
+import logging
+import time
+
+
+class MuteRecord:
+    """单个音频会话的静音状态"""
+
+    __slots__ = ('pid', 'session', 'muted', 'owned', 'volume', 'profile')
+
+    def __init__(self, pid, session, muted):
+        self.pid = pid
+        self.session = session
+        self.muted = muted    # 会话实际的静音状态（降到后台音量也算）
+        self.owned = False    # 是否由本程序静音
+        self.volume = None    # 降到后台音量前的原音量，None 表示是用 SetMute 静音的
+        self.profile = None   # 最近一次静音使用的策略，恢复时沿用它的渐变时长
+
+
+class MuteStateCache:
+    """以会话标识为键的静音状态缓存
+
+    - 新会话第一次出现时读取一次实际静音状态，不再假设为未静音
+    - 每轮tick一次性计算所有目标的期望状态，只把真正不同的会话批量下发
+    - 只恢复由本程序静音的会话，不会覆盖用户在混音器里手动设置的静音
+    - 按 reconcile_interval 定期用 GetMute 校正缓存，发现外部修改
+    - 传入 fader 且渐变时长大于 0 时，静音/取消静音改为音量渐变
+    - 策略的 background_volume 大于 0 时把音量降到原音量的相应比例而不静音
+    """
+
+    def __init__(self, backend, reconcile_interval=10.0, fader=None):
+        self.backend = backend
+        self.reconcile_interval = reconcile_interval
+        self.fader = fader
+        self._records = {}  # {session_key: MuteRecord}
+        self._last_reconcile = time.monotonic()
+        self.set_mute_calls = 0
+        self.fades = 0
+        self.failures = 0
+        self.skipped = 0
+        self.external_changes = 0
+
+    def apply(self, snapshot, desired, profiles=None):
+        """desired 为 {pid: 是否应静音}，profiles 为 {pid: Profile}，返回实际发生变化的 pid 集合"""
+        records = self._records
+        seen = set()
+        batch = []
+        for pid, should_mute in desired.items():
+            for entry in snapshot.by_pid(pid):
+                key = self.backend.session_key(entry.session)
+                seen.add(key)
+                record = records.get(key)
+                if record is None:
+                    record = records[key] = MuteRecord(pid, entry.session, self._read_mute(entry.session))
+                else:
+                    record.session = entry.session
+
+                if should_mute and not record.muted:
+                    batch.append((record, True, profiles.get(pid) if profiles else None))
+                elif not should_mute and record.muted and record.owned:
+                    batch.append((record, False, record.profile))
+                else:
+                    self.skipped += 1
+
+        # 目标中已消失的会话直接丢弃；其他进程的记录（不再监控、等待恢复）只在会话已不在快照中时丢弃
+        live = {}  # {pid: 该进程当前的会话标识}
+        stale = []
+        for key, record in records.items():
+            if key in seen:
+                continue
+            pid = record.pid
+            if pid not in desired:
+                keys = live.get(pid)
+                if keys is None:
+                    keys = live[pid] = {self.backend.session_key(e.session) for e in snapshot.by_pid(pid)}
+                if key in keys:
+                    continue
+            stale.append(key)
+        for key in stale:
+            del records[key]
+
+        return self._apply_batch(batch)
+
+    def restore(self, pids=None, immediate=False):
+        """恢复由本程序静音的会话，pids 为 None 时恢复全部；直接使用缓存的会话句柄
+
+        immediate 为 True 时（退出程序）先结束所有渐变，再直接取消静音。
+        """
+        if immediate and self.fader is not None:
+            self.fader.finish_all()
+        if pids is not None:
+            pids = set(pids)
+        batch = [(record, False, record.profile) for record in self._records.values()
+                 if record.owned and record.muted and (pids is None or record.pid in pids)]
+        return self._apply_batch(batch, immediate)
+
+    def mute(self, pids):
+        """立即静音指定进程已缓存的会话（不重新枚举），返回实际发生变化的 pid 集合"""
+        pids = set(pids)
+        batch = [(record, True, None) for record in self._records.values()
+                 if record.pid in pids and not record.muted]
+        return self._apply_batch(batch)
+
+    def forget(self, pids):
+        """丢弃指定进程的记录"""
+        pids = set(pids)
+        for key in [k for k, r in self._records.items() if r.pid in pids]:
+            del self._records[key]
+
+    def muted_pids(self):
+        return {r.pid for r in self._records.values() if r.muted and r.owned}
+
+    def is_muted(self, pid):
+        return any(r.muted for r in self._records.values() if r.pid == pid)
+
+    def maybe_reconcile(self, now=None):
+        """距离上次校正超过间隔时，用实际的 GetMute 结果校正缓存"""
+        if now is None:
+            now = time.monotonic()
+        if self.reconcile_interval <= 0 or now - self._last_reconcile < self.reconcile_interval:
+            return 0
+        self._last_reconcile = now
+        return self.reconcile()
+
+    def reconcile(self):
+        """读取所有缓存会话的实际静音状态，返回外部修改的数量"""
+        changed = 0
+        fader = self.fader
+        for key, record in list(self._records.items()):
+            # 渐变中的会话实际状态和缓存暂时不一致，不算外部修改
+            if fader is not None and fader.active(record.session):
+                continue
+            # 降到后台音量的会话没有静音，不能用 GetMute 判断
+            if record.volume is not None:
+                continue
+            try:
+                actual = self.backend.get_mute(record.session)
+            except Exception:
+                # 会话已失效
+                del self._records[key]
+                continue
+            if actual != record.muted:
+                changed += 1
+                record.muted = actual
+                # 被外部取消静音后不再算作本程序静音
+                if not actual:
+                    record.owned = False
+        self.external_changes += changed
+        return changed
+
+    def stats(self):
+        return {
+            'sessions': len(self._records),
+            'set_mute_calls': self.set_mute_calls,
+            'fades': self.fades,
+            'failures': self.failures,
+            'skipped': self.skipped,
+            'external_changes': self.external_changes,
+        }
+
+    def _read_mute(self, session):
+        try:
+            return self.backend.get_mute(session)
+        except Exception:
+            return False
+
+    def _duration(self, profile):
+        if profile is not None and profile.fade_duration is not None:
+            return profile.fade_duration
+        return self.fader.duration if self.fader is not None else 0.0
+
+    def _apply_batch(self, batch, immediate=False):
+        """batch 为 (记录, 是否静音, 策略) 列表：需要渐变的交给 fader，调整音量的逐个设置，其余批量 SetMute"""
+        changed = set()
+        if not batch:
+            return changed
+        fader = self.fader
+        direct = []
+        for record, mute, profile in batch:
+            level = profile.background_volume if mute and profile is not None else 0.0
+            use_fader = fader is not None and not immediate and self._duration(profile) > 0
+            if not use_fader and not level and record.volume is None:
+                direct.append((record, mute, profile))
+                continue
+            try:
+                if use_fader:
+                    self.fades += 1
+                    if mute:
+                        original = fader.fade_out(record.session, self._duration(profile), level)
+                    else:
+                        fader.fade_in(record.session, self._duration(profile), record.volume)
+                elif mute:
+                    original = self.backend.get_volume(record.session)
+                    self.backend.set_volume(record.session, original * level)
+                else:
+                    self.backend.set_volume(record.session, record.volume)
+            except Exception as e:
+                logging.info(f"调整音量失败: {e}")
+                self.failures += 1
+                continue
+            record.volume = original if mute and level else None
+            self._set(record, mute, profile)
+            changed.add(record.pid)
+
+        if direct:
+            results = self.backend.set_mute_batch([(record.session, mute) for record, mute, _ in direct])
+            for (record, mute, profile), ok in zip(direct, results):
+                if not ok:
+                    self.failures += 1
+                    continue
+                self._set(record, mute, profile)
+                changed.add(record.pid)
+            self.set_mute_calls += len(direct)
+        return changed
+
+    @staticmethod
+    def _set(record, mute, profile):
+        record.muted = mute
+        record.owned = mute
+        record.profile = profile if mute else None
@@ -0,0 +1,464 @@
+import logging
+import random
+from collections import Counter
+
+import startup_timing
+from session_events import (
+    ScriptedEventSource, WindowsEventSource,
+    SESSION_CREATED, SESSION_DISCONNECTED, FOREGROUND_CHANGED,
+    WINDOW_MINIMIZED, WINDOW_RESTORED,
+)
+from hotkeys import FakeHotkeySource, WindowsHotkeySource
+from audio_endpoints import AudioEndpoints, WindowsEndpointSource, FakeEndpointSource
+
+
+class PlatformBackend:
+    """平台后端接口：音频会话枚举、静音、前台窗口和窗口状态
+
+    会话句柄（session）对控制器是不透明的，只会原样传回后端。
+    endpoints 为按输出设备枚举会话的 AudioEndpoints，不区分设备的后端为 None。
+    """
+
+    endpoints = None
+
+    def list_sessions(self):
+        """返回 [(pid, 进程创建时间, 会话句柄), ...]"""
+        raise NotImplementedError
+
+    def set_mute(self, session, mute):
+        raise NotImplementedError
+
+    def get_mute(self, session):
+        raise NotImplementedError
+
+    def set_mute_batch(self, changes):
+        """批量设置静音，changes 为 [(会话句柄, 是否静音), ...]，返回每项是否成功"""
+        results = []
+        for session, mute in changes:
+            try:
+                self.set_mute(session, mute)
+                results.append(True)
+            except Exception as e:
+                logging.info(f"设置静音失败: {e}")
+                results.append(False)
+        return results
+
+    def get_volume(self, session):
+        """返回会话音量（0.0 ~ 1.0）"""
+        raise NotImplementedError
+
+    def set_volume(self, session, level):
+        raise NotImplementedError
+
+    def set_volume_batch(self, changes):
+        """批量设置音量，changes 为 [(会话句柄, 音量), ...]，返回每项是否成功"""
+        results = []
+        for session, level in changes:
+            try:
+                self.set_volume(session, level)
+                results.append(True)
+            except Exception as e:
+                logging.info(f"设置音量失败: {e}")
+                results.append(False)
+        return results
+
+    def session_key(self, session):
+        """返回会话的唯一标识，用于跨tick跟踪同一个会话"""
+        raise NotImplementedError
+
+    def get_foreground_pid(self):
+        """返回前台窗口所属进程的 pid，获取失败返回 None"""
+        raise NotImplementedError
+
+    def process_metadata(self, pid):
+        """返回 (进程名, 可执行文件路径, 父进程 pid)，进程不存在时返回 None
+
+        路径无法读取（例如权限不足）时为 None。
+        """
+        raise NotImplementedError
+
+    def process_create_time(self, pid):
+        """返回进程的创建时间，与 pid 一起识别 pid 复用；进程不存在时返回 None"""
+        raise NotImplementedError
+
+    def enum_windows(self):
+        """返回所有可见顶层窗口 [(hwnd, pid, 是否最小化), ...]"""
+        raise NotImplementedError
+
+    def get_window_state(self, hwnd):
+        """返回窗口是否最小化；窗口已不存在或不可见时返回 None"""
+        raise NotImplementedError
+
+    def create_event_source(self):
+        """返回与该后端配套的事件源，没有则返回 None"""
+        return None
+
+    def create_hotkey_source(self):
+        """返回全局热键源（hotkeys.HotkeySource），不支持时返回 None"""
+        return None
+
+    def watch_devices(self, listener):
+        """开始接收音频设备接入/移除/默认设备变化的通知，listener(通知类型, 设备 ID) 在通知线程中调用"""
+        if self.endpoints is not None:
+            self.endpoints.watch(listener)
+
+    def unwatch_devices(self):
+        if self.endpoints is not None:
+            self.endpoints.stop()
+
+    def thread_init(self):
+        """在执行后端调用的线程启动时调用（例如初始化 COM）"""
+        pass
+
+    def thread_uninit(self):
+        """与 thread_init 配对，在该线程退出前调用"""
+        pass
+
+
+class WindowsBackend(PlatformBackend):
+    """基于 pycaw 和 pywin32 的 Windows 后端"""
+
+    def __init__(self):
+        self._win32gui = None
+        self._win32process = None
+        # 枚举所有输出设备的会话，不只是默认设备
+        self.endpoints = AudioEndpoints(WindowsEndpointSource())
+
+    def _load(self):
+        """首次使用时再导入 pywin32，加快冷启动（pycaw 由 WindowsEndpointSource 首次枚举时导入）"""
+        if self._win32gui is not None:
+            return
+        with startup_timing.timed_import('win32gui'):
+            import win32gui
+            import win32process
+        self._win32gui = win32gui
+        self._win32process = win32process
+
+    def thread_init(self):
+        import comtypes
+        comtypes.CoInitialize()
+
+    def thread_uninit(self):
+        import comtypes
+        comtypes.CoUninitialize()
+
+    def list_sessions(self):
+        sessions = []
+        for _, session in self.endpoints.sessions():
+            process = session.Process
+            if not process:
+                continue
+            try:
+                # psutil 在构造 Process 时已经取得并缓存了创建时间
+                sessions.append((process.pid, process.create_time(), session))
+            except Exception:
+                # 进程可能在枚举过程中退出
+                continue
+        return sessions
+
+    def set_mute(self, session, mute):
+        session.SimpleAudioVolume.SetMute(bool(mute), None)
+
+    def get_mute(self, session):
+        return bool(session.SimpleAudioVolume.GetMute())
+
+    def get_volume(self, session):
+        return float(session.SimpleAudioVolume.GetMasterVolume())
+
+    def set_volume(self, session, level):
+        session.SimpleAudioVolume.SetMasterVolume(float(level), None)
+
+    def session_key(self, session):
+        return session.InstanceIdentifier
+
+    def get_foreground_pid(self):
+        self._load()
+        try:
+            hwnd = self._win32gui.GetForegroundWindow()
+            _, pid = self._win32process.GetWindowThreadProcessId(hwnd)
+            return pid
+        except:
+            return None
+
+    def process_metadata(self, pid):
+        import psutil
+        try:
+            process = psutil.Process(pid)
+            with process.oneshot():
+                name = process.name()
+                ppid = process.ppid()
+                try:
+                    exe = process.exe()
+                except psutil.AccessDenied:
+                    exe = None
+        except psutil.Error:
+            return None
+        return name, exe, ppid
+
+    def process_create_time(self, pid):
+        import psutil
+        try:
+            return psutil.Process(pid).create_time()
+        except psutil.Error:
+            return None
+
+    def enum_windows(self):
+        self._load()
+        hwnds = []
+        self._win32gui.EnumWindows(lambda hwnd, acc: acc.append(hwnd) or True, hwnds)
+
+        windows = []
+        for hwnd in hwnds:
+            try:
+                if self._win32gui.IsWindowVisible(hwnd):
+                    _, pid = self._win32process.GetWindowThreadProcessId(hwnd)
+                    windows.append((hwnd, pid, bool(self._win32gui.IsIconic(hwnd))))
+            except:
+                pass
+        return windows
+
+    def get_window_state(self, hwnd):
+        self._load()
+        try:
+            if self._win32gui.IsWindow(hwnd) and self._win32gui.IsWindowVisible(hwnd):
+                return bool(self._win32gui.IsIconic(hwnd))
+        except:
+            pass
+        return None
+
+    def create_event_source(self):
+        return WindowsEventSource()
+
+    def create_hotkey_source(self):
+        return WindowsHotkeySource()
+
+
+class FakeSession:
+    """内存中的伪音频会话"""
+
+    __slots__ = ('key', 'pid', 'name', 'muted', 'volume', 'device')
+
+    def __init__(self, key, pid, name, device=FakeEndpointSource.DEFAULT_DEVICE):
+        self.key = key
+        self.pid = pid
+        self.name = name
+        self.muted = False
+        self.volume = 1.0
+        self.device = device  # 所属的输出设备
+
+    def __repr__(self):
+        return (f"FakeSession({self.key!r}, pid={self.pid}, device={self.device!r}, muted={self.muted}, "
+                f"volume={self.volume})")
+
+
+class FakeWindow:
+    """内存中的伪顶层窗口"""
+
+    __slots__ = ('hwnd', 'pid', 'visible', 'iconic')
+
+    def __init__(self, hwnd, pid, visible=True, iconic=False):
+        self.hwnd = hwnd
+        self.pid = pid
+        self.visible = visible
+        self.iconic = iconic
+
+
+class FakeBackend(PlatformBackend):
+    """确定性的内存后端，可以模拟成千上万的进程、会话和窗口
+
+    所有后端调用都会计入 calls，便于统计每轮tick的调用次数。
+    修改状态的方法会通过配套的事件源推送对应事件。
+    """
+
+    def __init__(self):
+        self.processes = {}  # {pid: name}
+        self.exe_paths = {}  # {pid: 可执行文件路径}
+        self.parents = {}  # {pid: 父进程 pid}
+        self.create_times = {}  # {pid: 创建时间}
+        self._clock = 0.0
+        self.sessions = []
+        self.windows = {}  # {hwnd: FakeWindow}
+        self.foreground_hwnd = None
+        self.calls = Counter()
+        self.event_source = None
+        self.hotkey_source = None
+        self.endpoint_source = FakeEndpointSource(lambda: self.sessions)
+        self.endpoints = AudioEndpoints(self.endpoint_source)
+        self._next_hwnd = 0x10000
+        self._next_session = 0
+
+    @classmethod
+    def generate(cls, processes=10, sessions_per_process=1, windows_per_process=1,
+                 minimized_ratio=0.0, seed=0):
+        """按规模生成一个确定性的桌面环境"""
+        rng = random.Random(seed)
+        backend = cls()
+        for i in range(processes):
+            pid = 1000 + i * 4
+            backend.add_process(pid, f"app{i}.exe", sessions=sessions_per_process,
+                                windows=windows_per_process)
+            for hwnd in backend.windows_of(pid):
+                backend.windows[hwnd].iconic = rng.random() < minimized_ratio
+        return backend
+
+    # ---- 模拟桌面变化 ----
+
+    def add_process(self, pid, name, sessions=1, windows=1, exe=None, parent=0, device=None):
+        self.processes[pid] = name
+        self.parents[pid] = parent
+        self._clock += 1.0
+        self.create_times[pid] = self._clock
+        self.exe_paths[pid] = exe or f"C:\\Program Files\\{name.rsplit('.', 1)[0]}\\{name}"
+        for _ in range(windows):
+            hwnd = self._next_hwnd
+            self._next_hwnd += 4
+            self.windows[hwnd] = FakeWindow(hwnd, pid)
+        for _ in range(sessions):
+            self.sessions.append(FakeSession(f"session-{self._next_session}", pid, name,
+                                             device or self.endpoint_source.default))
+            self._next_session += 1
+        if sessions:
+            self._push(SESSION_CREATED, pid)
+
+    def remove_process(self, pid):
+        self.processes.pop(pid, None)
+        self.exe_paths.pop(pid, None)
+        self.parents.pop(pid, None)
+        self.create_times.pop(pid, None)
+        before = len(self.sessions)
+        self.sessions = [s for s in self.sessions if s.pid != pid]
+        for hwnd in self.windows_of(pid):
+            del self.windows[hwnd]
+        if self.foreground_hwnd not in self.windows:
+            self.foreground_hwnd = None
+        if len(self.sessions) != before:
+            self._push(SESSION_DISCONNECTED, pid)
+
+    def set_session_count(self, pid, count):
+        """增减进程的音频会话，使其数量为 count"""
+        current = [s for s in self.sessions if s.pid == pid]
+        if len(current) < count:
+            name = self.processes.get(pid, '')
+            for _ in range(count - len(current)):
+                self.sessions.append(FakeSession(f"session-{self._next_session}", pid, name,
+                                                 self.endpoint_source.default))
+                self._next_session += 1
+            self._push(SESSION_CREATED, pid)
+        elif len(current) > count:
+            removed = {s.key for s in current[count:]}
+            self.sessions = [s for s in self.sessions if s.key not in removed]
+            self._push(SESSION_DISCONNECTED, pid)
+
+    def set_window_count(self, pid, count, iconic=False):
+        """增减进程的可见窗口，使其数量为 count"""
+        hwnds = self.windows_of(pid)
+        for _ in range(count - len(hwnds)):
+            hwnd = self._next_hwnd
+            self._next_hwnd += 4
+            self.windows[hwnd] = FakeWindow(hwnd, pid, iconic=iconic)
+        for hwnd in hwnds[count:]:
+            del self.windows[hwnd]
+        if self.foreground_hwnd not in self.windows:
+            self.foreground_hwnd = None
+
+    def add_device(self, device_id, name=None):
+        """接入一个输出设备"""
+        self.endpoint_source.add_device(device_id, name)
+
+    def remove_device(self, device_id):
+        """移除输出设备，该设备上的会话随之消失"""
+        pids = {s.pid for s in self.sessions if s.device == device_id}
+        self.sessions = [s for s in self.sessions if s.device != device_id]
+        self.endpoint_source.remove_device(device_id)
+        for pid in pids:
+            self._push(SESSION_DISCONNECTED, pid)
+
+    def set_default_device(self, device_id):
+        """切换默认输出设备，之后新建的会话属于该设备"""
+        self.endpoint_source.set_default(device_id)
+
+    def windows_of(self, pid):
+        return [hwnd for hwnd, window in self.windows.items() if window.pid == pid]
+
+    def set_foreground(self, pid):
+        hwnds = self.windows_of(pid)
+        self.foreground_hwnd = hwnds[0] if hwnds else None
+        self._push(FOREGROUND_CHANGED, pid)
+
+    def minimize(self, pid):
+        for hwnd in self.windows_of(pid):
+            self.windows[hwnd].iconic = True
+        if self.foreground_hwnd is not None and self.windows[self.foreground_hwnd].pid == pid:
+            self.foreground_hwnd = None
+        self._push(WINDOW_MINIMIZED, pid)
+
+    def restore(self, pid):
+        for hwnd in self.windows_of(pid):
+            self.windows[hwnd].iconic = False
+        self._push(WINDOW_RESTORED, pid)
+
+    def muted_pids(self):
+        return {s.pid for s in self.sessions if s.muted}
+
+    def _push(self, kind, pid):
+        if self.event_source is not None:
+            self.event_source.push(kind, pid)
+
+    # ---- PlatformBackend ----
+
+    def list_sessions(self):
+        self.calls['list_sessions'] += 1
+        return [(s.pid, self.create_times[s.pid], s) for _, s in self.endpoints.sessions()]
+
+    def set_mute(self, session, mute):
+        self.calls['set_mute'] += 1
+        session.muted = bool(mute)
+
+    def get_mute(self, session):
+        self.calls['get_mute'] += 1
+        return session.muted
+
+    def get_volume(self, session):
+        self.calls['get_volume'] += 1
+        return session.volume
+
+    def set_volume(self, session, level):
+        self.calls['set_volume'] += 1
+        session.volume = float(level)
+
+    def session_key(self, session):
+        return session.key
+
+    def get_foreground_pid(self):
+        self.calls['get_foreground_pid'] += 1
+        window = self.windows.get(self.foreground_hwnd)
+        return window.pid if window else None
+
+    def process_metadata(self, pid):
+        self.calls['process_metadata'] += 1
+        if pid not in self.processes:
+            return None
+        return self.processes[pid], self.exe_paths.get(pid), self.parents.get(pid, 0)
+
+    def process_create_time(self, pid):
+        self.calls['process_create_time'] += 1
+        return self.create_times.get(pid)
+
+    def enum_windows(self):
+        self.calls['enum_windows'] += 1
+        return [(w.hwnd, w.pid, w.iconic) for w in self.windows.values() if w.visible]
+
+    def get_window_state(self, hwnd):
+        self.calls['get_window_state'] += 1
+        window = self.windows.get(hwnd)
+        if window is None or not window.visible:
+            return None
+        return window.iconic
+
+    def create_event_source(self):
+        self.event_source = ScriptedEventSource()
+        return self.event_source
+
+    def create_hotkey_source(self):
+        self.hotkey_source = FakeHotkeySource()
+        return self.hotkey_source
@@ -0,0 +1,68 @@
+from collections import namedtuple
+
+# 进程元数据；create_time 与 pid 一起唯一标识一个进程（Windows 会复用 pid）
+ProcessInfo = namedtuple('ProcessInfo', ['pid', 'create_time', 'name', 'exe', 'ppid'])
+
+
+class ProcessMetadataCache:
+    """以 (pid, 创建时间) 为键的进程元数据缓存
+
+    进程名、可执行文件路径和父进程只在第一次见到该进程时查询一次；
+    同一个 pid 的创建时间变化说明 pid 被复用，旧条目会被替换。
+    进程从会话快照中消失后由 retain() 清除。
+    """
+
+    def __init__(self, backend):
+        self.backend = backend
+        self._infos = {}  # {pid: ProcessInfo}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.pid_reuses = 0
+
+    def get(self, pid, create_time):
+        """返回进程元数据，进程已不存在时返回 None"""
+        info = self._infos.get(pid)
+        if info is not None and info.create_time == create_time:
+            self.hits += 1
+            return info
+
+        self.misses += 1
+        if info is not None:
+            self.pid_reuses += 1
+        try:
+            metadata = self.backend.process_metadata(pid)
+        except Exception:
+            metadata = None
+        if metadata is None:
+            self._infos.pop(pid, None)
+            return None
+        name, exe, ppid = metadata
+        info = self._infos[pid] = ProcessInfo(pid, create_time, name, exe, ppid)
+        return info
+
+    def lookup(self, pid):
+        """按 pid 取当前缓存的元数据（不查询后端）"""
+        return self._infos.get(pid)
+
+    def exe(self, pid):
+        info = self._infos.get(pid)
+        return info.exe if info is not None else None
+
+    def retain(self, live_pids):
+        """只保留仍然存在的进程"""
+        stale = [pid for pid in list(self._infos) if pid not in live_pids]
+        for pid in stale:
+            self._infos.pop(pid, None)
+        self.evictions += len(stale)
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            'entries': len(self._infos),
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'evictions': self.evictions,
+            'pid_reuses': self.pid_reuses,
+        }
@@ -0,0 +1,181 @@
+"""历史进程匹配器
+
+支持的规则写法（match_rules 配置项）：
+
+- ``game.exe``            进程名精确匹配（不区分大小写）
+- ``glob:*Game*.exe``     进程名通配符
+- ``re:^sakura.*\\.exe$``  进程名正则
+- ``path:D:\\Games\\``      可执行文件路径前缀
+
+另外历史记录中带路径的条目按完整路径精确匹配（exe_paths），同名的其他程序不会命中。
+
+精确名和完整路径放在哈希集合里，通配符和不含分组的正则编译成一个组合正则，路径前缀放进
+按目录分段的前缀树。带分组、反向引用或全局标志的正则合并后含义会变，单独编译；无效的规则
+记录日志后跳过。每个进程（pid + 创建时间）的匹配结果会被记住，直到进程消失或规则变化。
+"""
+import fnmatch
+import logging
+import re
+
+GLOB_PREFIX = 'glob:'
+REGEX_PREFIX = 're:'
+PATH_PREFIX = 'path:'
+
+_END = object()
+
+
+def _path_key(path):
+    return path.replace('/', '\\').casefold()
+
+
+def _groupable(pattern):
+    """该正则放进 (?:...) 后是否仍能编译"""
+    try:
+        re.compile(f'(?:{pattern})')
+    except re.error:
+        return False
+    return True
+
+
+def _path_parts(path):
+    """把路径规范成小写的目录段列表"""
+    return [part for part in re.split(r'[\\/]+', path.casefold()) if part]
+
+
+class PathPrefixTrie:
+    """按目录分段的路径前缀树，查询耗时只与路径深度有关"""
+
+    def __init__(self, prefixes=()):
+        self._root = {}
+        self.size = 0
+        for prefix in prefixes:
+            self.add(prefix)
+
+    def add(self, prefix):
+        node = self._root
+        for part in _path_parts(prefix):
+            node = node.setdefault(part, {})
+        if _END not in node:
+            node[_END] = True
+            self.size += 1
+
+    def matches(self, path):
+        node = self._root
+        for part in _path_parts(path):
+            node = node.get(part)
+            if node is None:
+                return False
+            if _END in node:
+                return True
+        return False
+
+    def __bool__(self):
+        return self.size > 0
+
+
+class ProcessMatcher:
+    """编译后的进程匹配规则"""
+
+    def __init__(self, names=(), rules=(), exe_paths=()):
+        self._exact = set()
+        self._exe_paths = {_path_key(path) for path in exe_paths if path}
+        patterns = []   # 可以合并的模式
+        separate = []   # 单独编译的正则
+        prefixes = []
+        for name in names:
+            self._exact.add(name.casefold())
+        for rule in rules:
+            if rule.startswith(GLOB_PREFIX):
+                patterns.append(fnmatch.translate(rule[len(GLOB_PREFIX):]))
+            elif rule.startswith(REGEX_PREFIX):
+                pattern = rule[len(REGEX_PREFIX):]
+                try:
+                    compiled = re.compile(pattern, re.IGNORECASE)
+                except re.error as e:
+                    logging.info(f"匹配规则 {rule} 无效，已忽略: {e}")
+                    continue
+                # 分组合并后会重新编号或重名，全局标志放进 (?:...) 后无法编译
+                if compiled.groups or not _groupable(pattern):
+                    separate.append(compiled)
+                else:
+                    patterns.append(pattern)
+            elif rule.startswith(PATH_PREFIX):
+                prefixes.append(rule[len(PATH_PREFIX):])
+            elif rule:
+                self._exact.add(rule.casefold())
+
+        # 名称模式尽量合并成一个正则，只编译一次；合并失败（例如含 (?i) 等全局标志）时逐个编译
+        self._pattern = None
+        if patterns:
+            try:
+                self._pattern = re.compile('|'.join(f'(?:{p})' for p in patterns), re.IGNORECASE)
+            except re.error:
+                separate.extend(re.compile(p, re.IGNORECASE) for p in patterns)
+        self._patterns = separate
+        self._prefixes = PathPrefixTrie(prefixes)
+        self._memo = {}  # {(pid, 创建时间, name): 是否匹配}
+
+    @property
+    def empty(self):
+        return (not self._exact and not self._exe_paths and self._pattern is None and not self._patterns
+                and not self._prefixes)
+
+    @property
+    def needs_exe(self):
+        """是否有需要可执行文件路径的规则"""
+        return bool(self._prefixes or self._exe_paths)
+
+    def add_name(self, name):
+        """增量加入一个精确名，之前未匹配的记忆结果作废"""
+        key = name.casefold()
+        if key in self._exact:
+            return
+        self._exact.add(key)
+        self._memo = {k: v for k, v in self._memo.items() if v}
+
+    def add_exe(self, path):
+        """增量加入一个完整路径"""
+        key = _path_key(path)
+        if key in self._exe_paths:
+            return
+        self._exe_paths.add(key)
+        self._memo = {k: v for k, v in self._memo.items() if v}
+
+    def matches(self, name, exe_path=None):
+        """不使用缓存，直接判断进程名/路径是否匹配"""
+        if name and name.casefold() in self._exact:
+            return True
+        if self._pattern is not None and name and self._pattern.fullmatch(name):
+            return True
+        if name and any(pattern.fullmatch(name) for pattern in self._patterns):
+            return True
+        if exe_path:
+            if self._exe_paths and _path_key(exe_path) in self._exe_paths:
+                return True
+            if self._prefixes and self._prefixes.matches(exe_path):
+                return True
+        return False
+
+    def match(self, pid, name, resolve_exe=None, create_time=None):
+        """带缓存的匹配，每个进程的路径最多解析一次
+
+        resolve_exe(pid) 只在需要路径规则且名称未命中时调用；create_time 用于区分复用同一 pid
+        的不同进程，同名但路径不同的新进程不会沿用旧结果。
+        """
+        key = (pid, create_time, name)
+        result = self._memo.get(key)
+        if result is None:
+            result = self.matches(name)
+            if not result and self.needs_exe and resolve_exe is not None:
+                try:
+                    exe_path = resolve_exe(pid)
+                except Exception:
+                    exe_path = None
+                result = self.matches(None, exe_path)
+            self._memo[key] = result
+        return result
+
+    def prune(self, live_pids):
+        """丢弃已经消失的进程的缓存结果"""
+        if len(self._memo) > len(live_pids):
+            self._memo = {k: v for k, v in self._memo.items() if k[0] in live_pids}
@@ -0,0 +1,269 @@
+"""进程选择窗口
+
+窗口先显示出来，再由后台线程枚举音频会话填充列表，之后每秒刷新一次：
+
+- PickerModel 记录当前的候选进程，按 pid 计算差异，只插入/删除/更新变化的行
+- 输入框按进程名和可执行文件路径过滤
+- 大量行分批插入（每批 INSERT_CHUNK 行），窗口不会卡住
+- 匹配历史记录的行排在最前，按置顶和最近使用时间排序
+- 窗口是 TkUI 缓存的 Toplevel，关闭时只隐藏并停止后台枚举，再次打开时复用
+- 打开耗时（open_first / open_reuse）和填充完成（first_rows）的耗时通过 on_timing 回调报告
+"""
+import queue
+import threading
+import time
+from collections import namedtuple
+
+from tk_ui import Dialog
+
+# 候选进程：matched 表示匹配历史记录/规则，rank 为历史记录的排序键 (是否置顶, 最近使用时间)
+PickerRow = namedtuple('PickerRow', ['pid', 'name', 'exe', 'matched', 'rank'], defaults=((0, 0),))
+
+REFRESH_INTERVAL = 1.0
+POLL_MS = 50
+INSERT_CHUNK = 200
+
+
+class PickerModel:
+    """候选进程列表和过滤条件，不依赖 tkinter"""
+
+    def __init__(self):
+        self.rows = {}  # {pid: PickerRow}
+        self.filter_text = ''
+
+    def update(self, rows):
+        """用新的枚举结果替换列表，返回 (新增 pid, 消失 pid, 变化 pid)"""
+        new_rows = {row.pid: row for row in rows}
+        old_rows = self.rows
+        added = new_rows.keys() - old_rows.keys()
+        removed = old_rows.keys() - new_rows.keys()
+        changed = {pid for pid in new_rows.keys() & old_rows.keys() if new_rows[pid] != old_rows[pid]}
+        self.rows = new_rows
+        return added, removed, changed
+
+    def set_filter(self, text):
+        self.filter_text = text.strip().casefold()
+
+    def visible(self, row):
+        text = self.filter_text
+        if not text:
+            return True
+        return text in (row.name or '').casefold() or text in (row.exe or '').casefold()
+
+    def visible_pids(self):
+        return {pid for pid, row in self.rows.items() if self.visible(row)}
+
+
+class ProcessPicker(Dialog):
+    """进程选择对话框，由 TkUI 缓存，关闭后再次打开时复用
+
+    load_rows() 在后台线程中调用，返回 PickerRow 列表；on_select(pid, name) 在用户确认时调用，
+    不能阻塞界面线程；on_close() 在窗口隐藏时调用。
+    """
+
+    name = 'picker'
+    title = "选择要监控的程序"
+    geometry = '460x480'
+
+    def __init__(self, master, load_rows, on_select, on_timing=None, on_close=None):
+        self.load_rows = load_rows
+        self.on_select = on_select
+        self.on_close = on_close
+        self.model = PickerModel()
+        self.selected = None
+        self._results = queue.SimpleQueue()
+        self._closed = threading.Event()
+        self._closed.set()
+        self._shown = set()    # 已经插入到列表中的 pid
+        self._shown_matched = set()  # 其中匹配历史记录的 pid，插在列表最前面
+        self._pending = []     # 等待分批插入的 pid
+        self._opened_at = time.perf_counter()
+        self._loaded = False
+        self._filled = False
+        super().__init__(master, on_timing)
+
+    def build(self):
+        tk = self.tk
+        from tkinter import ttk
+        root = self.window
+        root.attributes('-topmost', True)  # 窗口置顶
+
+        main_frame = ttk.Frame(root)
+        main_frame.pack(expand=True, fill=tk.BOTH, padx=10, pady=10)
+
+        ttk.Label(main_frame, text="请选择要监控的游戏进程：（绿色背景为历史记录）").pack(anchor='w')
+
+        # 过滤输入框
+        self.filter_var = tk.StringVar()
+        self.filter_var.trace_add('write', lambda *args: self._apply_filter())
+        filter_entry = self.filter_entry = ttk.Entry(main_frame, textvariable=self.filter_var)
+        filter_entry.pack(fill=tk.X, pady=(5, 0))
+
+        tree_frame = ttk.Frame(main_frame)
+        tree_frame.pack(expand=True, fill=tk.BOTH, pady=(5, 0))
+
+        tree = self.tree = ttk.Treeview(tree_frame, columns=('PID', 'Name'), show='headings', height=15)
+        tree.heading('PID', text='进程ID')
+        tree.heading('Name', text='进程名称')
+        tree.column('PID', width=100)
+        tree.column('Name', width=320)
+        # 设置历史进程的特殊样式
+        tree.tag_configure('history', background='#E8F5E9')  # 浅绿色背景
+
+        scrollbar = ttk.Scrollbar(tree_frame, orient=tk.VERTICAL, command=tree.yview)
+        tree.configure(yscrollcommand=scrollbar.set)
+        tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+
+        self.status_var = tk.StringVar(value="正在枚举音频会话…")
+        ttk.Label(main_frame, textvariable=self.status_var).pack(anchor='w', pady=(5, 0))
+
+        ttk.Button(main_frame, text="确定", command=self._confirm, width=20).pack(pady=10)
+        root.minsize(400, 450)
+
+        # 双击选择功能
+        tree.bind('<Double-1>', lambda e: self._confirm())
+        filter_entry.bind('<Return>', lambda e: self._confirm())
+
+    def show(self):
+        """每次打开时清空过滤条件，重新启动后台枚举；已有的行保留，按差异更新"""
+        if not self._closed.is_set():
+            return
+        self.selected = None
+        self._opened_at = time.perf_counter()
+        self._loaded = False
+        self._filled = False
+        self.filter_var.set('')
+        self.filter_entry.focus_set()
+        # 每次打开使用新的 Event，上一次的后台线程即使还没退出也不会继续工作
+        closed = self._closed = threading.Event()
+        threading.Thread(target=self._load_loop, args=(closed,), name='picker-loader', daemon=True).start()
+        self.window.after(POLL_MS, self._poll, closed)
+
+    def on_hide(self):
+        self._closed.set()
+        if self.on_close is not None:
+            self.on_close()
+
+    def _timing(self, name):
+        self.timing(name, (time.perf_counter() - self._opened_at) * 1000)
+
+    def _load_loop(self, closed):
+        """后台线程：定期枚举候选进程，结果交给界面线程"""
+        while not closed.is_set():
+            try:
+                rows = self.load_rows()
+            except Exception as e:
+                rows = e
+            if closed.is_set():
+                return
+            self._results.put(rows)
+            if closed.wait(REFRESH_INTERVAL):
+                return
+
+    def _poll(self, closed):
+        if closed.is_set():
+            return
+        rows = None
+        # 只使用最新的一次结果
+        while True:
+            try:
+                rows = self._results.get_nowait()
+            except queue.Empty:
+                break
+        if isinstance(rows, Exception):
+            self.status_var.set(f"枚举音频会话失败: {rows}")
+        elif rows is not None:
+            self._apply_rows(rows)
+        self._insert_pending()
+        self.window.after(POLL_MS, self._poll, closed)
+
+    def _apply_rows(self, rows):
+        added, removed, changed = self.model.update(rows)
+        tree = self.tree
+        for pid in removed:
+            if pid in self._shown:
+                self._delete_row(pid)
+        requeue = set()
+        for pid in changed:
+            row = self.model.rows[pid]
+            visible = self.model.visible(row)
+            if pid in self._shown:
+                if visible and row.matched == (pid in self._shown_matched):
+                    tree.item(str(pid), values=(pid, row.name), tags=self._tags(row))
+                    continue
+                # 不再可见，或匹配状态变了需要移到另一块
+                self._delete_row(pid)
+            if visible:
+                requeue.add(pid)
+        self._queue_rows(added | requeue)
+        self._loaded = True
+        self.status_var.set(f"共 {len(self.model.rows)} 个音频会话进程")
+
+    def _apply_filter(self):
+        self.model.set_filter(self.filter_var.get())
+        visible = self.model.visible_pids()
+        for pid in self._shown - visible:
+            self._delete_row(pid)
+        self._pending = []
+        self._queue_rows(visible - self._shown)
+        self._insert_pending()
+
+    def _queue_rows(self, pids):
+        rows = self.model.rows
+        pids = [pid for pid in pids if self.model.visible(rows[pid])]
+        # 匹配历史记录的排在前面，其中置顶的和最近使用的更靠前
+        pids.sort(key=lambda pid: (not rows[pid].matched, -rows[pid].rank[0], -rows[pid].rank[1],
+                                   (rows[pid].name or '').casefold()))
+        self._pending.extend(pids)
+
+    def _insert_pending(self):
+        """每次最多插入 INSERT_CHUNK 行，剩下的留给下一次轮询"""
+        if not self._pending:
+            if self._loaded and not self._filled:
+                self._filled = True
+                self._timing('first_rows')
+            return
+        chunk, self._pending = self._pending[:INSERT_CHUNK], self._pending[INSERT_CHUNK:]
+        tree = self.tree
+        rows = self.model.rows
+        for pid in chunk:
+            row = rows.get(pid)
+            # 排队之后可能已消失、已插入或因名称变化不再符合过滤条件
+            if row is None or pid in self._shown or not self.model.visible(row):
+                continue
+            index = len(self._shown_matched) if row.matched else self.tk.END
+            tree.insert('', index, iid=str(pid), values=(pid, row.name), tags=self._tags(row))
+            self._shown.add(pid)
+            if row.matched:
+                self._shown_matched.add(pid)
+            # 选中第一个匹配的历史进程
+            if row.matched and not tree.selection():
+                tree.selection_set(str(pid))
+                tree.see(str(pid))
+
+    def _delete_row(self, pid):
+        self._shown.discard(pid)
+        self._shown_matched.discard(pid)
+        self.tree.delete(str(pid))
+
+    @staticmethod
+    def _tags(row):
+        return ('history',) if row.matched else ()
+
+    def _confirm(self):
+        selection = self.tree.selection()
+        if not selection and len(self._shown) == 1:
+            # 过滤后只剩一个进程时直接确认
+            selection = tuple(str(pid) for pid in self._shown)
+        if not selection:
+            from tkinter import messagebox
+            messagebox.showwarning("提示", "请先选择一个进程", parent=self.window)
+            return
+        pid = int(selection[0])
+        row = self.model.rows.get(pid)
+        if row is None:
+            return
+        self.selected = (pid, row.name)
+        self.on_select(pid, row.name)
+        self.hide()
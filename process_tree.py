@@ -0,0 +1,210 @@
+"""进程树索引
+
+很多游戏的窗口和音频不在同一个进程里：启动器拉起引擎、引擎再拉起单独播放 BGM 的
+辅助程序。这里把有窗口或音频会话的进程按父进程链归到同一个"根进程"下，
+同组的窗口和会话一起参与最小化/前台判断。
+
+- 父进程链最多向上追溯 MAX_DEPTH 层，遇到资源管理器、终端、Steam/Playnite 等公共父进程时停止，
+  避免把同一个启动器打开的所有程序归成一组
+- 既没有窗口也没有音频会话的父进程（命令行、未知的启动器）只在和子进程安装在同一目录时
+  才算作游戏自己的启动器而跨过它归组，否则在它下面停止
+- 会话进程的元数据来自会话快照，只有窗口的进程才向后端查询一次
+- 根进程和组成员都用字典保存，按组查询是一次字典查找
+"""
+import ntpath
+
+MAX_DEPTH = 3
+
+# 公共父进程：不会作为游戏进程组的根
+SHELL_PROCESSES = frozenset((
+    'system', 'smss.exe', 'csrss.exe', 'wininit.exe', 'winlogon.exe', 'services.exe',
+    'svchost.exe', 'explorer.exe', 'sihost.exe', 'taskhostw.exe', 'runtimebroker.exe',
+    'dllhost.exe', 'steam.exe', 'steamwebhelper.exe',
+    # 终端
+    'cmd.exe', 'powershell.exe', 'pwsh.exe', 'windowsterminal.exe', 'openconsole.exe', 'conhost.exe',
+    # 游戏启动器/前端
+    'playnite.desktopapp.exe', 'playnite.fullscreenapp.exe', 'launchbox.exe', 'bigbox.exe',
+    'epicgameslauncher.exe', 'galaxyclient.exe', 'upc.exe', 'eadesktop.exe', 'origin.exe',
+    'battle.net.exe', 'dmmgameplayer.exe',
+))
+
+
+class ProcessTree:
+    """pid -> 根进程的索引，按根进程分组"""
+
+    def __init__(self, backend, shell_processes=SHELL_PROCESSES):
+        self.backend = backend
+        self.shell_processes = frozenset(name.casefold() for name in shell_processes)
+        self._parents = {}       # {pid: 父进程 pid}
+        self._create_times = {}  # {pid: 创建时间}，只有会话进程有
+        self._shells = set()     # 公共父进程
+        self._active = set()     # 有窗口或会话的进程，其余只是父进程链上的祖先
+        self._dirs = {}          # {pid: 可执行文件所在目录}，用于判断是否为游戏自己的启动器
+        self._roots = {}         # {pid: 根进程 pid}
+        self._members = {}       # {根进程 pid: {pid, ...}}
+        self._minimized = {}     # 本轮tick各组的最小化状态
+        self.metadata_lookups = 0
+
+    def update(self, snapshot):
+        """用会话快照增量更新，不查询后端"""
+        self._minimized = {}
+        regroup = False
+        for entry in snapshot:
+            info = entry.info
+            known = self._create_times.get(entry.pid)
+            if entry.pid in self._parents and known == info.create_time:
+                continue
+            if entry.pid in self._parents:
+                # pid 被复用，或之前只作为窗口进程/祖先进程见过
+                regroup = regroup or entry.pid not in self._active
+                self._remove(entry.pid)
+            self._add(entry.pid, info.name, info.ppid, info.exe)
+            self._create_times[entry.pid] = info.create_time
+            self._active.add(entry.pid)
+            self._resolve(entry.pid)
+        if regroup:
+            self._regroup()
+
+    def add_pids(self, pids):
+        """加入只有窗口（没有会话）的进程"""
+        regroup = False
+        for pid in pids:
+            if not pid or pid in self._active:
+                continue
+            known = pid in self._parents
+            if self._ensure(pid) is None:
+                continue
+            self._active.add(pid)
+            if known:
+                # 之前只作为祖先进程见过，子进程能否跨过它归组的判断变了
+                regroup = True
+            else:
+                self._resolve(pid)
+        if regroup:
+            self._regroup()
+
+    def retain(self, live_pids):
+        """只保留仍然存在的进程及其父进程链"""
+        keep = set()
+        parents = self._parents
+        for pid in live_pids:
+            depth = 0
+            while pid in parents and pid not in keep and depth <= MAX_DEPTH:
+                keep.add(pid)
+                pid = parents[pid]
+                depth += 1
+        for pid in [pid for pid in parents if pid not in keep]:
+            self._remove(pid)
+
+    def root(self, pid):
+        return self._roots.get(pid, pid)
+
+    def same_group(self, a, b):
+        return a == b or self.root(a) == self.root(b)
+
+    def group(self, pid):
+        """返回与 pid 同组的所有进程"""
+        return self._members.get(self.root(pid)) or {pid}
+
+    def expand(self, pids):
+        """把 pid 集合扩展为所在组的全部进程"""
+        expanded = set()
+        for pid in pids:
+            expanded |= self.group(pid)
+        return expanded
+
+    def group_minimized(self, pid, window_index):
+        """同组所有可见窗口都最小化时返回 True，结果在本轮tick内缓存"""
+        root = self.root(pid)
+        result = self._minimized.get(root)
+        if result is None:
+            result = self._minimized[root] = window_index.all_minimized(self.group(pid))
+        return result
+
+    def stats(self):
+        return {
+            'processes': len(self._parents),
+            'groups': len(self._members),
+            'metadata_lookups': self.metadata_lookups,
+        }
+
+    def _add(self, pid, name, ppid, exe=None):
+        self._parents[pid] = ppid
+        if exe:
+            self._dirs[pid] = ntpath.dirname(exe).casefold()
+        if name and name.casefold() in self.shell_processes:
+            self._shells.add(pid)
+
+    def _ensure(self, pid):
+        """确保知道该进程的父进程，进程不存在时返回 None"""
+        if pid in self._parents:
+            return self._parents[pid]
+        self.metadata_lookups += 1
+        try:
+            metadata = self.backend.process_metadata(pid)
+        except Exception:
+            metadata = None
+        if metadata is None:
+            return None
+        name, exe, ppid = metadata
+        self._add(pid, name, ppid, exe)
+        return ppid
+
+    def _crosses(self, pid, ppid):
+        """子进程 pid 能否跨过父进程 ppid 归到更上层的组"""
+        if ppid in self._shells:
+            return False
+        if ppid in self._active:
+            return True
+        # 没有窗口也没有会话的父进程，只有和子进程装在同一目录（或其上下级目录）时才是游戏自己的启动器
+        parent_dir = self._dirs.get(ppid)
+        child_dir = self._dirs.get(pid)
+        if not parent_dir or not child_dir:
+            return False
+        if len(parent_dir) > len(child_dir):
+            parent_dir, child_dir = child_dir, parent_dir
+        return child_dir == parent_dir or child_dir.startswith(parent_dir.rstrip('\\') + '\\')
+
+    def _regroup(self):
+        """重新计算所有进程的根进程"""
+        self._roots = {}
+        self._members = {}
+        self._minimized = {}
+        for pid in self._active:
+            self._resolve(pid)
+
+    def _resolve(self, pid, depth=0):
+        root = self._roots.get(pid)
+        if root is not None:
+            return root
+        root = pid
+        if pid not in self._shells and depth < MAX_DEPTH:
+            ppid = self._parents.get(pid)
+            if ppid and ppid != pid and self._ensure(ppid) is not None and self._crosses(pid, ppid):
+                root = self._resolve(ppid, depth + 1)
+        self._roots[pid] = root
+        self._members.setdefault(root, set()).add(pid)
+        return root
+
+    def _remove(self, pid):
+        self._parents.pop(pid, None)
+        self._create_times.pop(pid, None)
+        self._shells.discard(pid)
+        self._active.discard(pid)
+        self._dirs.pop(pid, None)
+        root = self._roots.pop(pid, None)
+        if root is None:
+            return
+        members = self._members.get(root)
+        if members is None:
+            return
+        members.discard(pid)
+        if not members:
+            del self._members[root]
+        elif root == pid:
+            # 根进程消失，剩余成员重新归组
+            del self._members[root]
+            for member in members:
+                self._roots.pop(member, None)
+            for member in members:
+                self._resolve(member)
@@ -0,0 +1,117 @@
+"""按游戏配置的静音策略
+
+配置文件的 profiles 项以可执行文件名为键，为每个游戏单独设置静音策略：
+
+    "profiles": {
+        "game.exe": {"mode": "background", "fade_duration": 0.5, "background_volume": 0.2,
+                     "grace": 1.0, "hysteresis": 0.2}
+    }
+
+- ``mode``               minimize（所有窗口最小化时静音）或 background（不在前台时静音），
+                         省略时跟随全局的 minimize_only
+- ``fade_duration``      渐变时长（秒），省略时使用全局 fade_duration
+- ``background_volume``  后台时的音量，为原音量的比例；0 表示静音
+- ``grace``              满足静音条件后再等待多少秒才静音，期间回到前台则不静音，
+                         省略时使用全局 mute_grace
+- ``hysteresis``         静音条件消失后再等待多少秒才恢复，省略时使用全局 unmute_hysteresis
+
+加载时编译成以小写进程名为键的扁平字典，没有配置的进程使用由全局设置生成的默认策略。
+加入监控目标时查表一次并按 pid 保存，tick中不再解析配置。
+"""
+import logging
+
+MODE_MINIMIZE = 'minimize'
+MODE_BACKGROUND = 'background'
+MODES = (MODE_MINIMIZE, MODE_BACKGROUND)
+
+
+class Profile:
+    """编译后的单个策略，fade_duration 为 None 时使用渐变引擎的全局时长"""
+
+    __slots__ = ('name', 'minimize', 'fade_duration', 'background_volume', 'grace', 'hysteresis')
+
+    def __init__(self, name, minimize, fade_duration=None, background_volume=0.0, grace=0.0,
+                 hysteresis=0.0):
+        self.name = name
+        self.minimize = minimize
+        self.fade_duration = fade_duration
+        self.background_volume = background_volume
+        self.grace = grace
+        self.hysteresis = hysteresis
+
+    @property
+    def mode(self):
+        return MODE_MINIMIZE if self.minimize else MODE_BACKGROUND
+
+    def __repr__(self):
+        return (f'Profile({self.name!r}, mode={self.mode}, fade_duration={self.fade_duration}, '
+                f'background_volume={self.background_volume}, grace={self.grace}, '
+                f'hysteresis={self.hysteresis})')
+
+
+def _number(spec, key, default, low, high=None):
+    value = spec.get(key)
+    if value is None:
+        return default
+    value = float(value)
+    if value < low:
+        value = low
+    if high is not None and value > high:
+        value = high
+    return value
+
+
+def compile_profile(name, spec, default):
+    """把一条配置编译成 Profile，未给出的项取 default 的值"""
+    mode = spec.get('mode')
+    if mode is None:
+        minimize = default.minimize
+    elif mode in MODES:
+        minimize = mode == MODE_MINIMIZE
+    else:
+        raise ValueError(f"未知的静音模式 {mode}")
+    return Profile(
+        name,
+        minimize,
+        _number(spec, 'fade_duration', default.fade_duration, 0.0),
+        _number(spec, 'background_volume', default.background_volume, 0.0, 1.0),
+        _number(spec, 'grace', default.grace, 0.0),
+        _number(spec, 'hysteresis', default.hysteresis, 0.0),
+    )
+
+
+class ProfileTable:
+    """进程名 -> Profile 的查找表"""
+
+    def __init__(self, specs=None, minimize_only=True, grace=0.0, hysteresis=0.0):
+        self.specs = dict(specs or {})
+        self.lookups = 0
+        self.compile(minimize_only, grace, hysteresis)
+
+    def compile(self, minimize_only, grace=0.0, hysteresis=0.0):
+        """重新编译所有策略（全局设置变化时调用）"""
+        default = self.default = Profile('', minimize_only, grace=max(0.0, float(grace)),
+                                         hysteresis=max(0.0, float(hysteresis)))
+        table = {}
+        for name, spec in self.specs.items():
+            if not isinstance(spec, dict):
+                logging.info(f"策略 {name} 格式错误，已忽略")
+                continue
+            try:
+                table[name.casefold()] = compile_profile(name, spec, default)
+            except (TypeError, ValueError) as e:
+                logging.info(f"策略 {name} 无效，已忽略: {e}")
+        self._table = table
+
+    def lookup(self, name):
+        """按进程名取策略，没有配置时返回默认策略"""
+        self.lookups += 1
+        if not name:
+            return self.default
+        return self._table.get(name.casefold(), self.default)
+
+    def __len__(self):
+        return len(self._table)
+
+    def stats(self):
+        return {'profiles': len(self._table), 'lookups': self.lookups}
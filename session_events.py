@@ -0,0 +1,347 @@
+import asyncio
+import logging
+import queue
+import threading
+import time
+from collections import namedtuple
+
+# 事件类型
+SESSION_CREATED = 'session_created'
+SESSION_DISCONNECTED = 'session_disconnected'
+FOREGROUND_CHANGED = 'foreground_changed'
+WINDOW_MINIMIZED = 'window_minimized'
+WINDOW_RESTORED = 'window_restored'
+DEVICE_CHANGED = 'device_changed'  # 音频输出设备接入/移除/默认设备变化
+
+# 事件源可用时，轮询只作为兜底，间隔可以放宽
+EVENT_FALLBACK_INTERVAL = 5.0
+# 没有事件源时沿用原来的 1 秒轮询
+POLL_INTERVAL = 1.0
+
+# timestamp 使用 time.perf_counter()，用于计算事件到 SetMute 的延迟
+SessionEvent = namedtuple('SessionEvent', ['kind', 'pid', 'timestamp'])
+
+
+class EventSource:
+    """事件源基类：start 时传入 emit(kind, pid) 回调，事件由源自己的线程推送"""
+
+    def start(self, emit):
+        raise NotImplementedError
+
+    def stop(self):
+        pass
+
+
+class ScriptedEventSource(EventSource):
+    """按脚本推送事件的伪事件源，用于在非 Windows 环境下测试
+
+    script 为 (延迟秒数, 事件类型, pid) 的序列，延迟相对上一条事件。
+    """
+
+    def __init__(self, script=()):
+        self.script = list(script)
+        self._emit = None
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def start(self, emit):
+        self._emit = emit
+        self._stop_event.clear()
+        if self.script:
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join(timeout=1)
+            self._thread = None
+
+    def push(self, kind, pid=None):
+        """立即推送一条事件"""
+        if self._emit:
+            self._emit(kind, pid)
+
+    def _run(self):
+        for delay, kind, pid in self.script:
+            if self._stop_event.wait(delay):
+                return
+            self._emit(kind, pid)
+
+
+class WindowsEventSource(EventSource):
+    """Windows 事件源：音频会话创建/断开通知 + 前台切换、最小化/还原的 WinEvent 钩子"""
+
+    EVENT_SYSTEM_FOREGROUND = 0x0003
+    EVENT_SYSTEM_MINIMIZESTART = 0x0016
+    EVENT_SYSTEM_MINIMIZEEND = 0x0017
+    WINEVENT_OUTOFCONTEXT = 0x0000
+    OBJID_WINDOW = 0
+    WM_QUIT = 0x0012
+
+    def __init__(self):
+        self._emit = None
+        self._thread = None
+        self._thread_id = None
+        self._ready = threading.Event()
+        self._error = None
+
+    def start(self, emit):
+        self._emit = emit
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        self._ready.wait(timeout=5)
+        if self._error:
+            raise self._error
+
+    def stop(self):
+        if self._thread_id:
+            import ctypes
+            ctypes.windll.user32.PostThreadMessageW(self._thread_id, self.WM_QUIT, 0, 0)
+        if self._thread:
+            self._thread.join(timeout=2)
+            self._thread = None
+
+    def _run(self):
+        import ctypes
+        from ctypes import wintypes
+        import comtypes
+
+        user32 = ctypes.windll.user32
+        hooks = []
+        managers = []
+        session_callback = None
+        try:
+            comtypes.CoInitialize()
+            self._thread_id = ctypes.windll.kernel32.GetCurrentThreadId()
+
+            WinEventProc = ctypes.WINFUNCTYPE(
+                None, wintypes.HANDLE, wintypes.DWORD, wintypes.HWND,
+                wintypes.LONG, wintypes.LONG, wintypes.DWORD, wintypes.DWORD
+            )
+            kinds = {
+                self.EVENT_SYSTEM_FOREGROUND: FOREGROUND_CHANGED,
+                self.EVENT_SYSTEM_MINIMIZESTART: WINDOW_MINIMIZED,
+                self.EVENT_SYSTEM_MINIMIZEEND: WINDOW_RESTORED,
+            }
+
+            def on_win_event(hook, event, hwnd, id_object, id_child, thread_id, event_time):
+                if id_object != self.OBJID_WINDOW or not hwnd:
+                    return
+                pid = wintypes.DWORD()
+                user32.GetWindowThreadProcessId(hwnd, ctypes.byref(pid))
+                self._emit(kinds.get(event, FOREGROUND_CHANGED), pid.value)
+
+            # 回调对象必须保持引用，否则会被回收
+            self._win_event_proc = WinEventProc(on_win_event)
+            hooks.append(user32.SetWinEventHook(
+                self.EVENT_SYSTEM_FOREGROUND, self.EVENT_SYSTEM_FOREGROUND, 0,
+                self._win_event_proc, 0, 0, self.WINEVENT_OUTOFCONTEXT))
+            hooks.append(user32.SetWinEventHook(
+                self.EVENT_SYSTEM_MINIMIZESTART, self.EVENT_SYSTEM_MINIMIZEEND, 0,
+                self._win_event_proc, 0, 0, self.WINEVENT_OUTOFCONTEXT))
+
+            managers, session_callback = self._register_session_notifications()
+        except Exception as e:
+            self._error = e
+            self._ready.set()
+            return
+
+        self._ready.set()
+
+        msg = wintypes.MSG()
+        while user32.GetMessageW(ctypes.byref(msg), 0, 0, 0) > 0:
+            user32.TranslateMessage(ctypes.byref(msg))
+            user32.DispatchMessageW(ctypes.byref(msg))
+
+        for hook in hooks:
+            user32.UnhookWinEvent(hook)
+        for manager in managers:
+            try:
+                manager.UnregisterSessionNotification(session_callback)
+            except Exception:
+                pass
+        comtypes.CoUninitialize()
+
+    def _register_session_notifications(self):
+        """为每个输出设备注册会话创建通知，并为已有会话注册断开通知
+
+        之后接入的设备不在这里注册，设备通知会触发一轮tick，由枚举发现其上的会话。
+        """
+        from pycaw.pycaw import IAudioSessionControl2
+        from pycaw.callbacks import AudioSessionNotification, AudioSessionEvents
+        from audio_endpoints import WindowsEndpointSource
+
+        emit = self._emit
+
+        class SessionEvents(AudioSessionEvents):
+            def __init__(self, pid):
+                super().__init__()
+                self.pid = pid
+
+            def on_state_changed(self, new_state, new_state_id):
+                if new_state == 'Expired':
+                    emit(SESSION_DISCONNECTED, self.pid)
+
+            def on_session_disconnected(self, disconnect_reason, disconnect_reason_id):
+                emit(SESSION_DISCONNECTED, self.pid)
+
+        class SessionNotification(AudioSessionNotification):
+            def on_session_created(self, new_session):
+                try:
+                    control = new_session.QueryInterface(IAudioSessionControl2)
+                    pid = control.GetProcessId()
+                    control.RegisterAudioSessionNotification(SessionEvents(pid))
+                except Exception:
+                    pid = None
+                emit(SESSION_CREATED, pid)
+
+        endpoints = WindowsEndpointSource()
+        callback = SessionNotification()
+        managers = []
+        for device_id, name in endpoints.list_devices():
+            try:
+                manager = endpoints.session_manager(device_id)
+                manager.RegisterSessionNotification(callback)
+            except Exception as e:
+                logging.info(f"注册设备 {name} 的会话通知失败: {e}")
+                continue
+            managers.append(manager)
+            # 必须枚举一次会话，系统才会开始推送创建通知
+            try:
+                sessions = endpoints.list_sessions(manager)
+            except Exception:
+                sessions = []
+            for session in sessions:
+                if session.ProcessId:
+                    try:
+                        session.register_notification(SessionEvents(session.ProcessId))
+                    except Exception:
+                        pass
+        return managers, callback
+
+
+class LatencyStats:
+    """事件到 SetMute 的延迟统计（毫秒）"""
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.last = 0.0
+
+    def record(self, seconds):
+        ms = seconds * 1000
+        self.count += 1
+        self.total += ms
+        self.last = ms
+        if ms > self.max:
+            self.max = ms
+
+    def summary(self):
+        return {
+            'count': self.count,
+            'avg_ms': self.total / self.count if self.count else 0.0,
+            'max_ms': self.max,
+            'last_ms': self.last,
+        }
+
+
+class EventEngine:
+    """事件驱动引擎：事件源推送到队列，控制器在每轮tick前取出全部事件
+
+    事件源启动失败时自动退回到固定间隔轮询。
+    """
+
+    def __init__(self, source=None):
+        self.source = source
+        self.queue = queue.Queue()
+        self.active = False
+        self.mute_latency = LatencyStats()
+        self._loop = None
+        self._wakeup = None
+
+    @property
+    def poll_interval(self):
+        """当前兜底轮询间隔"""
+        return EVENT_FALLBACK_INTERVAL if self.active else POLL_INTERVAL
+
+    def start(self):
+        if self.source is None:
+            return
+        try:
+            self.source.start(self.emit)
+            self.active = True
+        except Exception as e:
+            self.active = False
+            logging.info(f"事件源启动失败，改用轮询: {e}")
+
+    def stop(self):
+        if self.source is not None and self.active:
+            try:
+                self.source.stop()
+            except Exception as e:
+                logging.info(f"停止事件源失败: {e}")
+        self.active = False
+        # 唤醒正在等待的监控线程
+        self.wake()
+
+    def wake(self):
+        """不带事件地唤醒等待中的监控循环，例如设置变化后立即执行一轮"""
+        self.queue.put(None)
+        self._notify()
+
+    def bind_loop(self, loop):
+        """绑定 asyncio 事件循环，之后可以用 wait_async 等待事件（需在该循环的线程中调用）"""
+        self._loop = loop
+        self._wakeup = asyncio.Event()
+
+    def emit(self, kind, pid=None):
+        """事件源回调，线程安全"""
+        self.queue.put(SessionEvent(kind, pid, time.perf_counter()))
+        self._notify()
+
+    def _notify(self):
+        loop = self._loop
+        if loop is not None:
+            try:
+                loop.call_soon_threadsafe(self._wakeup.set)
+            except RuntimeError:
+                # 事件循环已关闭
+                pass
+
+    async def wait_async(self, timeout=None, jitter=None):
+        """协程版本的 wait：不阻塞事件循环，超时唤醒的延迟计入 jitter"""
+        if timeout is None:
+            timeout = self.poll_interval
+        if self.queue.empty():
+            deadline = self._loop.time() + timeout
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout)
+            except asyncio.TimeoutError:
+                if jitter is not None:
+                    jitter.record(max(0.0, self._loop.time() - deadline))
+        self._wakeup.clear()
+        return self.wait(0)
+
+    def wait(self, timeout=None):
+        """等待事件或超时，然后取出队列中所有事件"""
+        if timeout is None:
+            timeout = self.poll_interval
+        events = []
+        try:
+            event = self.queue.get(timeout=timeout)
+        except queue.Empty:
+            return events
+        while True:
+            if event is not None:
+                events.append(event)
+            try:
+                event = self.queue.get_nowait()
+            except queue.Empty:
+                return events
+
+    def record_mute(self, events):
+        """记录从最早触发事件到 SetMute 的延迟"""
+        if events:
+            self.mute_latency.record(time.perf_counter() - min(e.timestamp for e in events))
@@ -0,0 +1,71 @@
+import time
+from collections import namedtuple
+from types import MappingProxyType
+
+# 单个音频会话条目；info 为 ProcessMetadataCache 中的进程元数据
+SessionEntry = namedtuple('SessionEntry', ['pid', 'name', 'session', 'info'])
+
+
+class SessionSnapshot:
+    """一次枚举得到的只读音频会话快照，按 pid 和进程名建立索引"""
+
+    # 累计枚举次数，用于统计每轮tick实际枚举了几次
+    enumerations = 0
+
+    __slots__ = ('entries', '_by_pid', '_by_name', 'created_at')
+
+    def __init__(self, entries, created_at=0.0):
+        self.entries = tuple(entries)
+        self.created_at = created_at
+        by_pid = {}
+        by_name = {}
+        for entry in self.entries:
+            by_pid.setdefault(entry.pid, []).append(entry)
+            by_name.setdefault(entry.name, []).append(entry)
+        self._by_pid = MappingProxyType({pid: tuple(v) for pid, v in by_pid.items()})
+        self._by_name = MappingProxyType({name: tuple(v) for name, v in by_name.items()})
+
+    @classmethod
+    def capture(cls, backend, process_cache):
+        """通过平台后端枚举当前所有音频会话并生成快照
+
+        进程元数据从 process_cache 读取，已消失的进程随之从缓存中清除。
+        """
+        SessionSnapshot.enumerations += 1
+        entries = []
+        for pid, create_time, session in backend.list_sessions():
+            info = process_cache.get(pid, create_time)
+            if info is None:
+                # 进程可能在枚举过程中退出
+                continue
+            entries.append(SessionEntry(pid, info.name, session, info))
+        snapshot = cls(entries, time.monotonic())
+        process_cache.retain(snapshot.pids)
+        return snapshot
+
+    @property
+    def pids(self):
+        """快照中所有进程的 pid"""
+        return self._by_pid.keys()
+
+    @property
+    def names(self):
+        """快照中所有进程名"""
+        return self._by_name.keys()
+
+    def by_pid(self, pid):
+        """返回指定 pid 的所有会话条目"""
+        return self._by_pid.get(pid, ())
+
+    def by_name(self, name):
+        """返回指定进程名的所有会话条目"""
+        return self._by_name.get(name, ())
+
+    def __contains__(self, pid):
+        return pid in self._by_pid
+
+    def __iter__(self):
+        return iter(self.entries)
+
+    def __len__(self):
+        return len(self.entries)
@@ -1,11 +1,7 @@
+import startup_timing  # 尽早导入，作为启动计时的起点
 import sys
 import os
 import ctypes
-import subprocess
-import win32con
-import win32gui
-import win32process
-import time
 
 def is_admin():
     """检查是否具有管理员权限"""
@@ -0,0 +1,103 @@
+"""启动耗时统计
+
+记录从进程启动到托盘图标可见、再到第一轮监控tick的时间点，以及延迟导入的
+重量级模块（tkinter、PIL、pystray、pycaw 等）各自的导入耗时。
+
+直接运行本文件会用 ``python -X importtime`` 跟踪主模块的导入开销：
+
+    python startup_timing.py
+"""
+import logging
+import sys
+import time
+from contextlib import contextmanager
+
+# 默认冷启动预算：进程启动到托盘可见
+STARTUP_BUDGET_MS = 1500
+
+_t0 = time.perf_counter()
+_marks = {}
+_imports = {}
+_reported = False
+
+
+def mark(name):
+    """记录一个启动时间点（只记录第一次）"""
+    if name not in _marks:
+        _marks[name] = time.perf_counter()
+
+
+@contextmanager
+def timed_import(name):
+    """包住函数内的 import 语句，首次导入时记录耗时
+
+    仍然使用普通 import 语句，PyInstaller 可以正常分析依赖。
+    """
+    if name in sys.modules:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        _imports[name] = (time.perf_counter() - start) * 1000
+
+
+def _process_start():
+    """进程创建时间换算到 perf_counter 时间轴，无法获取时退回本模块导入时间"""
+    try:
+        import psutil
+        age = time.time() - psutil.Process().create_time()
+        return time.perf_counter() - age
+    except Exception:
+        return _t0
+
+
+def report():
+    """返回各时间点相对进程启动的毫秒数和延迟导入耗时"""
+    origin = _process_start()
+    return {
+        'marks_ms': {name: (t - origin) * 1000 for name, t in sorted(_marks.items(), key=lambda x: x[1])},
+        'imports_ms': dict(_imports),
+    }
+
+
+def log_report(budget_ms=STARTUP_BUDGET_MS):
+    """记录一次启动报告，托盘可见超过预算时给出警告"""
+    global _reported
+    if _reported:
+        return
+    _reported = True
+
+    result = report()
+    logging.info(f"启动耗时: {result['marks_ms']}")
+    logging.info(f"延迟导入耗时: {result['imports_ms']}")
+    tray_visible = result['marks_ms'].get('tray_visible')
+    if tray_visible is not None and tray_visible > budget_ms:
+        logging.warning(f"冷启动超出预算: 托盘可见耗时 {tray_visible:.0f} ms > {budget_ms} ms")
+    return result
+
+
+def trace_imports(module='MuteBackgroundGal', top=15):
+    """用 -X importtime 跟踪导入模块的开销，返回累计耗时最高的若干项 [(模块, 微秒)]"""
+    import re
+    import subprocess
+
+    proc = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        capture_output=True, text=True
+    )
+    pattern = re.compile(r'import time:\s+(\d+)\s+\|\s+(\d+)\s+\|\s+(.+)$')
+    entries = []
+    for line in proc.stderr.splitlines():
+        match = pattern.match(line)
+        if match:
+            entries.append((match.group(3).strip(), int(match.group(2))))
+    entries.sort(key=lambda x: x[1], reverse=True)
+    return entries[:top]
+
+
+if __name__ == '__main__':
+    target = sys.argv[1] if len(sys.argv) > 1 else 'MuteBackgroundGal'
+    for name, cumulative in trace_imports(target):
+        print(f"{cumulative / 1000:8.1f} ms  {name}")
@@ -0,0 +1,98 @@
+"""自适应监控间隔
+
+- 没有监控目标或已暂停时退避到最长间隔，减少笔记本上的唤醒次数；这期间前台切换等事件
+  不触发tick，只有新会话和设备变化（需要自动匹配时，暂停时也不算）才立即唤醒
+- 前台切换、会话出现等事件之后的几秒内使用最短间隔，及时跟上连续的切换
+- 其余时间使用事件引擎给出的基础间隔（有事件源时 5 秒，纯轮询时 1 秒）
+"""
+import time
+
+from session_events import (
+    SESSION_CREATED, FOREGROUND_CHANGED, WINDOW_MINIMIZED, WINDOW_RESTORED, DEVICE_CHANGED,
+)
+
+MIN_INTERVAL = 0.25
+MAX_INTERVAL = 10.0
+# 事件之后保持短间隔的时长
+BURST_SECONDS = 3.0
+
+# 触发短间隔的事件类型
+BURST_EVENTS = frozenset((SESSION_CREATED, FOREGROUND_CHANGED, WINDOW_MINIMIZED, WINDOW_RESTORED))
+# 空闲时仍需立即处理的事件（可能出现要自动匹配的新会话）
+IDLE_WAKE_EVENTS = frozenset((SESSION_CREATED, DEVICE_CHANGED))
+
+
+class TickScheduler:
+    """根据当前状态计算下一次唤醒的间隔，并统计唤醒次数和 CPU 时间"""
+
+    def __init__(self, min_interval=MIN_INTERVAL, max_interval=MAX_INTERVAL,
+                 burst_seconds=BURST_SECONDS, clock=time.monotonic):
+        self.clock = clock
+        self.burst_seconds = burst_seconds
+        self.set_bounds(min_interval, max_interval)
+        self._burst_until = 0.0
+        self._started = clock()
+        self._cpu_started = time.process_time()
+        self.wakeups = 0
+        self.coalesced = 0  # 空闲时没有触发tick的事件数
+        self.tick_cpu = 0.0
+        self.interval = None  # 最近一次给出的间隔
+
+    def set_bounds(self, min_interval, max_interval):
+        """设置间隔上下限（秒）"""
+        min_interval = max(0.01, float(min_interval))
+        self.min_interval = min_interval
+        self.max_interval = max(min_interval, float(max_interval))
+
+    def note_events(self, events):
+        """收到前台切换等事件后进入短间隔"""
+        if any(event.kind in BURST_EVENTS for event in events):
+            self.burst()
+
+    def burst(self):
+        self._burst_until = self.clock() + self.burst_seconds
+
+    def next_interval(self, base_interval, idle):
+        """返回下一次唤醒前的等待时间
+
+        idle 表示没有监控目标或已暂停。
+        """
+        if idle:
+            interval = self.max_interval
+        elif self.clock() < self._burst_until:
+            interval = self.min_interval
+        else:
+            interval = min(max(base_interval, self.min_interval), self.max_interval)
+        self.interval = interval
+        return interval
+
+    def wants_tick(self, events, idle, watch_sessions):
+        """收到的事件是否需要立即执行一轮tick
+
+        idle 表示没有监控目标或已暂停，watch_sessions 表示需要自动匹配新会话。
+        """
+        if not idle:
+            return True
+        if watch_sessions and any(event.kind in IDLE_WAKE_EVENTS for event in events):
+            return True
+        self.coalesced += len(events)
+        return False
+
+    def record_tick(self, cpu_seconds):
+        """记录一次唤醒以及本轮tick消耗的 CPU 时间"""
+        self.wakeups += 1
+        self.tick_cpu += cpu_seconds
+
+    def stats(self):
+        minutes = max(self.clock() - self._started, 1e-9) / 60
+        return {
+            'wakeups': self.wakeups,
+            'wakeups_per_minute': self.wakeups / minutes,
+            'coalesced_events': self.coalesced,
+            'avg_tick_cpu_ms': self.tick_cpu * 1000 / self.wakeups if self.wakeups else 0.0,
+            # 整个进程（包括 COM 线程和托盘线程）每分钟的 CPU 时间
+            'process_cpu_ms_per_minute': (time.process_time() - self._cpu_started) * 1000 / minutes,
+            'interval': self.interval,
+            'min_interval': self.min_interval,
+            'max_interval': self.max_interval,
+        }
@@ -0,0 +1,235 @@
+"""界面线程
+
+整个程序只创建一个隐藏的 tk.Tk()，运行在专用的界面线程中；托盘回调通过 TkUI.post
+把操作投递过去。对话框是缓存的 Toplevel，关闭时只隐藏，下次打开直接重新显示。
+
+每个对话框从请求打开到窗口映射完成的耗时通过 on_timing 报告，首次创建记为
+``<名称>_open_first``，复用记为 ``<名称>_open_reuse``。
+"""
+import logging
+import queue
+import threading
+import time
+
+import startup_timing
+
+# 界面线程处理投递消息的虚拟事件
+CALL_EVENT = '<<UiCall>>'
+
+
+class Dialog:
+    """缓存的 Toplevel 对话框基类，子类实现 build() 和 show()"""
+
+    name = 'dialog'
+    title = ''
+    geometry = '400x300'
+
+    def __init__(self, master, on_timing=None):
+        import tkinter as tk
+        self.tk = tk
+        self.on_timing = on_timing  # on_timing(名称, 毫秒)
+        window = self.window = tk.Toplevel(master)
+        window.withdraw()
+        window.title(self.title)
+        window.geometry(self.geometry)
+        window.protocol("WM_DELETE_WINDOW", self.hide)
+        window.bind('<Map>', self._on_map, add='+')
+        self._requested_at = None
+        self._opened = False
+        self._centered = False
+        self.build()
+
+    def build(self):
+        pass
+
+    def show(self, *args):
+        """每次打开前刷新内容"""
+        pass
+
+    def on_hide(self):
+        pass
+
+    def open(self, requested_at, *args):
+        self._requested_at = requested_at
+        self.show(*args)
+        window = self.window
+        if not self._centered:
+            self._centered = True
+            # 窗口居中显示
+            window.update_idletasks()
+            width = window.winfo_width()
+            height = window.winfo_height()
+            x = (window.winfo_screenwidth() // 2) - (width // 2)
+            y = (window.winfo_screenheight() // 2) - (height // 2)
+            window.geometry(f'{width}x{height}+{x}+{y}')
+        window.deiconify()
+        window.lift()
+        window.focus_force()
+
+    def hide(self):
+        self.window.withdraw()
+        self.on_hide()
+
+    def timing(self, name, ms):
+        if self.on_timing is not None:
+            self.on_timing(f'{self.name}_{name}', ms)
+
+    def _on_map(self, event):
+        if event.widget is not self.window or self._requested_at is None:
+            return
+        elapsed = (time.perf_counter() - self._requested_at) * 1000
+        self._requested_at = None
+        self.timing('open_reuse' if self._opened else 'open_first', elapsed)
+        self._opened = True
+
+
+class TkUI:
+    """单一 Tk 根窗口和界面线程，首次使用时启动"""
+
+    def __init__(self):
+        self.root = None
+        self.dialogs = {}
+        self._thread = None
+        self._queue = queue.SimpleQueue()
+        self._ready = threading.Event()
+        self._lock = threading.Lock()
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def in_ui_thread(self):
+        return threading.current_thread() is self._thread
+
+    def start(self):
+        with self._lock:
+            if self.running:
+                return
+            self._ready.clear()
+            self._thread = threading.Thread(target=self._run, name='tk-ui', daemon=True)
+            self._thread.start()
+        self._ready.wait()
+
+    def post(self, fn, *args):
+        """在界面线程中执行 fn(*args)，不等待结果"""
+        self.start()
+        self._queue.put((fn, args))
+        if self.in_ui_thread():
+            self._drain()
+            return
+        try:
+            # 线程版 Tcl 会把事件转交给界面线程
+            self.root.event_generate(CALL_EVENT, when='tail')
+        except Exception as e:
+            logging.info(f"投递界面消息失败: {e}")
+
+    def open(self, name, factory, *args):
+        """打开（必要时创建）缓存的对话框，factory(root) 返回 Dialog"""
+        self.post(self._open, name, factory, time.perf_counter(), args)
+
+    def message(self, kind, title, text):
+        """显示消息框，kind 为 showinfo / showwarning / showerror"""
+        def show():
+            from tkinter import messagebox
+            getattr(messagebox, kind)(title, text, parent=self.root)
+        self.post(show)
+
+    def stop(self):
+        """关闭界面线程；不等待，避免和正在等待其他线程的界面操作互相阻塞"""
+        if self.running:
+            self.post(self.root.quit)
+
+    def _open(self, name, factory, requested_at, args):
+        dialog = self.dialogs.get(name)
+        if dialog is None:
+            dialog = self.dialogs[name] = factory(self.root)
+        dialog.open(requested_at, *args)
+
+    def _run(self):
+        with startup_timing.timed_import('tkinter'):
+            import tkinter as tk
+        root = tk.Tk()
+        root.withdraw()
+        root.bind(CALL_EVENT, lambda event: self._drain())
+        self.root = root
+        self._ready.set()
+        try:
+            root.mainloop()
+        finally:
+            self.dialogs.clear()
+            try:
+                root.destroy()
+            except tk.TclError:
+                pass
+
+    def _drain(self):
+        while True:
+            try:
+                fn, args = self._queue.get_nowait()
+            except queue.Empty:
+                return
+            try:
+                fn(*args)
+            except Exception as e:
+                logging.info(f"界面操作失败: {e}")
+
+
+class ManageDialog(Dialog):
+    """管理当前监控的进程"""
+
+    name = 'manage'
+    title = "管理监控进程"
+    geometry = '400x300'
+
+    def __init__(self, master, on_remove, on_timing=None):
+        self.on_remove = on_remove  # on_remove(pid)
+        self._pids = []
+        super().__init__(master, on_timing)
+
+    def build(self):
+        tk = self.tk
+        from tkinter import ttk
+
+        # 创建主框架
+        main_frame = ttk.Frame(self.window)
+        main_frame.pack(expand=True, fill=tk.BOTH, padx=10, pady=10)
+
+        # 添加标签
+        ttk.Label(main_frame, text="当前监控的进程:").pack(anchor='w')
+
+        # 创建列表框和滚动条
+        list_frame = ttk.Frame(main_frame)
+        list_frame.pack(expand=True, fill=tk.BOTH, pady=(5, 0))
+
+        listbox = self.listbox = tk.Listbox(list_frame)
+        scrollbar = ttk.Scrollbar(list_frame, orient=tk.VERTICAL, command=listbox.yview)
+        listbox.configure(yscrollcommand=scrollbar.set)
+        listbox.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+
+        # 按钮框架
+        button_frame = ttk.Frame(main_frame)
+        button_frame.pack(fill=tk.X, pady=10)
+        ttk.Button(button_frame, text="移除选中进程", command=self._remove_selected).pack(side=tk.LEFT, padx=5)
+        ttk.Button(button_frame, text="关闭", command=self.hide).pack(side=tk.RIGHT, padx=5)
+
+    def show(self, targets):
+        """targets 为 {pid: 进程名} 的副本"""
+        listbox = self.listbox
+        listbox.delete(0, self.tk.END)
+        self._pids = list(targets)
+        for pid, name in targets.items():
+            listbox.insert(self.tk.END, f"{name} (PID: {pid})")
+
+    def _remove_selected(self):
+        selected = self.listbox.curselection()
+        if not selected:
+            from tkinter import messagebox
+            messagebox.showwarning("提示", "请先选择一个进程", parent=self.window)
+            return
+        index = selected[0]
+        pid = self._pids.pop(index)
+        # 恢复音量并移除进程
+        self.on_remove(pid)
+        # 更新列表
+        self.listbox.delete(index)
@@ -0,0 +1,396 @@
+"""会话/窗口时间线的录制与回放
+
+录制：配置文件中设置 trace_file 后，控制器每轮tick把桌面状态的变化追加写入 JSONL 文件，
+每行一条记录，只记录差异：
+
+    {"op": "header", "t": 0.0, "n": 0, "version": 1, "minimize_only": true, "profiles": {},
+     "mute_grace": 0.0, "unmute_hysteresis": 0.0, "transparent_processes": [...]}
+    {"op": "proc", "t": 0.5, "n": 1, "pid": 1234, "name": "game.exe", "exe": "...", "ppid": 1200,
+     "sessions": 1, "windows": 1, "iconic": false}
+    {"op": "state", "t": 3.2, "n": 7, "pid": 1234, "sessions": 1, "windows": 1, "iconic": true}
+    {"op": "gone", ...}  {"op": "fg", "pid": ...}  {"op": "target", "pid": ..., "name": ...}
+    {"op": "untarget", ...}  {"op": "set", "key": "paused", "value": true}
+    {"op": "set", "key": "force_mute", "value": [1234, true]}
+    {"op": "mute", "t": 3.2, "n": 7, "decisions": [[1234, true]]}
+
+t 为相对录制开始的秒数，n 为tick序号，同一轮tick的记录 n 相同（tick之间的托盘/控制接口
+操作记入下一轮）。每次启动录制先写一条 header，同一个文件可以包含多段录制。
+
+回放：按 n 分组，把每组的状态变化应用到 FakeBackend，推送对应事件后执行一轮
+monitor_tick，和录制时的静音决策比较。speed 为 1 时按原始时间间隔回放，为 0 时尽快
+回放；延迟静音（grace）使用按录制时间推进的虚拟时钟，两种速度的决策一致。
+
+    python trace_replay.py trace.jsonl
+    python trace_replay.py trace.jsonl --speed 1 --output replay.json
+"""
+import json
+import logging
+import os
+import sys
+import tempfile
+import time
+
+from session_events import (
+    SESSION_CREATED, SESSION_DISCONNECTED, FOREGROUND_CHANGED, WINDOW_MINIMIZED, WINDOW_RESTORED,
+)
+
+TRACE_VERSION = 1
+FLUSH_INTERVAL = 1.0
+# 控制器操作（其余记录都是桌面状态变化）
+COMMAND_OPS = ('target', 'untarget', 'set')
+# header 中记录、回放时写入配置的静音相关设置
+HEADER_SETTINGS = ('minimize_only', 'profiles', 'mute_grace', 'unmute_hysteresis', 'transparent_processes')
+# 报告中最多列出的分歧数
+MAX_DIVERGENCES = 20
+
+
+class TraceRecorder:
+    """追加写入的时间线录制器，只在核心线程中调用"""
+
+    def __init__(self, path, backend, config=None, clock=time.monotonic):
+        self.path = path
+        self.backend = backend
+        self.clock = clock
+        self._file = open(path, 'a', encoding='utf-8')
+        self._started = clock()
+        self._flushed = self._started
+        self._states = {}  # {pid: (创建时间, 会话数, 窗口数, 是否全部最小化)}
+        self._foreground = None
+        self.tick_count = 0
+        self._in_tick = False
+        self.records = 0
+        self._write(dict(op='header', version=TRACE_VERSION, **(config or {})))
+
+    def start_tick(self):
+        """每轮tick开始时调用，到 end_tick 之前的记录都属于这一轮"""
+        self.tick_count += 1
+        self._in_tick = True
+
+    def end_tick(self):
+        self._in_tick = False
+
+    def tick(self, snapshot, foreground_pid):
+        """记录本轮tick看到的会话、窗口和前台窗口的变化"""
+        states = {}
+        infos = {}
+        for entry in snapshot:
+            state = states.get(entry.pid)
+            if state is None:
+                states[entry.pid] = [entry.info.create_time, 1, 0, True]
+                infos[entry.pid] = entry.info
+            else:
+                state[1] += 1
+        for hwnd, pid, iconic in self.backend.enum_windows():
+            state = states.get(pid)
+            if state is None:
+                state = states[pid] = [None, 0, 0, True]
+            state[2] += 1
+            state[3] = state[3] and iconic
+
+        previous = self._states
+        current = {}
+        for pid, (create_time, sessions, windows, iconic) in states.items():
+            state = current[pid] = (create_time, sessions, windows, bool(windows) and iconic)
+            old = previous.get(pid)
+            if old is not None and old[0] is not None and create_time is not None and old[0] != create_time:
+                # pid 被新进程复用
+                self._write({'op': 'gone', 'pid': pid})
+                old = None
+            if old is None:
+                self._write_process(pid, state, infos.get(pid))
+            elif old[1:] != state[1:]:
+                self._write({'op': 'state', 'pid': pid, 'sessions': state[1],
+                             'windows': state[2], 'iconic': state[3]})
+        for pid in previous.keys() - current.keys():
+            self._write({'op': 'gone', 'pid': pid})
+        self._states = current
+
+        if foreground_pid != self._foreground:
+            self._foreground = foreground_pid
+            self._write({'op': 'fg', 'pid': foreground_pid})
+
+    def decide(self, changed, desired):
+        """记录本轮tick实际下发的静音决策"""
+        if changed:
+            self._write({'op': 'mute', 'decisions': [[pid, desired.get(pid, False)] for pid in sorted(changed)]})
+
+    def target(self, pid, name):
+        self._write({'op': 'target', 'pid': pid, 'name': name})
+
+    def untarget(self, pid):
+        self._write({'op': 'untarget', 'pid': pid})
+
+    def setting(self, key, value):
+        """记录影响静音决策的设置变化（paused、minimize_only、force_mute）"""
+        self._write({'op': 'set', 'key': key, 'value': value})
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def stats(self):
+        return {'ticks': self.tick_count, 'records': self.records}
+
+    def _write_process(self, pid, state, info):
+        if info is not None:
+            name, exe, ppid = info.name, info.exe, info.ppid
+        else:
+            try:
+                metadata = self.backend.process_metadata(pid)
+            except Exception:
+                metadata = None
+            name, exe, ppid = metadata if metadata is not None else ('', None, 0)
+        self._write({'op': 'proc', 'pid': pid, 'name': name, 'exe': exe, 'ppid': ppid,
+                     'sessions': state[1], 'windows': state[2], 'iconic': state[3]})
+
+    def _write(self, record):
+        if self._file is None:
+            return
+        now = self.clock()
+        record['t'] = round(now - self._started, 3)
+        # tick之外的操作在下一轮tick之前生效
+        record['n'] = self.tick_count if self._in_tick else self.tick_count + 1
+        self._file.write(json.dumps(record, ensure_ascii=False, separators=(',', ':')) + '\n')
+        self.records += 1
+        if now - self._flushed >= FLUSH_INTERVAL:
+            self._flushed = now
+            self._file.flush()
+
+
+def load_trace(path):
+    """读取录制文件，按 header 分段，返回每段的 (header, 记录列表)"""
+    segments = []
+    with open(path, encoding='utf-8') as f:
+        for line_no, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError:
+                # 录制中途退出时最后一行可能不完整
+                logging.info(f"跳过无法解析的记录: 第 {line_no} 行")
+                continue
+            if record.get('op') == 'header':
+                segments.append((record, []))
+            elif segments:
+                segments[-1][1].append(record)
+    return segments
+
+
+def _group_ticks(records):
+    """按tick序号分组，保持原有顺序"""
+    groups = []
+    for record in records:
+        if groups and groups[-1][0] == record['n']:
+            groups[-1][1].append(record)
+        else:
+            groups.append((record['n'], [record]))
+    return groups
+
+
+class _DecisionLog:
+    """回放时代替录制器，只收集静音决策"""
+
+    def __init__(self):
+        self.decisions = None
+
+    def start_tick(self):
+        pass
+
+    def end_tick(self):
+        pass
+
+    def tick(self, snapshot, foreground_pid):
+        pass
+
+    def decide(self, changed, desired):
+        self.decisions = {pid: desired.get(pid, False) for pid in changed}
+
+    def target(self, pid, name):
+        pass
+
+    def untarget(self, pid):
+        pass
+
+    def setting(self, key, value):
+        pass
+
+    def close(self):
+        pass
+
+
+class TraceReplayer:
+    """把一段录制回放到使用 FakeBackend 的控制器中"""
+
+    def __init__(self, header, records, speed=0.0):
+        self.header = header
+        self.records = records
+        self.speed = speed
+        self.now = 0.0  # 虚拟时钟：当前回放到的录制时间
+
+    def make_controller(self, config_dir):
+        from platform_backend import FakeBackend
+        from MuteBackgroundGal import AudioController
+
+        config_file = os.path.join(config_dir, 'replay_config.json')
+        config = {key: self.header[key] for key in HEADER_SETTINGS if key in self.header}
+        with open(config_file, 'w', encoding='utf-8') as f:
+            json.dump(config, f)
+        backend = FakeBackend()
+        controller = AudioController(backend=backend, config_file=config_file)
+        controller.auto_match = False
+        controller.auto_close = False
+        controller.fader.configure(0)
+        controller.clock = lambda: self.now
+        controller.recorder = _DecisionLog()
+        return controller, backend
+
+    def run(self):
+        with tempfile.TemporaryDirectory() as config_dir:
+            controller, backend = self.make_controller(config_dir)
+            try:
+                return self._run(controller, backend)
+            finally:
+                controller.config_store.close()
+                controller.fader.stop()
+
+    def _run(self, controller, backend):
+        engine = controller.event_engine
+        log = controller.recorder
+        ticks = decisions = 0
+        divergences = []
+        divergent_ticks = 0
+        tick_seconds = 0.0
+        wall_start = time.perf_counter()
+        for n, records in _group_ticks(self.records):
+            t = records[0]['t']
+            if self.speed > 0:
+                delay = wall_start + t / self.speed - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+            self.now = t
+
+            recorded = {}
+            commands = []
+            for record in records:
+                op = record['op']
+                if op == 'mute':
+                    recorded.update((pid, muted) for pid, muted in record['decisions'])
+                elif op in COMMAND_OPS:
+                    commands.append(record)
+                else:
+                    self._apply(controller, backend, record)
+            # 桌面状态先就位，再执行目标和设置的变化
+            for record in commands:
+                self._command(controller, backend, record)
+
+            log.decisions = None
+            events = engine.wait(0)
+            start = time.perf_counter()
+            controller.monitor_tick(events)
+            tick_seconds += time.perf_counter() - start
+            ticks += 1
+            replayed = log.decisions or {}
+            decisions += len(replayed)
+            if replayed != recorded:
+                divergent_ticks += 1
+                if len(divergences) < MAX_DIVERGENCES:
+                    divergences.append({
+                        'n': n, 't': t,
+                        'recorded': [[pid, muted] for pid, muted in sorted(recorded.items())],
+                        'replayed': [[pid, muted] for pid, muted in sorted(replayed.items())],
+                    })
+
+        return {
+            'duration_s': self.now,
+            'speed': self.speed,
+            'ticks': ticks,
+            'decisions': decisions,
+            'tick_ms_avg': tick_seconds * 1000 / ticks if ticks else 0.0,
+            'ticks_per_second': ticks / tick_seconds if tick_seconds else 0.0,
+            'wall_s': time.perf_counter() - wall_start,
+            'mute_latency': engine.mute_latency.summary(),
+            'divergent_ticks': divergent_ticks,
+            'divergences': divergences,
+        }
+
+    def _apply(self, controller, backend, record):
+        """把一条状态变化应用到 FakeBackend，并推送控制器会收到的事件"""
+        op = record['op']
+        emit = controller.event_engine.emit
+        pid = record.get('pid')
+        if op == 'proc':
+            backend.add_process(pid, record['name'], sessions=record['sessions'], windows=0,
+                                exe=record.get('exe'), parent=record.get('ppid') or 0)
+            backend.set_window_count(pid, record['windows'], record['iconic'])
+            if record['sessions']:
+                emit(SESSION_CREATED, pid)
+        elif op == 'state':
+            sessions = sum(1 for s in backend.sessions if s.pid == pid)
+            was_iconic = bool(backend.windows_of(pid)) and all(
+                backend.windows[hwnd].iconic for hwnd in backend.windows_of(pid))
+            backend.set_session_count(pid, record['sessions'])
+            backend.set_window_count(pid, record['windows'], record['iconic'])
+            if record['sessions'] != sessions:
+                emit(SESSION_CREATED if record['sessions'] > sessions else SESSION_DISCONNECTED, pid)
+            if record['iconic'] != was_iconic:
+                for hwnd in backend.windows_of(pid):
+                    backend.windows[hwnd].iconic = record['iconic']
+                emit(WINDOW_MINIMIZED if record['iconic'] else WINDOW_RESTORED, pid)
+        elif op == 'gone':
+            backend.remove_process(pid)
+            emit(SESSION_DISCONNECTED, pid)
+        elif op == 'fg':
+            backend.set_foreground(pid)
+            emit(FOREGROUND_CHANGED, pid)
+
+    def _command(self, controller, backend, record):
+        op = record['op']
+        if op == 'target':
+            controller.add_target(record['pid'], record['name'], backend.create_times.get(record['pid']))
+        elif op == 'untarget':
+            controller.remove_and_restore(record['pid'])
+        elif op == 'set':
+            if record['key'] == 'paused':
+                controller.set_paused(record['value'])
+            elif record['key'] == 'minimize_only':
+                controller.minimize_only = record['value']
+                controller.compile_profiles()
+            elif record['key'] == 'force_mute':
+                pid, forced = record['value']
+                controller.set_force_mute(pid, forced)
+
+
+def replay_file(path, speed=0.0):
+    """回放文件中的所有录制段，返回每段的报告"""
+    return [TraceReplayer(header, records, speed).run() for header, records in load_trace(path)]
+
+
+def main(argv=None):
+    import argparse
+    parser = argparse.ArgumentParser(description='回放录制的会话/窗口时间线')
+    parser.add_argument('trace', help='录制文件（JSONL）')
+    parser.add_argument('--speed', type=float, default=0.0, help='回放速度，1 为原速，0 为尽快回放')
+    parser.add_argument('--output', help='把报告写入 JSON 文件')
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.WARNING)
+    reports = replay_file(args.trace, args.speed)
+    for i, report in enumerate(reports):
+        latency = report['mute_latency']
+        print(f"segment {i}: {report['ticks']} ticks, {report['decisions']} decisions, "
+              f"{report['ticks_per_second']:.0f} ticks/s, latency avg {latency['avg_ms']:.3f} ms, "
+              f"{report['divergent_ticks']} divergent ticks")
+        for divergence in report['divergences']:
+            print(f"  n={divergence['n']} t={divergence['t']}: "
+                  f"recorded {divergence['recorded']} replayed {divergence['replayed']}")
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(reports, f, ensure_ascii=False, indent=2)
+    return 1 if any(report['divergent_ticks'] for report in reports) else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,251 @@
+"""音量渐变
+
+静音/取消静音时不再直接切换 SetMute，而是用 SetMasterVolume 在 duration 内渐变：
+
+- 渐出：从当前音量降到 0，结束时 SetMute(True) 并把音量写回原值，静音状态仍由 SetMute 保存
+- 渐入：先把音量设为 0 再取消静音，然后升回原音量，结束时精确写回原值
+- 降到后台音量（level > 0）时不静音，结束时停在目标音量；原音量由调用方保存，渐入时传回
+- 渐变中途反向时从当前音量开始，时长按剩余距离缩放，不会跳变
+- 每次渐变可以单独指定时长（按游戏配置的策略），不指定时使用全局时长
+- 所有渐变由同一个定时线程驱动，每帧批量下发一次，不占用监控tick
+"""
+import logging
+import sys
+import threading
+import time
+
+from session_events import LatencyStats
+
+FADE_DURATION = 0.3
+FADE_CURVE = 'ease'
+FRAME_INTERVAL = 0.01
+
+CURVES = {
+    'linear': lambda t: t,
+    'ease': lambda t: t * t * (3 - 2 * t),
+    'smooth': lambda t: t * t * t * (t * (t * 6 - 15) + 10),
+}
+
+
+class Fade:
+    """单个会话的渐变状态"""
+
+    __slots__ = ('session', 'start_level', 'target', 'original', 'start_time', 'duration',
+                 'mute_at_end', 'out', 'level')
+
+    def __init__(self, session, start_level, target, original, start_time, duration, mute_at_end, out):
+        self.session = session
+        self.start_level = start_level
+        self.target = target
+        self.original = original      # 渐变前的音量，结束后写回
+        self.start_time = start_time
+        self.duration = duration
+        self.mute_at_end = mute_at_end
+        self.out = out                # 渐出（静音或降到后台音量）
+        self.level = start_level      # 最近一帧写入的音量
+
+
+def _set_timer_resolution(enabled):
+    """Windows 下渐变期间把系统定时器精度提高到 1ms，空闲时恢复以免耗电"""
+    if sys.platform != 'win32':
+        return
+    try:
+        import ctypes
+        winmm = ctypes.windll.winmm
+        if enabled:
+            winmm.timeBeginPeriod(1)
+        else:
+            winmm.timeEndPeriod(1)
+    except Exception as e:
+        logging.info(f"设置定时器精度失败: {e}")
+
+
+class VolumeFader:
+    """以会话标识为键的音量渐变引擎，duration 为 0 时不启用"""
+
+    def __init__(self, backend, duration=FADE_DURATION, curve=FADE_CURVE, interval=FRAME_INTERVAL):
+        self.backend = backend
+        self.interval = interval
+        self.configure(duration, curve)
+        self._fades = {}  # {session_key: Fade}
+        self._cond = threading.Condition()
+        self._thread = None
+        self._running = False
+        self.timer_error = LatencyStats()  # 每帧相对计划时间的延迟
+        self.frames = 0
+        self.fade_frames = 0  # 各帧活跃渐变数之和
+        self.cpu = 0.0
+        self.completed = 0
+        self.reversed = 0
+
+    @property
+    def enabled(self):
+        return self.duration > 0
+
+    def configure(self, duration, curve=FADE_CURVE):
+        self.duration = max(0.0, float(duration))
+        if curve not in CURVES:
+            logging.info(f"未知的渐变曲线 {curve}，改用 {FADE_CURVE}")
+            curve = FADE_CURVE
+        self.curve = curve
+        self._curve = CURVES[curve]
+
+    def active(self, session):
+        """会话是否正在渐变"""
+        with self._cond:
+            return self.backend.session_key(session) in self._fades
+
+    def fade_out(self, session, duration=None, level=0.0):
+        """渐变到静音；level > 0 时降到原音量的 level 倍而不静音。返回原音量"""
+        key = self.backend.session_key(session)
+        with self._cond:
+            fade = self._fades.get(key)
+            if fade is not None:
+                if fade.out:
+                    return fade.original
+                # 渐入中途反向
+                self.reversed += 1
+                start, original = fade.level, fade.original
+            else:
+                start = original = self.backend.get_volume(session)
+            target = original * level if level > 0 else 0.0
+            self._add(key, Fade(session, start, target, original, time.perf_counter(),
+                                self._scaled(start - target, original, duration), level <= 0, True))
+            return original
+
+    def fade_in(self, session, duration=None, original=None):
+        """渐变回原音量；original 为降到后台音量前的音量，为 None 表示会话处于静音"""
+        key = self.backend.session_key(session)
+        with self._cond:
+            fade = self._fades.get(key)
+            if fade is not None:
+                if not fade.out:
+                    return
+                # 渐出中途反向：会话还没有静音，直接从当前音量升回去
+                self.reversed += 1
+                start, original = fade.level, fade.original
+            elif original is not None:
+                # 会话没有静音，只是音量降低了
+                start = self.backend.get_volume(session)
+            else:
+                # 会话处于静音且音量为原值：先把音量降到 0 再取消静音
+                original = self.backend.get_volume(session)
+                start = 0.0
+                self.backend.set_volume(session, 0.0)
+                self.backend.set_mute(session, False)
+            self._add(key, Fade(session, start, original, original, time.perf_counter(),
+                                self._scaled(original - start, original, duration), False, False))
+
+    def finish_all(self):
+        """立即结束所有渐变（退出时调用），结束后的状态与正常完成一致"""
+        with self._cond:
+            fades = list(self._fades.values())
+            self._fades.clear()
+            for fade in fades:
+                self._finish(fade)
+
+    def stop(self):
+        self.finish_all()
+        with self._cond:
+            self._running = False
+            self._cond.notify()
+        if self._thread is not None:
+            self._thread.join(timeout=1)
+            self._thread = None
+
+    def stats(self):
+        return {
+            'active': len(self._fades),
+            'completed': self.completed,
+            'reversed': self.reversed,
+            'frames': self.frames,
+            'timer_error': self.timer_error.summary(),
+            'cpu_ms_per_fade_frame': self.cpu * 1000 / self.fade_frames if self.fade_frames else 0.0,
+        }
+
+    def _scaled(self, distance, original, duration=None):
+        """按剩余距离缩放渐变时长"""
+        if original <= 0:
+            return 0.0
+        if duration is None:
+            duration = self.duration
+        return duration * min(1.0, abs(distance) / original)
+
+    def _add(self, key, fade):
+        self._fades[key] = fade
+        if not self._running:
+            self._running = True
+            self._thread = threading.Thread(target=self._run, name='volume-fader', daemon=True)
+            self._thread.start()
+        self._cond.notify()
+
+    def _finish(self, fade):
+        try:
+            if fade.mute_at_end:
+                # 静音后把音量写回原值
+                self.backend.set_mute(fade.session, True)
+                self.backend.set_volume(fade.session, fade.original)
+            else:
+                self.backend.set_volume(fade.session, fade.target)
+        except Exception as e:
+            logging.info(f"结束音量渐变失败: {e}")
+        self.completed += 1
+
+    def _run(self):
+        timer_raised = False
+        next_frame = time.perf_counter()
+        with self._cond:
+            while self._running:
+                if not self._fades:
+                    if timer_raised:
+                        _set_timer_resolution(False)
+                        timer_raised = False
+                    self._cond.wait()
+                    next_frame = time.perf_counter()
+                    continue
+                if not timer_raised:
+                    _set_timer_resolution(True)
+                    timer_raised = True
+
+                now = time.perf_counter()
+                if now < next_frame:
+                    # 被新渐变提前唤醒，等到计划时间
+                    self._cond.wait(next_frame - now)
+                    continue
+                self.timer_error.record(now - next_frame)
+                cpu_start = time.process_time()
+                self._frame(now)
+                self.cpu += time.process_time() - cpu_start
+
+                next_frame += self.interval
+                if next_frame < now:
+                    # 落后太多时跳过错过的帧
+                    next_frame = now + self.interval
+                self._cond.wait(max(0.0, next_frame - time.perf_counter()))
+            if timer_raised:
+                _set_timer_resolution(False)
+
+    def _frame(self, now):
+        curve = self._curve
+        changes = []
+        pending = []
+        finished = []
+        for key, fade in self._fades.items():
+            t = 1.0 if fade.duration <= 0 else (now - fade.start_time) / fade.duration
+            if t >= 1.0:
+                finished.append(key)
+                continue
+            fade.level = fade.start_level + (fade.target - fade.start_level) * curve(t)
+            changes.append((fade.session, fade.level))
+            pending.append(key)
+
+        self.frames += 1
+        self.fade_frames += len(self._fades)
+        if changes:
+            results = self.backend.set_volume_batch(changes)
+            # 会话已失效的渐变直接丢弃
+            for key, ok in zip(pending, results):
+                if not ok:
+                    self._fades.pop(key, None)
+        for key in finished:
+            self._finish(self._fades.pop(key))
@@ -0,0 +1,103 @@
+import time
+
+from session_events import WINDOW_MINIMIZED, WINDOW_RESTORED
+
+
+class WindowIndex:
+    """pid -> 可见顶层窗口最小化状态的索引
+
+    每轮tick最多全量枚举一次窗口；只有最小化/还原事件时按 pid 增量刷新，
+    最小化判断变成字典查找。
+    """
+
+    def __init__(self, backend):
+        self.backend = backend
+        self._windows = {}  # {pid: {hwnd: is_iconic}}
+        self._built = False
+        self.hits = 0
+        self.misses = 0
+        self.rebuilds = 0
+        self.incremental_updates = 0
+        self.last_rebuild_ms = 0.0
+        self.total_rebuild_ms = 0.0
+
+    def invalidate(self):
+        """丢弃了窗口事件时调用，下一次 refresh 全量重建"""
+        self._built = False
+
+    def rebuild(self):
+        """全量枚举所有可见顶层窗口"""
+        start = time.perf_counter()
+        windows = {}
+        for hwnd, pid, iconic in self.backend.enum_windows():
+            windows.setdefault(pid, {})[hwnd] = iconic
+        self._windows = windows
+        self._built = True
+
+        elapsed = (time.perf_counter() - start) * 1000
+        self.rebuilds += 1
+        self.last_rebuild_ms = elapsed
+        self.total_rebuild_ms += elapsed
+
+    def refresh_pid(self, pid):
+        """只重新查询某个 pid 已知窗口的状态"""
+        windows = self._windows.get(pid)
+        if not windows:
+            return
+        for hwnd in list(windows):
+            iconic = self.backend.get_window_state(hwnd)
+            if iconic is None:
+                del windows[hwnd]
+            else:
+                windows[hwnd] = iconic
+        self.incremental_updates += 1
+
+    def refresh(self, events=()):
+        """根据本轮事件刷新索引：能增量处理就增量，否则全量重建"""
+        if (self._built and events and all(
+                e.kind in (WINDOW_MINIMIZED, WINDOW_RESTORED) and e.pid in self._windows
+                for e in events)):
+            for pid in {e.pid for e in events}:
+                self.refresh_pid(pid)
+        else:
+            self.rebuild()
+
+    def is_minimized(self, pid):
+        """该进程所有可见窗口都最小化时返回 True；没有可见窗口返回 False"""
+        windows = self._windows.get(pid)
+        if not windows:
+            self.misses += 1
+            return False
+        self.hits += 1
+        return all(windows.values())
+
+    def all_minimized(self, pids):
+        """多个进程的可见窗口全部最小化时返回 True；都没有可见窗口返回 False"""
+        found = False
+        for pid in pids:
+            windows = self._windows.get(pid)
+            if not windows:
+                continue
+            found = True
+            if not all(windows.values()):
+                self.hits += 1
+                return False
+        if found:
+            self.hits += 1
+        else:
+            self.misses += 1
+        return found
+
+    def pids(self):
+        """拥有可见窗口的进程"""
+        return self._windows.keys()
+
+    def stats(self):
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'rebuilds': self.rebuilds,
+            'incremental_updates': self.incremental_updates,
+            'last_rebuild_ms': self.last_rebuild_ms,
+            'avg_rebuild_ms': self.total_rebuild_ms / self.rebuilds if self.rebuilds else 0.0,
+        }